@@ -0,0 +1,308 @@
+"""
+性能基准测试
+
+生成可配置规模的合成面板数据（企业数 × 年份数 × 行业数，列名与真实数据一致），
+分别测量数据加载、单企业查询、行业平均计算、图表构建以及merge_excel_files()端到端合并的
+耗时和峰值内存，结果写入JSON报告，可与之前的报告对比。
+
+用法示例：
+    python benchmark.py --firms 5000 --years 20 --industries 80 -o bench.json
+    python benchmark.py --firms 5000 --compare bench.json -o bench_new.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import data_store
+from industry_cube import build_industry_cube, IndustryCube
+from panel_index import PanelIndex
+
+# 合成数据文件名（与各应用使用的文件名一致）
+INDEX_FILE = '数字化转型指数合并数据.xlsx'
+INDUSTRY_FILE = '最终数据dta格式-上市公司年度行业代码.xlsx'
+MERGED_FILE = '数字化转型指数合并数据_带行业信息.xlsx'
+
+# 每次测量中执行的随机查询次数
+QUERY_COUNT = 200
+
+
+def generate_panel(n_firms=1000, n_years=20, n_industries=50, start_year=2000, seed=0):
+    """生成合成面板数据，返回 (带行业信息的面板, 行业代码表)"""
+    rng = np.random.default_rng(seed)
+
+    # 沪深两市风格的6位股票代码
+    codes = np.sort(rng.choice(np.arange(1, 700000), size=n_firms, replace=False))
+    names = np.array([f'企业{i:05d}' for i in range(n_firms)])
+    industry_codes = np.array([f'C{i:02d}' for i in range(n_industries)])
+    industry_names = np.array([f'行业{i:02d}' for i in range(n_industries)])
+    firm_industry = rng.integers(0, n_industries, size=n_firms)
+
+    years = np.arange(start_year, start_year + n_years)
+    firm_idx = np.repeat(np.arange(n_firms), n_years)
+    year_col = np.tile(years, n_firms)
+
+    # 指数随年份整体上升，叠加企业差异和随机扰动
+    base = rng.gamma(2.0, 5.0, size=n_firms)
+    trend = rng.normal(1.5, 0.8, size=n_firms)
+    t = year_col - start_year
+    index = base[firm_idx] + trend[firm_idx] * t + rng.normal(0, 3, size=len(firm_idx))
+    index = np.clip(np.round(index), 0, None).astype(np.int64)
+
+    panel = pd.DataFrame({
+        '股票代码': codes[firm_idx],
+        '企业名称': names[firm_idx],
+        '数字化转型指数': index,
+        '年份': year_col,
+        '行业代码': industry_codes[firm_industry[firm_idx]],
+        '行业名称': industry_names[firm_industry[firm_idx]],
+    })
+    # 与真实数据一样按年份排列
+    panel = panel.sort_values(['年份', '股票代码'], kind='stable', ignore_index=True)
+
+    industry = pd.DataFrame({
+        '股票代码全称': panel['股票代码'],
+        '年度': panel['年份'],
+        '行业代码': panel['行业代码'],
+        '行业名称': panel['行业名称'],
+    })
+    return panel, industry
+
+
+def write_dataset(panel, industry, workdir, formats=('xlsx', 'parquet')):
+    """将合成数据写入工作目录，返回各文件路径"""
+    paths = {}
+    if 'xlsx' in formats:
+        paths['index_xlsx'] = os.path.join(workdir, INDEX_FILE)
+        paths['industry_xlsx'] = os.path.join(workdir, INDUSTRY_FILE)
+        paths['merged_xlsx'] = os.path.join(workdir, MERGED_FILE)
+        panel.drop(columns=['行业代码', '行业名称']).to_excel(paths['index_xlsx'], index=False)
+        industry.to_excel(paths['industry_xlsx'], index=False)
+        panel.to_excel(paths['merged_xlsx'], index=False)
+    if 'parquet' in formats:
+        # 单独的子目录：与Excel文件同目录同名时，data_store.load_panel会改为读取Parquet文件
+        paths['merged_parquet'] = os.path.join(workdir, 'parquet', os.path.splitext(MERGED_FILE)[0] + '.parquet')
+        os.makedirs(os.path.dirname(paths['merged_parquet']), exist_ok=True)
+        panel.to_parquet(paths['merged_parquet'], index=False)
+    return paths
+
+
+def measure(func, repeat=3, setup=None):
+    """多次执行取耗时中位数，另单独执行一次测量峰值内存（避免tracemalloc影响计时）"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'seconds': statistics.median(timings),
+        'min_seconds': min(timings),
+        'repeat': repeat,
+        'peak_mb': peak / 1024 / 1024,
+    }
+
+
+def run_benchmarks(panel, paths, workdir, repeat=3, skip_merge=False):
+    """执行全部基准测试，返回 {测试名: 结果}"""
+    results = {}
+    rng = np.random.default_rng(1)
+    codes = panel['股票代码'].unique()
+    query_codes = rng.choice(codes, size=QUERY_COUNT)
+    query_years = rng.choice(panel['年份'].unique(), size=QUERY_COUNT)
+
+    def record(name, func, **kwargs):
+        print(f"  测量 {name} ...")
+        results[name] = measure(func, repeat=repeat, **kwargs)
+        print(f"  ✓ {name}: {results[name]['seconds'] * 1000:.2f} ms，峰值内存 {results[name]['peak_mb']:.1f} MB")
+
+    # 数据加载
+    data_store.CACHE_DIR = os.path.join(workdir, '.data_cache')
+
+    def clear_cache():
+        if os.path.isdir(data_store.CACHE_DIR):
+            for name in os.listdir(data_store.CACHE_DIR):
+                os.remove(os.path.join(data_store.CACHE_DIR, name))
+
+    if 'merged_xlsx' in paths:
+        record('load.read_excel', lambda: pd.read_excel(paths['merged_xlsx']))
+        record('load.cache_cold', lambda: data_store.load_panel(paths['merged_xlsx']), setup=clear_cache)
+        data_store.load_panel(paths['merged_xlsx'])
+        record('load.cache_warm', lambda: data_store.load_panel(paths['merged_xlsx']))
+        data_store.load_panel(paths['merged_xlsx'], compact=True)
+        record('load.cache_warm_compact', lambda: data_store.load_panel(paths['merged_xlsx'], compact=True))
+    if 'merged_parquet' in paths:
+        record('load.read_parquet', lambda: pd.read_parquet(paths['merged_parquet']))
+
+    # 单企业查询：整表布尔筛选 vs 面板索引
+    def mask_queries():
+        for code, year in zip(query_codes, query_years):
+            panel[(panel['股票代码'] == code) & (panel['年份'] == year)]
+            panel[panel['股票代码'] == code].sort_values('年份')
+
+    record('query.boolean_mask', mask_queries)
+    record('query.index_build', lambda: PanelIndex(panel))
+    index = PanelIndex(panel)
+
+    def index_queries():
+        for code, year in zip(query_codes, query_years):
+            index.row(code, year)
+            index.company(code)
+
+    record('query.index_lookup', index_queries)
+
+    # 行业平均
+    industries = panel['行业代码'].unique()
+
+    def groupby_industry_avg():
+        for code in industries[:20]:
+            panel[panel['行业代码'] == code].groupby('年份')['数字化转型指数'].mean()
+
+    record('industry.groupby_avg', groupby_industry_avg)
+    record('industry.cube_build', lambda: IndustryCube(build_industry_cube(panel)))
+    cube = IndustryCube(build_industry_cube(panel))
+    record('industry.cube_lookup', lambda: [cube.series(code) for code in industries[:20]])
+
+    # 图表构建
+    company = index.company(query_codes[0])
+    industry_avg = cube.series(company['行业代码'].iloc[0])
+    try:
+        import plotly.graph_objects as go
+
+        def plotly_figure():
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(x=company['年份'], y=company['数字化转型指数'], mode='lines+markers'))
+            fig.add_trace(go.Scatter(x=industry_avg['年份'], y=industry_avg['平均值'], mode='lines+markers'))
+            fig.update_layout(template='plotly_white', height=500)
+            fig.to_dict()
+
+        record('chart.plotly', plotly_figure)
+    except ImportError:
+        print("  ⚠ 未安装plotly，跳过 chart.plotly")
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        def matplotlib_figure():
+            fig, ax = plt.subplots(figsize=(12, 6))
+            ax.plot(company['年份'], company['数字化转型指数'], marker='o')
+            ax.plot(industry_avg['年份'], industry_avg['平均值'], marker='^', linestyle='--')
+            fig.savefig(io.BytesIO(), format='png')
+            plt.close(fig)
+
+        record('chart.matplotlib', matplotlib_figure)
+    except ImportError:
+        print("  ⚠ 未安装matplotlib，跳过 chart.matplotlib")
+
+    # 端到端合并
+    if not skip_merge and 'index_xlsx' in paths:
+        import merge_excel
+        output = os.path.join(workdir, 'merge_output.xlsx')
+
+        def remove_output():
+            if os.path.exists(output):
+                os.remove(output)
+
+        def checked(merge):
+            """合并函数的输出被重定向，失败（返回False或未生成输出文件）时抛出异常，不记录耗时"""
+            def run():
+                with contextlib.redirect_stdout(io.StringIO()) as log:
+                    ok = merge(paths['index_xlsx'], paths['industry_xlsx'], output)
+                if not ok or not os.path.exists(output) or os.path.getsize(output) == 0:
+                    raise RuntimeError(f"{merge.__name__} 执行失败：\n{log.getvalue()[-2000:]}")
+            return run
+
+        record('merge.merge_excel_files', checked(merge_excel.merge_excel_files), setup=remove_output)
+        record('merge.streaming', checked(merge_excel.merge_excel_files_streaming), setup=remove_output)
+
+    return results
+
+
+def compare_reports(old, new):
+    """打印两份报告的对比（耗时比值小于1表示变快）"""
+    print("\n对比结果：")
+    print(f"{'测试项':<28}{'之前(ms)':>12}{'现在(ms)':>12}{'比值':>8}")
+    for name, result in new['results'].items():
+        previous = old.get('results', {}).get(name)
+        if previous is None:
+            print(f"{name:<28}{'-':>12}{result['seconds'] * 1000:>12.2f}{'-':>8}")
+            continue
+        ratio = result['seconds'] / previous['seconds'] if previous['seconds'] else float('nan')
+        print(f"{name:<28}{previous['seconds'] * 1000:>12.2f}{result['seconds'] * 1000:>12.2f}{ratio:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="企业数字化转型指数系统性能基准测试")
+    parser.add_argument('--firms', type=int, default=1000, help="企业数量")
+    parser.add_argument('--years', type=int, default=20, help="年份数量")
+    parser.add_argument('--industries', type=int, default=50, help="行业数量")
+    parser.add_argument('--formats', default='xlsx,parquet', help="生成的文件格式（逗号分隔：xlsx,parquet）")
+    parser.add_argument('--repeat', type=int, default=3, help="每项测试的重复次数")
+    parser.add_argument('--skip-merge', action='store_true', help="跳过端到端合并测试")
+    parser.add_argument('--workdir', default=None, help="合成数据的存放目录（默认使用临时目录）")
+    parser.add_argument('-o', '--output', default='benchmark_report.json', help="JSON报告输出路径")
+    parser.add_argument('--compare', default=None, help="与之前的JSON报告对比")
+    args = parser.parse_args()
+
+    formats = tuple(f.strip() for f in args.formats.split(',') if f.strip())
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(workdir, exist_ok=True)
+
+        print(f"生成合成数据：{args.firms}家企业 × {args.years}年 × {args.industries}个行业...")
+        panel, industry = generate_panel(args.firms, args.years, args.industries)
+        paths = write_dataset(panel, industry, workdir, formats)
+        print(f"✓ 共 {len(panel)} 条记录，文件保存在：{workdir}")
+
+        print("\n开始基准测试...")
+        results = run_benchmarks(panel, paths, workdir, repeat=args.repeat, skip_merge=args.skip_merge)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'firms': args.firms,
+            'years': args.years,
+            'industries': args.industries,
+            'rows': len(panel),
+            'formats': list(formats),
+            'repeat': args.repeat,
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ 报告已保存至：{args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare_reports(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
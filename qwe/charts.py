@@ -0,0 +1,114 @@
+"""
+图表构建工具
+
+各应用共用的绘图设置：Matplotlib全局参数只设置一次，图形渲染为PNG后立即关闭
+（长时间运行时不累积图形对象）；点数较多的行业级散点图先抽样，再以WebGL（Scattergl）渲染。
+构建好的图表由各应用按（企业、行业、年份范围、数据版本）缓存，缓存满时淘汰最久未使用的条目。
+只有高亮点随选择变化的图表使用HighlightFigure：底图只绘制一次，之后只重绘高亮点。
+"""
+import io
+import threading
+
+import numpy as np
+
+# 每个应用缓存的图表数量（超出后淘汰最久未使用的图表）
+FIGURE_CACHE_SIZE = 64
+
+# 超过该点数时使用WebGL渲染
+WEBGL_THRESHOLD = 2000
+
+# 单条散点轨迹最多绘制的点数，超过时抽样
+MAX_POINTS = 5000
+
+# 每个应用缓存的HighlightFigure数量（每个保存一张完整的底图像素缓冲区）
+HIGHLIGHT_CACHE_SIZE = 8
+
+# 趋势图的公共布局
+TREND_LAYOUT = dict(
+    xaxis_title="年份",
+    yaxis_title="数字化转型指数",
+    hovermode="x unified",
+    template="plotly_white",
+)
+
+_matplotlib_ready = False
+
+
+def setup_matplotlib():
+    """设置一次Matplotlib全局参数（非交互后端、中文字体、负号显示）"""
+    global _matplotlib_ready
+    if _matplotlib_ready:
+        return
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']  # 中文字体
+    plt.rcParams['axes.unicode_minus'] = False  # 正确显示负号
+    _matplotlib_ready = True
+
+
+def figure_to_png(fig, dpi=100):
+    """将Matplotlib图形渲染为PNG字节并关闭图形"""
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+class HighlightFigure:
+    """底图只绘制一次、之后只重绘高亮点的Matplotlib图形
+
+    highlights为 键 → 散点图元 的字典，图元须以animated=True创建（不参与底图绘制）。
+    每次render时恢复底图像素，只绘制高亮点，再编码为PNG，开销与底图的复杂程度无关。
+    同一对象可能被多个会话同时使用，绘制过程加锁。
+    """
+
+    def __init__(self, fig, highlights, dpi=100):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        fig.set_dpi(dpi)
+        self.fig = fig
+        self._highlights = highlights
+        self._canvas = FigureCanvasAgg(fig)
+        self._canvas.draw()
+        self._background = self._canvas.copy_from_bbox(fig.bbox)
+        self._lock = threading.Lock()
+
+    def render(self, points):
+        """points为 键 → (x, y) 的字典（未给出的高亮点不显示），返回PNG字节"""
+        import matplotlib.image as mpimg
+
+        with self._lock:
+            self._canvas.restore_region(self._background)
+            for key, artist in self._highlights.items():
+                point = points.get(key)
+                artist.set_offsets([point] if point is not None else np.empty((0, 2)))
+                artist.axes.draw_artist(artist)
+            image = np.asarray(self._canvas.buffer_rgba()).copy()
+        buffer = io.BytesIO()
+        mpimg.imsave(buffer, image, format='png')
+        return buffer.getvalue()
+
+
+def sample_points(x, y, max_points=MAX_POINTS):
+    """点数超过max_points时均匀随机抽样（固定随机种子，保持原有顺序）"""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) <= max_points:
+        return x, y
+    keep = np.sort(np.random.default_rng(0).choice(len(x), max_points, replace=False))
+    return x[keep], y[keep]
+
+
+def scatter_trace(x, y, max_points=MAX_POINTS, **kwargs):
+    """散点轨迹：点数较多时先抽样，超过WEBGL_THRESHOLD时使用Scattergl"""
+    import plotly.graph_objects as go
+
+    x, y = sample_points(x, y, max_points)
+    trace = go.Scattergl if len(x) > WEBGL_THRESHOLD else go.Scatter
+    return trace(x=x, y=y, **kwargs)
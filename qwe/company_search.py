@@ -0,0 +1,126 @@
+"""
+企业搜索索引
+
+按数据版本一次性为所有企业建立搜索键（6位股票代码、企业名称、拼音首字母），
+支持前缀匹配（有序数组上二分查找）和名称子串匹配（字符n-gram倒排索引），
+输入时即时返回排序后的候选企业，代替包含数千个选项的下拉框。
+"""
+import bisect
+import re
+
+from data_store import format_code
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:  # 未安装pypinyin时不支持拼音首字母搜索
+    lazy_pinyin = None
+    Style = None
+
+# 默认返回的候选数量
+DEFAULT_LIMIT = 20
+
+# 名称子串匹配使用的n-gram长度
+NGRAM = 2
+
+# 匹配类型的排序权重（越小越靠前）
+_EXACT, _CODE_PREFIX, _NAME_PREFIX, _INITIALS_PREFIX, _NAME_CONTAINS = range(5)
+
+# 带交易所前后缀的股票代码（600000.SH、SZ000001）
+_CODE_QUERY = re.compile(r'(?:[a-z]{2})?(\d{1,6})(?:\.[a-z]{2})?')
+
+
+def pinyin_initials(name):
+    """企业名称的拼音首字母（如 招商银行 → zsyh，*ST金田 → stjt），未安装pypinyin时返回空字符串"""
+    if lazy_pinyin is None or not name:
+        return ''
+    parts = lazy_pinyin(name, style=Style.FIRST_LETTER, errors='default')
+    return ''.join(ch for part in parts for ch in part.lower() if ch.isalnum())
+
+
+class _PrefixIndex:
+    """有序键数组上的前缀查找：键排序后，同一前缀的键必然连续"""
+
+    def __init__(self, pairs):
+        pairs = sorted(pairs)
+        self._keys = [key for key, _ in pairs]
+        self._ids = [i for _, i in pairs]
+
+    def match(self, prefix):
+        start = bisect.bisect_left(self._keys, prefix)
+        end = bisect.bisect_left(self._keys, prefix + '\uffff', lo=start)
+        return self._ids[start:end]
+
+
+class CompanySearch:
+    """按股票代码、企业名称和拼音首字母搜索企业"""
+
+    def __init__(self, entries):
+        """entries为 (股票代码, 企业名称) 序列"""
+        self.codes = []
+        self.names = []
+        self._code_keys = []
+        for code, name in entries:
+            self.codes.append(code)
+            self.names.append('' if name is None or name != name else str(name))
+            self._code_keys.append(format_code(code))
+
+        self._lower_names = [name.lower() for name in self.names]
+        self._initials = [pinyin_initials(name) for name in self.names]
+        self._by_code = _PrefixIndex((key, i) for i, key in enumerate(self._code_keys))
+        self._by_name = _PrefixIndex((name, i) for i, name in enumerate(self._lower_names) if name)
+        self._by_initials = _PrefixIndex((key, i) for i, key in enumerate(self._initials) if key)
+
+        # 名称n-gram倒排索引（同时收录单字，支持单字查询）
+        self._grams = {}
+        for i, name in enumerate(self._lower_names):
+            for gram in {name[j:j + n] for n in (1, NGRAM) for j in range(len(name) - n + 1)}:
+                self._grams.setdefault(gram, []).append(i)
+
+    @classmethod
+    def from_index(cls, index):
+        """从面板索引（PanelIndex）创建搜索索引"""
+        return cls((code, index.name_for_code(code)) for code in index.codes())
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _contains(self, query):
+        """名称包含query的企业：取各n-gram倒排列表中最短的一个，再逐个核对"""
+        n = min(len(query), NGRAM)
+        postings = [self._grams.get(query[j:j + n], []) for j in range(len(query) - n + 1)]
+        candidates = min(postings, key=len)
+        return [i for i in candidates if query in self._lower_names[i]]
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """返回按匹配程度排序的 (股票代码, 企业名称) 列表"""
+        query = (query or '').strip().lower()
+        if not query:
+            return []
+
+        best = {}
+
+        def add(ids, rank):
+            for i in ids:
+                if i not in best or rank < best[i]:
+                    best[i] = rank
+
+        code_query = _CODE_QUERY.fullmatch(query)
+        if code_query:
+            digits = code_query.group(1)
+            add(self._by_code.match(digits), _CODE_PREFIX)
+            if len(digits) == 6:
+                add(self._by_code.match(digits), _EXACT)
+        add(self._by_name.match(query), _NAME_PREFIX)
+        add((i for i in self._by_name.match(query) if self._lower_names[i] == query), _EXACT)
+        if query.isascii() and query.isalnum():
+            add(self._by_initials.match(query), _INITIALS_PREFIX)
+        add(self._contains(query), _NAME_CONTAINS)
+
+        # 代码匹配按代码排序；名称匹配中匹配位置越靠前、名称越短越优先
+        def sort_key(i):
+            if best[i] <= _CODE_PREFIX:
+                return best[i], 0, 0, self._code_keys[i]
+            return best[i], self._lower_names[i].find(query), len(self.names[i]), self._code_keys[i]
+
+        ranked = sorted(best, key=sort_key)
+        return [(self.codes[i], self.names[i]) for i in ranked[:limit]]
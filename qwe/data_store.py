@@ -0,0 +1,270 @@
+"""
+共享数据访问层
+
+首次读取Excel工作簿时将其转换为带类型的Arrow IPC缓存文件（按源文件的
+修改时间+内容哈希建立键值），之后的启动直接内存映射读取该缓存；
+源Excel发生变化时自动重建缓存。
+
+可选的紧凑模式将企业名称、行业等字符串列转换为分类编码，股票代码转换为定长整数
+（补零只在显示时进行），年份转换为int16，指数转换为float32，以降低每个会话的内存占用。
+"""
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from stock_codes import format_code, normalize_codes
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # 未安装pyarrow时退回直接读取Excel
+    pa = None
+    feather = None
+
+# 缓存目录（与应用程序同目录）
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data_cache')
+
+# 计算文件哈希时每次读取的块大小
+_HASH_CHUNK_SIZE = 1 << 20
+
+# 紧凑模式下各列的目标类型
+CODE_COLUMN = '股票代码'
+YEAR_COLUMN = '年份'
+VALUE_COLUMNS = ['数字化转型指数']
+CATEGORY_COLUMNS = ['企业名称', '行业代码', '行业名称']
+
+# 磁盘上为每个源文件保留的数据版本数（切换期间仍在使用旧版本的会话可以继续读取其缓存）
+VERSIONS_KEPT = 2
+
+# 与Excel数据文件同名的快速格式（merge_excel.py/ingest.py的输出），按优先顺序
+FAST_SOURCE_EXTENSIONS = ('.parquet', '.feather', '.arrow')
+
+
+def hash_file(path):
+    """计算文件内容的哈希值"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _meta_path(path):
+    """源文件对应的元数据文件路径（记录mtime、大小和哈希）"""
+    name = hashlib.blake2b(os.path.abspath(path).encode('utf-8'), digest_size=8).hexdigest()
+    return os.path.join(CACHE_DIR, f'{name}.meta.json')
+
+
+def file_version(path):
+    """返回源文件的数据版本号（内容哈希）
+
+    mtime和文件大小未变化时直接复用上次记录的哈希，避免每次启动都重新读取整个文件；
+    文件不存在时抛出FileNotFoundError。
+    """
+    stat = os.stat(path)
+    meta_file = _meta_path(path)
+    meta = None
+    if os.path.exists(meta_file):
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+
+    if meta and meta.get('mtime_ns') == stat.st_mtime_ns and meta.get('size') == stat.st_size:
+        return meta['hash']
+
+    digest = hash_file(path)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    _atomic_write_text(meta_file, json.dumps({
+        'source': os.path.abspath(path),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'hash': digest,
+    }))
+    return digest
+
+
+def current_version(path):
+    """返回数据文件当前的数据版本号（按resolve_source实际读取的文件计算），文件不存在时返回None"""
+    try:
+        return file_version(resolve_source(path))
+    except FileNotFoundError:
+        return None
+
+
+def cache_path(path, version, suffix='arrow'):
+    """给定源文件和数据版本，返回对应的缓存文件路径"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, f'{stem}.{version}.{suffix}')
+
+
+def resolve_source(path):
+    """数据文件所在目录中存在同名、且不比它旧的Parquet/Feather文件时改用该文件（读取远快于Excel），否则返回原路径
+
+    每次加载时重新判断：Excel文件被替换（比Parquet新）后重新读取Excel。path本身已是快速格式时原样返回。
+    """
+    stem, ext = os.path.splitext(path)
+    if ext.lower() in FAST_SOURCE_EXTENSIONS:
+        return path
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    for ext in FAST_SOURCE_EXTENSIONS:
+        candidate = stem + ext
+        if candidate == path or not os.path.exists(candidate):
+            continue
+        if mtime is None or os.stat(candidate).st_mtime_ns >= mtime:
+            return candidate
+    return path
+
+
+def read_source(path):
+    """按扩展名读取源数据文件（.parquet/.feather/.arrow/.csv，其余按Excel读取）"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.parquet':
+        return pd.read_parquet(path)
+    if ext in ('.feather', '.arrow', '.ipc'):
+        return pd.read_feather(path)
+    if ext == '.csv':
+        return pd.read_csv(path, encoding='utf-8-sig')
+    return pd.read_excel(path)
+
+
+def _atomic_write_text(target, text):
+    """先写临时文件再替换，避免并发读取到半写入的文件"""
+    tmp = f'{target}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, target)
+
+
+def _coerce_for_arrow(df):
+    """将混合类型的object列统一为字符串，保证可以写入Arrow"""
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            values = df[col].dropna()
+            if not values.map(type).eq(str).all():
+                df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+
+def _remove_stale_caches(path, version, keep=VERSIONS_KEPT):
+    """删除同一源文件较旧版本的缓存文件，保留当前版本及最近写入的共keep个版本"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    files = {}
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith(f'{stem}.'):
+            files.setdefault(name[len(stem) + 1:].split('.', 1)[0], []).append(os.path.join(CACHE_DIR, name))
+
+    def last_written(v):
+        return max((os.stat(f).st_mtime_ns for f in files[v] if os.path.exists(f)), default=0)
+
+    others = sorted((v for v in files if v != version), key=last_written, reverse=True)
+    for stale in others[keep - 1:]:
+        for f in files[stale]:
+            try:
+                os.remove(f)
+            except OSError:
+                pass
+
+
+def memory_footprint(df):
+    """DataFrame的内存占用（字节，包含字符串对象本身）"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _to_int(series, dtype):
+    """转换为定长整数类型，存在缺失值时使用对应的可空整数类型"""
+    if series.isna().any():
+        return series.astype(dtype.capitalize())
+    return series.astype(dtype)
+
+
+def compact_panel(df):
+    """转换为紧凑的类型表示，转换前后的内存占用记录在df.attrs['memory_footprint']中"""
+    before = memory_footprint(df)
+    df = df.copy()
+
+    if CODE_COLUMN in df.columns:
+        codes = normalize_codes(df[CODE_COLUMN])
+        # 只有全部代码都能解析为数字时才转换为整数，否则（如AAPL）保留为分类编码
+        if codes.notna().sum() == df[CODE_COLUMN].notna().sum():
+            df[CODE_COLUMN] = _to_int(codes, 'int32')
+        else:
+            df[CODE_COLUMN] = df[CODE_COLUMN].astype(str).astype('category')
+
+    if YEAR_COLUMN in df.columns:
+        years = pd.to_numeric(df[YEAR_COLUMN], errors='coerce')
+        if years.notna().sum() == df[YEAR_COLUMN].notna().sum():
+            df[YEAR_COLUMN] = _to_int(years.round(), 'int16')
+
+    for col in VALUE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+
+    df.attrs['memory_footprint'] = {'before': before, 'after': memory_footprint(df)}
+    return df
+
+
+def write_cache(df, target):
+    """以未压缩的Arrow IPC格式写入缓存（可直接内存映射）"""
+    tmp = f'{target}.{os.getpid()}.tmp'
+    feather.write_feather(_coerce_for_arrow(df), tmp, compression='uncompressed')
+    os.replace(tmp, target)
+
+
+def read_cache(target):
+    """内存映射读取Arrow缓存文件
+
+    split_blocks=True使数值列和分类编码直接引用映射的文件页而不复制，
+    同一台机器上的多个Streamlit工作进程因此共享同一份物理内存（操作系统页缓存），
+    返回的数值数组为只读。
+    """
+    table = feather.read_table(target, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+
+def load_panel(path, compact=False, version=None):
+    """加载面板数据：优先读取Arrow缓存，缓存缺失或源文件变化时从源文件（Excel、Parquet等）重建
+
+    存在同名且不比它新的Parquet/Feather文件时从该文件重建（见resolve_source）。
+    compact为True时返回紧凑类型表示（见compact_panel），并单独缓存。version为数据版本
+    （DataWatcher发布的版本号）：给出时读取该版本的缓存，即使源文件已被替换；该版本的缓存
+    已不存在且源文件已是其他版本时抛出FileNotFoundError。省略时加载源文件的当前版本。
+    """
+    source = resolve_source(path)
+    if pa is None:
+        df = read_source(source)
+        return compact_panel(df) if compact else df
+
+    if version is None:
+        version = file_version(source)
+    target = cache_path(path, version, suffix='compact.arrow' if compact else 'arrow')
+    if os.path.exists(target):
+        try:
+            return read_cache(target)
+        except (OSError, pa.ArrowInvalid):
+            pass  # 缓存损坏，重新构建
+
+    current = file_version(source)
+    if current != version:
+        raise FileNotFoundError(f"数据版本 {version} 的缓存已不存在，数据文件 {source} 已更新为版本 {current}")
+    df = read_source(source)
+    if compact:
+        df = compact_panel(df)
+    try:
+        write_cache(df, target)
+        _remove_stale_caches(path, version)
+    except (OSError, pa.ArrowException):
+        # 缓存写入失败不影响本次加载
+        pass
+    return df
@@ -0,0 +1,80 @@
+"""
+数据版本监控
+
+后台线程定期检查数据文件的版本（修改时间、大小、内容哈希）。发现新版本后先在后台
+预加载（解析Excel、写入Arrow缓存、预计算汇总），完成后再原子地切换对外发布的版本号：
+切换前已开始的页面刷新继续使用旧版本的数据，之后的交互自动使用新版本，替换数据文件后无需重启服务。
+Excel文件与同名的Parquet/Feather文件一并跟踪：每次检查都重新确定实际读取的是哪一个（见data_store.resolve_source），
+替换其中任何一个都会触发更新。
+"""
+import logging
+import os
+import threading
+
+from data_store import current_version, resolve_source
+
+# 轮询间隔（秒）
+POLL_INTERVAL = 30
+
+logger = logging.getLogger(__name__)
+
+
+class DataWatcher:
+    """后台轮询数据文件，新版本预加载完成后原子切换"""
+
+    def __init__(self, path, preload=None, interval=POLL_INTERVAL):
+        """preload(version) 在后台线程中预加载新版本，抛出异常时不切换（下次轮询重试）"""
+        self.path = path
+        self.interval = interval
+        self._preload = preload
+        self._version = current_version(path)
+        self._signature = self._stat()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def version(self):
+        """当前发布的数据版本（文件不存在时为None）"""
+        return self._version
+
+    def _stat(self):
+        # 每次重新确定实际读取的文件：同名的Parquet/Feather文件与Excel文件中较新的一个
+        source = resolve_source(self.path)
+        try:
+            stat = os.stat(source)
+        except FileNotFoundError:
+            return None
+        return source, stat.st_mtime_ns, stat.st_size
+
+    def check(self):
+        """检查一次数据文件，版本变化时预加载并切换，返回是否切换了版本"""
+        signature = self._stat()
+        if signature != self._signature:
+            # 文件刚发生变化，可能仍在写入：等到下一次轮询时修改时间和大小不再变化再加载
+            self._signature = signature
+            return False
+        version = current_version(self.path)
+        if version is None or version == self._version:
+            return False
+        if self._preload is not None:
+            self._preload(version)
+        self._version = version
+        logger.info("数据文件 %s 已更新至版本 %s", self.path, version)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("数据文件 %s 更新检查失败", self.path)
+
+    def start(self):
+        """启动后台轮询线程（重复调用无副作用）"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='data-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -1,7 +1,12 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 
+from data_store import VERSIONS_KEPT, load_panel
+from data_watcher import DataWatcher
+from instrumentation import cached, diagnostics_panel, start_rerun, timer
+from panel_index import PanelIndex
+from schema_infer import apply_manual_mapping, infer_schema
+
 # 设置页面标题和布局
 st.set_page_config(
     page_title="企业数字化转型指数查询系统",
@@ -9,6 +14,34 @@ st.set_page_config(
     layout="wide"
 )
 
+# 数据文件路径（存在同名且不比它旧的.parquet/.feather文件时直接读取该文件，每次加载时重新判断）
+DATA_FILE = '数字化转型指数合并数据.xlsx'
+
+
+@st.cache_resource
+def get_data_watcher():
+    """数据版本监控（每个服务进程一个后台线程，新版本的Arrow缓存在后台写好后再切换）"""
+    return DataWatcher(DATA_FILE, preload=lambda version: load_panel(DATA_FILE, version=version)).start()
+
+
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT))
+def load_data(data_version):
+    """加载数据（所有会话共享同一个只读DataFrame，数据版本变化时重新加载；不得原地修改）"""
+    return load_panel(DATA_FILE, version=data_version)
+
+
+@cached(st.cache_data(max_entries=VERSIONS_KEPT))
+def detect_columns(_df, data_version):
+    """推断关键列（按列名匹配和抽样评分，每个数据版本只推断一次）"""
+    return infer_schema(_df)
+
+
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT))
+def get_panel_index(_df, data_version, code_col, year_col):
+    """构建面板索引（每个数据版本只构建一次，所有会话共享）"""
+    return PanelIndex(_df, code_col=code_col, year_col=year_col)
+
+
 # 页面标题
 st.title("📊 企业数字化转型指数查询系统")
 
@@ -20,10 +53,12 @@ st.sidebar.info(
     "3. 查看该企业历年数字化转型指数趋势"
 )
 
-# 加载数据
+# 加载数据（记录本次刷新各区段的耗时）
+start_rerun()
 try:
-    # 读取Excel文件
-    df = pd.read_excel('数字化转型指数合并数据.xlsx')
+    # 读取Excel文件（经由Arrow缓存，所有会话共享）
+    data_version = get_data_watcher().version
+    df = load_data(data_version)
     st.success("✅ 数据加载成功！")
     
     # 显示数据基本信息
@@ -40,50 +75,11 @@ try:
     # 自动检测关键列
     st.header("🔍 自动列检测")
     
-    # 检测股票代码列
-    code_cols = ['股票代码', '证券代码', '代码', 'stock_code', 'code']
-    stock_code_col = None
-    for col in code_cols:
-        if col in df.columns:
-            stock_code_col = col
-            break
-    
-    if not stock_code_col:
-        # 如果没有找到预设的代码列名，尝试检测包含数字和字母的列
-        for col in df.columns:
-            if df[col].dtype == object and df[col].str.match(r'^[A-Z0-9]+$').any():
-                stock_code_col = col
-                break
-    
-    # 检测年份列
-    year_cols = ['年份', '年度', 'year', 'Year']
-    year_col = None
-    for col in year_cols:
-        if col in df.columns:
-            year_col = col
-            break
-    
-    if not year_col:
-        # 尝试检测包含年份格式的列
-        for col in df.columns:
-            if df[col].dtype in ['int64', 'float64'] and df[col].between(2000, 2100).any():
-                year_col = col
-                break
-    
-    # 检测数字化转型指数列
-    index_cols = ['数字化转型指数', '转型指数', '数字化指数', '指数', 'digital_index', 'index']
-    index_col = None
-    for col in index_cols:
-        if col in df.columns:
-            index_col = col
-            break
-    
-    if not index_col:
-        # 尝试检测数值列作为指数列
-        for col in df.columns:
-            if df[col].dtype in ['int64', 'float64'] and col not in [stock_code_col, year_col]:
-                index_col = col
-                break
+    # 推断结果按数据版本缓存；用户应用过的手动映射保存在会话中，优先于推断结果
+    detected = detect_columns(df, data_version)
+    manual_mapping = st.session_state.get('manual_column_mapping')
+    mapping = apply_manual_mapping(detected, manual_mapping, df.columns)
+    stock_code_col, year_col, index_col = mapping['code'], mapping['year'], mapping['index']
     
     # 显示检测结果
     col1, col2, col3 = st.columns(3)
@@ -105,12 +101,21 @@ try:
         else:
             st.error("❌ 未检测到数字化转型指数列")
     
+    if manual_mapping:
+        st.info("当前使用手动列映射")
+        if st.button("清除手动映射"):
+            del st.session_state['manual_column_mapping']
+            st.rerun()
+    
     # 如果检测到关键列，进行查询
     if stock_code_col and year_col and index_col:
         st.header("🔎 查询条件")
         
+        # 获取面板索引，后续查询均直接定位行切片
+        panel_index = get_panel_index(df, data_version, stock_code_col, year_col)
+        
         # 获取唯一的股票代码列表
-        stock_codes = sorted(df[stock_code_col].unique().tolist())
+        stock_codes = panel_index.codes()
         
         # 股票代码选择器
         selected_code = st.selectbox(
@@ -120,7 +125,7 @@ try:
         )
         
         # 获取该股票的所有年份
-        years = sorted(df[df[stock_code_col] == selected_code][year_col].unique().tolist())
+        years = panel_index.years(selected_code)
         
         # 年份选择器
         selected_year = st.selectbox(
@@ -133,7 +138,8 @@ try:
         st.header("📈 查询结果")
         
         # 获取查询结果
-        result = df[(df[stock_code_col] == selected_code) & (df[year_col] == selected_year)]
+        with timer('filter'):
+            result = panel_index.row(selected_code, selected_year)
         
         if not result.empty:
             # 显示详细数据
@@ -152,40 +158,40 @@ try:
         # 显示该企业历年数字化转型指数折线图
         st.header("📊 历年数字化转型指数趋势")
         
-        # 获取该企业的所有数据
-        company_data = df[df[stock_code_col] == selected_code]
-        
-        # 按年份排序
-        company_data = company_data.sort_values(year_col)
+        # 获取该企业的所有数据（索引中已按年份排序）
+        with timer('filter'):
+            company_data = panel_index.company(selected_code)
         
         # 创建折线图
-        fig = px.line(
-            company_data,
-            x=year_col,
-            y=index_col,
-            title=f"{selected_code}企业历年数字化转型指数趋势",
-            labels={
-                year_col: "年份",
-                index_col: "数字化转型指数"
-            },
-            markers=True,
-            hover_data={
-                index_col: ':.2f',
-                year_col: True
-            }
-        )
-        
-        # 美化图表
-        fig.update_layout(
-            xaxis_title="年份",
-            yaxis_title="数字化转型指数",
-            title_x=0.5,
-            hovermode="x unified",
-            template="plotly_white"
-        )
+        with timer('build_chart'):
+            fig = px.line(
+                company_data,
+                x=year_col,
+                y=index_col,
+                title=f"{selected_code}企业历年数字化转型指数趋势",
+                labels={
+                    year_col: "年份",
+                    index_col: "数字化转型指数"
+                },
+                markers=True,
+                hover_data={
+                    index_col: ':.2f',
+                    year_col: True
+                }
+            )
+            
+            # 美化图表
+            fig.update_layout(
+                xaxis_title="年份",
+                yaxis_title="数字化转型指数",
+                title_x=0.5,
+                hovermode="x unified",
+                template="plotly_white"
+            )
         
         # 显示图表
-        st.plotly_chart(fig, use_container_width=True)
+        with timer('plot_trend'):
+            st.plotly_chart(fig, use_container_width=True)
         
         # 显示统计信息
         with st.expander("📊 统计信息"):
@@ -212,13 +218,19 @@ try:
         
         # 提供手动映射选项
         st.subheader("🔧 手动列映射（可选）")
-        stock_code_col = st.selectbox("选择股票代码列", df.columns.tolist())
-        year_col = st.selectbox("选择年份列", df.columns.tolist())
-        index_col = st.selectbox("选择数字化转型指数列", df.columns.tolist())
+        manual_code_col = st.selectbox("选择股票代码列", df.columns.tolist())
+        manual_year_col = st.selectbox("选择年份列", df.columns.tolist())
+        manual_index_col = st.selectbox("选择数字化转型指数列", df.columns.tolist())
         
         if st.button("应用手动映射"):
+            # 保存到会话中，之后的每次重新运行都直接使用该映射
+            st.session_state['manual_column_mapping'] = {
+                'code': manual_code_col,
+                'year': manual_year_col,
+                'index': manual_index_col
+            }
             # 重新执行查询逻辑
-            st.experimental_rerun()
+            st.rerun()
             
 except FileNotFoundError:
     st.error("❌ 文件未找到！")
@@ -227,6 +239,9 @@ except Exception as e:
     st.error(f"❌ 数据加载失败：{str(e)}")
     st.warning("请检查Excel文件格式是否正确，确保为.xlsx格式")
 
+# 性能诊断（侧边栏，可选）
+diagnostics_panel('app')
+
 # 页脚
 st.markdown("---")
 st.markdown("### 📝 注意事项")
@@ -1,9 +1,23 @@
+import os
+
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from charts import FIGURE_CACHE_SIZE, TREND_LAYOUT, scatter_trace
+from company_search import DEFAULT_LIMIT, CompanySearch
+from data_store import VERSIONS_KEPT, format_code, load_panel, memory_footprint
+from data_watcher import DataWatcher
+from firm_analytics import company_stats, load_firm_analytics
+from industry_cube import IndustryCube, build_industry_matrix, load_industry_cube
+from instrumentation import cached, diagnostics_panel, start_rerun, timed, timer
+from panel_index import PanelIndex
+from panel_store import PanelStore
+from rolling_stats import DEFAULT_WINDOW, WINDOW_OPTIONS, FirmRollingStats, RollingStats
+from warmup import WarmUp, serve_readiness
+
 # 设置页面配置
 st.set_page_config(
     page_title="企业数字化转型指数查询系统",
@@ -15,47 +29,414 @@ st.set_page_config(
 # 应用标题
 st.title("📊 企业数字化转型指数查询系统")
 
-# 文件路径
+# 文件路径（存在同名且不比它旧的.parquet/.feather文件时直接读取该文件，每次加载时重新判断）
 DATA_FILE = "数字化转型指数合并数据_带行业信息.xlsx"
 
-@st.cache_data
-def load_data():
-    """加载合并后的Excel数据"""
+# 缓存的行业矩阵数量（切换回最近查看过的行业时直接复用）
+INDUSTRY_CACHE_SIZE = 32
+
+# 涨跌幅榜显示的企业数量
+MOVERS_COUNT = 10
+
+# 数据后端：pandas（默认，整表载入内存）或duckdb（数据保留在磁盘上，筛选和聚合下推到DuckDB，见panel_store.py）
+DATA_BACKEND = os.environ.get('PANEL_BACKEND', 'pandas')
+
+@st.cache_resource
+def get_data_watcher():
+    """数据版本监控（每个服务进程一个后台线程，新版本预热完成后再切换）"""
+    return DataWatcher(DATA_FILE, preload=warm_up).start()
+
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT))
+def load_data(data_version):
+    """加载合并后的Excel数据
+
+    所有会话共享同一个只读DataFrame（不再为每个会话复制），数据版本变化时重新加载；
+    调用方不得原地修改返回的对象。使用duckdb后端时返回PanelStore，数据按需从磁盘读取。
+    """
     try:
-        df = pd.read_excel(DATA_FILE)
-        # 处理可能的缺失值
-        df = df.dropna(subset=['股票代码', '年份', '数字化转型指数'])
-        # 确保数据类型正确
-        df['股票代码'] = df['股票代码'].astype(str)
-        df['年份'] = df['年份'].astype(int)
+        if DATA_BACKEND == 'duckdb':
+            return PanelStore(DATA_FILE, version=data_version)
+        # 紧凑类型：股票代码为int32（显示时补零），年份为int16，指数为float32，名称为分类编码
+        df = load_panel(DATA_FILE, compact=True, version=data_version)
+        # 处理可能的缺失值（没有缺失值时保留对内存映射缓存的零拷贝引用）
+        key_cols = ['股票代码', '年份', '数字化转型指数']
+        if df[key_cols].isna().any().any():
+            df = df.dropna(subset=key_cols)
+            # 去除缺失值后转换为非空的定长整数类型
+            df = df.astype({'年份': 'int16'})
         return df
     except Exception as e:
         st.error(f"数据加载失败: {str(e)}")
         return None
 
-@st.cache_data
-def get_industry_avg(df):
-    """计算历年各行业的平均数字化转型指数"""
-    if df is None:
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT))
+def get_panel_index(_df, data_version):
+    """构建面板索引（每个数据版本只构建一次，所有会话共享）"""
+    if _df is None:
         return None
-    # 按行业和年份分组计算平均值
-    industry_avg = df.groupby(['行业代码', '年份'])['数字化转型指数'].mean().reset_index()
-    return industry_avg
+    if isinstance(_df, PanelStore):
+        return _df.index
+    return PanelIndex(_df)
 
-@st.cache_data
-def get_company_info(df):
-    """获取公司基本信息"""
-    if df is None:
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT))
+def get_company_search(_panel_index, data_version):
+    """构建企业搜索索引（股票代码、企业名称、拼音首字母，每个数据版本只构建一次，所有会话共享）"""
+    if _panel_index is None:
+        return None
+    return CompanySearch.from_index(_panel_index)
+
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT))
+def get_industry_avg(data_version):
+    """获取历年各行业数字化转型指数汇总（每个数据版本只计算一次，所有会话共享）"""
+    try:
+        if DATA_BACKEND == 'duckdb':
+            # 分组聚合在DuckDB中执行，只取回 行业 × 年份 汇总表
+            store = load_data(data_version)
+            return IndustryCube(store.industry_cube()) if store is not None else None
+        return load_industry_cube(DATA_FILE, version=data_version)
+    except Exception as e:
+        st.error(f"行业汇总数据加载失败: {str(e)}")
         return None
+
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT))
+def get_firm_analytics(_df, data_version):
+    """获取企业-年份分析指标表（增长率、行业排名、百分位、Z分数；每个数据版本只计算一次）"""
+    if _df is None:
+        return None
+    try:
+        if isinstance(_df, PanelStore):
+            # 窗口函数在DuckDB中计算并按数据版本保存，之后按企业读取
+            return _df.firm_analytics()
+        return load_firm_analytics(DATA_FILE, _df, version=data_version)
+    except Exception as e:
+        st.error(f"企业分析指标加载失败: {str(e)}")
+        return None
+
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT * len(WINDOW_OPTIONS)))
+def get_rolling_stats(_df, window, data_version):
+    """企业滚动统计（滚动均值、波动率、趋势斜率、转折点；每个窗口大小和数据版本只计算一次，所有会话共享）"""
+    if _df is None:
+        return None
+    if isinstance(_df, PanelStore):
+        # 面板不在内存中：每次只取出所查询企业的记录计算
+        return FirmRollingStats(_df.index, window)
+    return RollingStats.build(_df, window)
+
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT * len(WINDOW_OPTIONS)))
+def get_industry_rolling(window, data_version):
+    """行业平均指数的滚动统计（每个窗口大小和数据版本只计算一次，所有会话共享）"""
+    cube = get_industry_avg(data_version)
+    if cube is None:
+        return None
+    return RollingStats.build(cube.df, window, code_col='行业代码', value_col='平均值')
+
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT))
+def get_company_info(_df, data_version):
+    """获取公司基本信息（每个数据版本只计算一次，所有会话共享）"""
+    if _df is None:
+        return None
+    if isinstance(_df, PanelStore):
+        return _df.companies()
     # 获取所有唯一的股票代码和企业名称
-    company_info = df[['股票代码', '企业名称', '行业代码', '行业名称']].drop_duplicates()
+    company_info = _df[['股票代码', '企业名称', '行业代码', '行业名称']].drop_duplicates()
     return company_info
 
-# 加载数据
+def industry_rows(df, industry_code, year_range=None, columns=None):
+    """某行业（可限定年份区间）的记录；duckdb后端在磁盘上筛选，只读取所需的列"""
+    start_year, end_year = year_range if year_range is not None else (None, None)
+    if isinstance(df, PanelStore):
+        return df.query(start_year=start_year, end_year=end_year, industry=industry_code, columns=columns)
+    mask = df['行业代码'] == industry_code
+    if year_range is not None:
+        mask &= (df['年份'] >= start_year) & (df['年份'] <= end_year)
+    rows = df[mask]
+    return rows[columns] if columns else rows
+
+def year_bounds(df):
+    """数据的 (最早年份, 最晚年份)"""
+    if isinstance(df, PanelStore):
+        return df.year_range()
+    return int(df['年份'].min()), int(df['年份'].max())
+
+@cached(st.cache_data(max_entries=FIGURE_CACHE_SIZE))
+def build_trend_figure(stock_code, year_range, window, data_version):
+    """企业历年指数与行业平均对比图（按企业、年份范围、滚动窗口和数据版本缓存，返回图表字典）
+
+    window不为0时叠加企业的滚动均值 ± 滚动波动率区间、趋势转折点和行业平均的滚动均值。
+    """
+    index = get_panel_index(load_data(data_version), data_version)
+    cube = get_industry_avg(data_version)
+    company_data = index.company(stock_code)
+    company_data = company_data[(company_data['年份'] >= year_range[0]) &
+                                (company_data['年份'] <= year_range[1])]
+    company_name = company_data['企业名称'].iloc[0]
+    industry_code = company_data['行业代码'].iloc[0]
+    industry_name = company_data['行业名称'].iloc[0]
+    
+    fig = go.Figure()
+    
+    # 添加企业指数折线
+    fig.add_trace(go.Scatter(
+        x=company_data['年份'],
+        y=company_data['数字化转型指数'],
+        mode='lines+markers',
+        name=f'{company_name} (企业)',
+        line=dict(color='blue', width=2),
+        marker=dict(size=6, color='blue')
+    ))
+    
+    # 添加行业平均指数折线
+    if cube is not None:
+        industry_data = cube.series(industry_code, year_range[0], year_range[1])
+        if not industry_data.empty:
+            fig.add_trace(go.Scatter(
+                x=industry_data['年份'],
+                y=industry_data['平均值'],
+                mode='lines+markers',
+                name=f'{industry_name} (行业平均)',
+                line=dict(color='red', width=2, dash='dash'),
+                marker=dict(size=6, color='red')
+            ))
+    
+    # 叠加滚动统计（滚动窗口包含年份范围之前的记录）
+    rolling = get_rolling_stats(load_data(data_version), window, data_version) if window else None
+    if rolling is not None and stock_code in rolling:
+        rolling_data = rolling.series(stock_code, year_range[0], year_range[1])
+        rolling_data = rolling_data[rolling_data['滚动均值'].notna()]
+        upper = rolling_data['滚动均值'] + rolling_data['滚动波动率']
+        lower = rolling_data['滚动均值'] - rolling_data['滚动波动率']
+        fig.add_trace(go.Scatter(
+            x=pd.concat([rolling_data['年份'], rolling_data['年份'][::-1]]),
+            y=pd.concat([upper, lower[::-1]]),
+            fill='toself',
+            fillcolor='rgba(0, 0, 255, 0.1)',
+            line=dict(width=0),
+            hoverinfo='skip',
+            name=f'{window}年滚动均值 ± 波动率'
+        ))
+        fig.add_trace(go.Scatter(
+            x=rolling_data['年份'],
+            y=rolling_data['滚动均值'],
+            mode='lines',
+            name=f'{window}年滚动均值',
+            line=dict(color='blue', width=1.5, dash='dot'),
+            customdata=rolling_data['趋势斜率'],
+            hovertemplate='%{y:.2f}（趋势斜率 %{customdata:+.2f}/年）'
+        ))
+        breakpoints = rolling_data[rolling_data['转折点']]
+        if not breakpoints.empty:
+            fig.add_trace(go.Scatter(
+                x=breakpoints['年份'],
+                y=breakpoints['数字化转型指数'],
+                mode='markers',
+                name='趋势转折点',
+                marker=dict(symbol='diamond-open', size=13, color='black', line=dict(width=2)),
+                customdata=breakpoints['斜率变化'],
+                hovertemplate='%{x}年 趋势斜率变化 %{customdata:+.2f}/年'
+            ))
+    industry_rolling = get_industry_rolling(window, data_version) if window else None
+    if industry_rolling is not None and industry_code in industry_rolling:
+        rolling_data = industry_rolling.series(industry_code, year_range[0], year_range[1])
+        rolling_data = rolling_data[rolling_data['滚动均值'].notna()]
+        fig.add_trace(go.Scatter(
+            x=rolling_data['年份'],
+            y=rolling_data['滚动均值'],
+            mode='lines',
+            name=f'行业{window}年滚动均值',
+            line=dict(color='red', width=1.5, dash='dot')
+        ))
+    
+    # 更新图表布局
+    fig.update_layout(
+        title=f"{company_name} 数字化转型指数趋势 (vs {industry_name}行业平均)",
+        legend_title="指标",
+        height=500,
+        **TREND_LAYOUT
+    )
+    return fig.to_dict()
+
+@cached(st.cache_data(max_entries=FIGURE_CACHE_SIZE))
+def build_industry_figure(industry_code, year_range, show_firms, data_version):
+    """行业平均指数趋势图，可叠加行业内全部企业-年份散点（按行业、年份范围和数据版本缓存）"""
+    cube = get_industry_avg(data_version)
+    industry_data = cube.series(industry_code, year_range[0], year_range[1])
+    df = load_data(data_version)
+    industry_name = get_industry_names(df, data_version).get(industry_code)
+    
+    fig = go.Figure()
+    if show_firms:
+        firms = industry_rows(df, industry_code, year_range, ['年份', '数字化转型指数'])
+        fig.add_trace(scatter_trace(
+            firms['年份'].to_numpy(),
+            firms['数字化转型指数'].to_numpy(),
+            mode='markers',
+            name='行业内企业',
+            marker=dict(size=4, color='lightgray', opacity=0.5)
+        ))
+    fig.add_trace(go.Scatter(
+        x=industry_data['年份'],
+        y=industry_data['平均值'],
+        mode='lines',
+        name='行业平均',
+        line=dict(color='#1f77b4', width=2)
+    ))
+    fig.update_layout(
+        title=f"{industry_name}行业平均数字化转型指数趋势",
+        height=400,
+        **TREND_LAYOUT
+    )
+    if show_firms:
+        # 散点较多时按最近点显示悬停信息
+        fig.update_layout(hovermode="closest")
+    return fig.to_dict()
+
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT))
+def get_industry_names(_df, data_version):
+    """行业代码 → 行业名称（每个数据版本只计算一次）"""
+    if _df is None:
+        return {}
+    pairs = get_company_info(_df, data_version)[['行业代码', '行业名称']].dropna().drop_duplicates('行业代码')
+    return dict(zip(pairs['行业代码'], pairs['行业名称']))
+
+@cached(st.cache_data(max_entries=INDUSTRY_CACHE_SIZE))
+def get_industry_matrix(industry_code, data_version):
+    """行业的 企业 × 年份 指数矩阵（按行业和数据版本缓存）"""
+    rows = industry_rows(load_data(data_version), industry_code,
+                         columns=['股票代码', '年份', '数字化转型指数', '行业代码'])
+    return build_industry_matrix(rows, industry_code)
+
+def _firm_labels(codes, data_version):
+    """股票代码 → “企业名称 (代码)” 标签"""
+    index = get_panel_index(load_data(data_version), data_version)
+    return [f"{index.name_for_code(code)} ({format_code(code)})" for code in codes]
+
+@cached(st.cache_data(max_entries=FIGURE_CACHE_SIZE))
+def build_industry_heatmap(industry_code, year_range, data_version):
+    """行业热力图：行为企业（按区间平均指数从高到低排列），列为年份"""
+    matrix = get_industry_matrix(industry_code, data_version).loc[:, year_range[0]:year_range[1]]
+    matrix = matrix.dropna(how='all')
+    matrix = matrix.loc[matrix.mean(axis=1).sort_values(ascending=False).index]
+    labels = _firm_labels(matrix.index, data_version)
+    
+    fig = go.Figure(go.Heatmap(
+        z=matrix.to_numpy(),
+        x=matrix.columns,
+        y=labels,
+        colorscale='Blues',
+        colorbar=dict(title='指数'),
+        hovertemplate='%{y}<br>%{x}年：%{z:.2f}<extra></extra>'
+    ))
+    fig.update_layout(
+        title=f"行业内 {len(labels)} 家企业历年数字化转型指数",
+        xaxis_title="年份",
+        yaxis=dict(autorange='reversed', showticklabels=len(labels) <= 60),
+        height=min(max(400, 14 * len(labels)), 1200),
+        template="plotly_white"
+    )
+    return fig.to_dict()
+
+@cached(st.cache_data(max_entries=FIGURE_CACHE_SIZE))
+def build_industry_distribution(industry_code, year_range, kind, data_version):
+    """行业内企业指数的逐年分布（箱线图使用预先计算的分位数，小提琴图使用全部企业数据）"""
+    matrix = get_industry_matrix(industry_code, data_version).loc[:, year_range[0]:year_range[1]]
+    matrix = matrix.loc[:, matrix.notna().any()]
+    years = matrix.columns.to_numpy()
+    values = matrix.to_numpy()
+    
+    if kind == "小提琴图":
+        mask = ~np.isnan(values)
+        trace = go.Violin(
+            x=np.broadcast_to(years, values.shape)[mask],
+            y=values[mask],
+            box_visible=True,
+            meanline_visible=True,
+            points=False,
+            name="行业内企业"
+        )
+    else:
+        q1, median, q3 = np.nanpercentile(values, [25, 50, 75], axis=0)
+        trace = go.Box(
+            x=years,
+            q1=q1,
+            median=median,
+            q3=q3,
+            lowerfence=np.nanmin(values, axis=0),
+            upperfence=np.nanmax(values, axis=0),
+            mean=np.nanmean(values, axis=0),
+            name="行业内企业"
+        )
+    fig = go.Figure(trace)
+    fig.update_layout(
+        title=f"行业内企业数字化转型指数逐年分布（{kind}）",
+        height=450,
+        showlegend=False,
+        **TREND_LAYOUT
+    )
+    fig.update_layout(hovermode="closest")
+    return fig.to_dict()
+
+@timed()
+def industry_movers(industry_code, year_range, data_version):
+    """区间首尾两年指数变化最大/最小的企业，返回 (起始年份, 结束年份, 变化表)"""
+    matrix = get_industry_matrix(industry_code, data_version).loc[:, year_range[0]:year_range[1]]
+    matrix = matrix.loc[:, matrix.notna().any()]
+    if matrix.shape[1] < 2:
+        return None, None, pd.DataFrame()
+    start_year, end_year = int(matrix.columns[0]), int(matrix.columns[-1])
+    change = (matrix[end_year] - matrix[start_year]).dropna()
+    table = pd.DataFrame({
+        '企业': _firm_labels(change.index, data_version),
+        f'{start_year}年': matrix.loc[change.index, start_year].to_numpy(),
+        f'{end_year}年': matrix.loc[change.index, end_year].to_numpy(),
+        '变化': change.to_numpy(),
+    })
+    return start_year, end_year, table.sort_values('变化', ascending=False)
+
+def warm_up(data_version):
+    """预热指定数据版本：加载数据，构建索引、行业汇总和分析指标，预先渲染默认页面的图表
+
+    服务启动时在后台线程中执行；数据文件更新后由数据版本监控在切换到新版本之前执行。
+    """
+    df = load_data(data_version)
+    if df is None:
+        raise RuntimeError("数据加载失败")
+    panel_index = get_panel_index(df, data_version)
+    get_company_search(panel_index, data_version)
+    industry_avg = get_industry_avg(data_version)
+    get_firm_analytics(df, data_version)
+    get_company_info(df, data_version)
+    get_industry_names(df, data_version)
+
+    # 默认页面：第一家企业、全部年份
+    stock_code = panel_index.codes()[0]
+    industry_code = panel_index.company(stock_code)['行业代码'].iloc[0]
+    year_range = year_bounds(df)
+    build_trend_figure(int(stock_code), year_range, DEFAULT_WINDOW, data_version)
+    get_rolling_stats(df, DEFAULT_WINDOW, data_version)
+    if industry_avg is not None and industry_code in industry_avg.industries():
+        build_industry_figure(industry_code, year_range, False, data_version)
+        build_industry_heatmap(industry_code, year_range, data_version)
+        build_industry_distribution(industry_code, year_range, "箱线图", data_version)
+        industry_movers(industry_code, year_range, data_version)
+
+@st.cache_resource
+def get_warmup():
+    """服务启动预热（每个服务进程一次），设置WARMUP_READY_PORT时在该端口提供就绪检查"""
+    warmup = WarmUp(lambda: warm_up(get_data_watcher().version)).start()
+    serve_readiness(warmup)
+    return warmup
+
+# 加载数据（记录本次刷新各区段的耗时）
+start_rerun()
 st.info("正在加载数据...")
-df = load_data()
-industry_avg = get_industry_avg(df)
-company_info = get_company_info(df)
+# 本次刷新固定使用当前发布的数据版本，数据文件更新后的下一次交互自动切换到新版本
+data_version = get_data_watcher().version
+get_warmup()
+df = load_data(data_version)
+industry_avg = get_industry_avg(data_version) if df is not None else None
+company_info = get_company_info(df, data_version)
+panel_index = get_panel_index(df, data_version)
+firm_analytics = get_firm_analytics(df, data_version)
 
 if df is not None:
     st.success(f"数据加载成功！共包含 {len(df)} 条记录")
@@ -63,17 +444,23 @@ if df is not None:
     # 侧边栏 - 查询参数设置
     st.sidebar.header("🔍 查询参数")
     
-    # 股票代码选择
-    all_stock_codes = sorted(company_info['股票代码'].unique())
+    # 企业搜索：输入股票代码、企业名称或拼音首字母，下拉框只列出最匹配的企业
+    company_search = get_company_search(panel_index, data_version)
+    search_query = st.sidebar.text_input("搜索企业（股票代码、名称或拼音首字母）:", "")
+    with timer('company_search'):
+        matches = company_search.search(search_query)
+    if search_query.strip() and not matches:
+        st.sidebar.warning(f"未找到与“{search_query}”匹配的企业")
+    
+    # 股票代码选择（未输入搜索内容时列出前若干家企业）
     stock_code = st.sidebar.selectbox(
         "选择股票代码:",
-        options=all_stock_codes,
-        format_func=lambda x: f"{x} - {company_info[company_info['股票代码'] == x]['企业名称'].iloc[0]}"
+        options=[code for code, _ in matches] or panel_index.codes()[:DEFAULT_LIMIT],
+        format_func=lambda x: f"{format_code(x)} - {panel_index.name_for_code(x)}"
     )
     
     # 年份范围选择
-    min_year = df['年份'].min()
-    max_year = df['年份'].max()
+    min_year, max_year = year_bounds(df)
     year_range = st.sidebar.slider(
         "选择年份范围:",
         min_value=min_year,
@@ -82,8 +469,18 @@ if df is not None:
         step=1
     )
     
+    # 趋势图叠加的滚动窗口（0为不叠加）
+    window = st.sidebar.selectbox(
+        "滚动窗口（年）:",
+        options=(0,) + WINDOW_OPTIONS,
+        index=1 + WINDOW_OPTIONS.index(DEFAULT_WINDOW),
+        format_func=lambda w: "不显示" if w == 0 else f"{w}年"
+    )
+    
     # 获取选中企业的信息
-    selected_company = company_info[company_info['股票代码'] == stock_code].iloc[0]
+    with timer('filter'):
+        all_company_data = panel_index.company(stock_code)
+    selected_company = all_company_data.iloc[0]
     company_name = selected_company['企业名称']
     industry_code = selected_company['行业代码']
     industry_name = selected_company['行业名称']
@@ -92,7 +489,7 @@ if df is not None:
     st.markdown("---")
     
     # 企业基本信息卡片
-    st.header(f"🏢 {company_name} ({stock_code})")
+    st.header(f"🏢 {company_name} ({format_code(stock_code)})")
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -103,56 +500,24 @@ if df is not None:
         st.metric("数据年份范围", f"{min_year} - {max_year}")
     
     # 筛选数据
-    company_data = df[(df['股票代码'] == stock_code) & 
-                      (df['年份'] >= year_range[0]) & 
-                      (df['年份'] <= year_range[1])]
-    
-    # 获取行业平均数据
-    industry_data = industry_avg[(industry_avg['行业代码'] == industry_code) & 
-                                (industry_avg['年份'] >= year_range[0]) & 
-                                (industry_avg['年份'] <= year_range[1])]
+    with timer('filter'):
+        company_data = all_company_data[(all_company_data['年份'] >= year_range[0]) & 
+                                        (all_company_data['年份'] <= year_range[1])]
+        
+        # 获取行业平均数据
+        if industry_avg is not None:
+            industry_data = industry_avg.series(industry_code, year_range[0], year_range[1])
+        else:
+            industry_data = pd.DataFrame()
     
     # 可视化：企业历年数字化转型指数与行业平均对比
     st.subheader("📈 数字化转型指数趋势分析")
     
     if not company_data.empty:
-        # 创建图表
-        fig = go.Figure()
-        
-        # 添加企业指数折线
-        fig.add_trace(go.Scatter(
-            x=company_data['年份'],
-            y=company_data['数字化转型指数'],
-            mode='lines+markers',
-            name=f'{company_name} (企业)',
-            line=dict(color='blue', width=2),
-            marker=dict(size=6, color='blue')
-        ))
-        
-        # 添加行业平均指数折线
-        if not industry_data.empty:
-            fig.add_trace(go.Scatter(
-                x=industry_data['年份'],
-                y=industry_data['数字化转型指数'],
-                mode='lines+markers',
-                name=f'{industry_name} (行业平均)',
-                line=dict(color='red', width=2, dash='dash'),
-                marker=dict(size=6, color='red')
-            ))
-        
-        # 更新图表布局
-        fig.update_layout(
-            title=f"{company_name} 数字化转型指数趋势 (vs {industry_name}行业平均)",
-            xaxis_title="年份",
-            yaxis_title="数字化转型指数",
-            legend_title="指标",
-            hovermode="x unified",
-            template="plotly_white",
-            height=500
-        )
-        
-        # 显示图表
-        st.plotly_chart(fig, use_container_width=True)
+        # 显示图表（按企业、年份范围和数据版本缓存）
+        fig = build_trend_figure(int(stock_code), year_range, window, data_version)
+        with timer('plot_trend'):
+            st.plotly_chart(fig, use_container_width=True)
         
         # 显示详细数据表格
         st.subheader("📋 详细数据")
@@ -161,25 +526,63 @@ if df is not None:
         # 统计信息
         st.subheader("📊 统计分析")
         
+        # 与批量导出（export_reports.py）使用同一套统计口径（firm_analytics.company_stats）
+        with timer('company_stats'):
+            stats = company_stats(company_data).iloc[0]
+        
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            avg_index = company_data['数字化转型指数'].mean()
-            st.metric("平均指数", f"{avg_index:.2f}")
+            st.metric("平均指数", f"{stats['平均指数']:.2f}")
         
         with col2:
-            max_index = company_data['数字化转型指数'].max()
-            max_year = company_data[company_data['数字化转型指数'] == max_index]['年份'].iloc[0]
-            st.metric("最高指数", f"{max_index:.2f}", f"年份: {max_year}")
+            st.metric("最高指数", f"{stats['最高指数']:.2f}", f"年份: {int(stats['最高指数年份'])}")
         
         with col3:
-            min_index = company_data['数字化转型指数'].min()
-            min_year = company_data[company_data['数字化转型指数'] == min_index]['年份'].iloc[0]
-            st.metric("最低指数", f"{min_index:.2f}", f"年份: {min_year}")
+            st.metric("最低指数", f"{stats['最低指数']:.2f}", f"年份: {int(stats['最低指数年份'])}")
         
         with col4:
-            trend = company_data['数字化转型指数'].pct_change().mean() * 100
-            st.metric("年均增长率", f"{trend:.2f}%")
+            st.metric("年均增长率", f"{stats['年均增长率']:.2f}%")
+        
+        # 最近一个滚动窗口的趋势（预先计算的滚动统计表）
+        rolling = get_rolling_stats(df, window, data_version) if window else None
+        if rolling is not None:
+            latest = rolling.latest(stock_code, year_range[1])
+            if latest is not None:
+                breakpoints = rolling.series(stock_code, year_range[0], year_range[1])
+                breakpoints = breakpoints.loc[breakpoints['转折点'], '年份'].tolist()
+                text = (f"近{window}年（截至{int(latest['年份'])}年）趋势斜率：{latest['趋势斜率']:+.2f}/年 · "
+                        f"滚动波动率：{latest['滚动波动率']:.2f}")
+                if breakpoints:
+                    text += " · 趋势转折点：" + "、".join(f"{int(year)}年" for year in breakpoints)
+                st.caption(text)
+        
+        # 行业排名与百分位（预先计算的分析指标表）
+        if firm_analytics is not None:
+            analytics_data = firm_analytics.firm(stock_code, year_range[0], year_range[1])
+            if not analytics_data.empty:
+                latest = analytics_data.iloc[-1]
+                latest_year = int(latest['年份'])
+                st.subheader(f"🏅 行业排名与百分位（{latest_year}年）")
+                
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    if pd.notna(latest['行业排名']):
+                        st.metric("行业排名", f"{int(latest['行业排名'])} / {int(latest['行业企业数'])}")
+                    else:
+                        st.metric("行业排名", "-")
+                with col2:
+                    st.metric("行业百分位", f"{latest['行业百分位']:.1f}%" if pd.notna(latest['行业百分位']) else "-")
+                with col3:
+                    st.metric("行业Z分数", f"{latest['行业Z分数']:.2f}" if pd.notna(latest['行业Z分数']) else "-")
+                with col4:
+                    st.metric("复合年均增长率", f"{latest['复合年均增长率']:.2f}%" if pd.notna(latest['复合年均增长率']) else "-")
+                
+                st.dataframe(
+                    analytics_data[['年份', '数字化转型指数', '同比增长率', '复合年均增长率',
+                                    '行业排名', '行业企业数', '行业百分位', '行业Z分数']],
+                    use_container_width=True
+                )
         
     else:
         st.warning("未找到该企业在所选年份范围内的数据")
@@ -191,32 +594,76 @@ if df is not None:
     if not industry_data.empty:
         st.write(f"{industry_name}行业历年平均数字化转型指数")
         
-        # 行业平均指数趋势图
-        fig_industry = px.line(
-            industry_data,
-            x="年份",
-            y="数字化转型指数",
-            title=f"{industry_name}行业平均数字化转型指数趋势"
+        # 行业平均指数趋势图（可叠加行业内全部企业的散点，点数较多时抽样并以WebGL渲染）
+        show_firms = st.checkbox("显示行业内全部企业", value=False)
+        fig_industry = build_industry_figure(industry_code, year_range, show_firms, data_version)
+        with timer('plot_industry'):
+            st.plotly_chart(fig_industry, use_container_width=True)
+    
+    # 行业全景：行业内全部企业的热力图、逐年分布和涨跌幅榜
+    st.subheader("🔬 行业全景")
+    industry_names = get_industry_names(df, data_version)
+    industry_options = industry_avg.industries() if industry_avg is not None else []
+    if industry_options:
+        explore_industry = st.selectbox(
+            "选择行业:",
+            options=industry_options,
+            index=industry_options.index(industry_code) if industry_code in industry_options else 0,
+            format_func=lambda code: f"{code} - {industry_names.get(code, '')}"
         )
-        fig_industry.update_layout(template="plotly_white", height=400)
-        st.plotly_chart(fig_industry, use_container_width=True)
+        
+        heatmap_tab, distribution_tab, movers_tab = st.tabs(["热力图", "逐年分布", "涨跌幅榜"])
+        with heatmap_tab:
+            st.plotly_chart(build_industry_heatmap(explore_industry, year_range, data_version),
+                            use_container_width=True)
+        with distribution_tab:
+            kind = st.radio("图表类型:", ["箱线图", "小提琴图"], horizontal=True)
+            st.plotly_chart(build_industry_distribution(explore_industry, year_range, kind, data_version),
+                            use_container_width=True)
+        with movers_tab:
+            start_year, end_year, movers = industry_movers(explore_industry, year_range, data_version)
+            if movers.empty:
+                st.info("所选年份范围内数据不足，无法计算指数变化")
+            else:
+                st.write(f"{start_year}年 → {end_year}年 数字化转型指数变化")
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.write(f"📈 提升最多的 {MOVERS_COUNT} 家企业")
+                    st.dataframe(movers.head(MOVERS_COUNT), use_container_width=True, hide_index=True)
+                with col2:
+                    st.write(f"📉 下降最多的 {MOVERS_COUNT} 家企业")
+                    st.dataframe(movers.tail(MOVERS_COUNT).iloc[::-1], use_container_width=True, hide_index=True)
     
     # 数据概览
     st.markdown("---")
     st.subheader("📊 数据概览")
     
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
         st.info(f"✅ 总企业数: {len(company_info)}")
     with col2:
         st.info(f"📅 年份范围: {min_year} - {max_year}")
     with col3:
         st.info(f"📈 数据记录数: {len(df)}")
+    with col4:
+        if isinstance(df, PanelStore):
+            st.info("💾 数据保存在磁盘（DuckDB），按需读取")
+        else:
+            footprint = df.attrs.get('memory_footprint', {})
+            before = footprint.get('before')
+            after = memory_footprint(df)
+            if before:
+                st.info(f"💾 内存占用: {after / 1024 / 1024:.1f} MB（压缩前 {before / 1024 / 1024:.1f} MB）")
+            else:
+                st.info(f"💾 内存占用: {after / 1024 / 1024:.1f} MB")
     
     # 显示数据样本
     st.write("数据样本:")
     st.dataframe(df.head(), use_container_width=True)
 
+# 性能诊断（侧边栏，可选）
+diagnostics_panel('dashboard')
+
 # 页脚
 st.markdown("---")
 st.footer("© 2024 企业数字化转型指数查询系统 | 基于Streamlit构建")
\ No newline at end of file
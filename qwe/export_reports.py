@@ -0,0 +1,206 @@
+"""
+批量导出企业趋势报告
+
+为全部企业一次性生成仪表盘中的统计分析（平均指数、最高/最低指数及年份、年均增长率）
+和趋势图：统计量通过一次分组计算得到，趋势图在多个工作进程中并行绘制。
+
+输出目录结构：
+    <输出目录>/summary.csv              全部企业的统计汇总
+    <输出目录>/summary.parquet          同上（安装pyarrow时）
+    <输出目录>/charts/<行业代码>/<股票代码>.png   按行业分区的企业趋势图
+
+用法示例：
+    python export_reports.py --data 数字化转型指数合并数据_带行业信息.xlsx -o 导出报告 --workers 8
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from charts import setup_matplotlib
+from data_store import format_code, load_panel
+from firm_analytics import company_stats
+from industry_cube import load_industry_cube
+
+
+def build_summary(df, start_year=None, end_year=None):
+    """全部企业的统计汇总（含企业名称、行业和数据年份范围）"""
+    if start_year is not None:
+        df = df[df['年份'] >= start_year]
+    if end_year is not None:
+        df = df[df['年份'] <= end_year]
+    df = df.dropna(subset=['股票代码', '年份', '数字化转型指数'])
+
+    info_cols = [col for col in ['企业名称', '行业代码', '行业名称'] if col in df.columns]
+    grouped = df.groupby('股票代码', sort=True, observed=True)
+    info = grouped[info_cols].first() if info_cols else pd.DataFrame(index=grouped.size().index)
+    info['起始年份'] = grouped['年份'].min()
+    info['结束年份'] = grouped['年份'].max()
+    info['记录数'] = grouped.size()
+
+    summary = info.join(company_stats(df)).reset_index()
+    summary['股票代码'] = summary['股票代码'].map(format_code)
+    return summary
+
+
+def _chart_tasks(df, cube, output_dir, start_year=None, end_year=None):
+    """为每家企业准备绘图任务（只传递绘图所需的数组，减少进程间传输量）"""
+    if start_year is not None:
+        df = df[df['年份'] >= start_year]
+    if end_year is not None:
+        df = df[df['年份'] <= end_year]
+    df = df.dropna(subset=['股票代码', '年份', '数字化转型指数'])
+    df = df.sort_values(['股票代码', '年份'], kind='stable')
+
+    codes = df['股票代码'].to_numpy()
+    years = df['年份'].to_numpy(dtype='int64')
+    values = df['数字化转型指数'].to_numpy(dtype='float64')
+    names = df['企业名称'].astype(object).to_numpy() if '企业名称' in df.columns else codes
+    industries = df['行业代码'].astype(object).to_numpy() if '行业代码' in df.columns else None
+    industry_names = df['行业名称'].astype(object).to_numpy() if '行业名称' in df.columns else None
+
+    # 每家企业的行范围
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], len(codes)]
+
+    industry_series = {}
+    tasks = []
+    for start, end in zip(starts, ends):
+        industry_code = industries[start] if industries is not None else None
+        industry_name = industry_names[start] if industry_names is not None else None
+        if industry_code is None or pd.isna(industry_code):
+            industry_code, industry_name, partition = None, None, '未分类'
+        else:
+            partition = str(industry_code)
+        if industry_code is not None and industry_code not in industry_series and cube is not None:
+            data = cube.series(industry_code, start_year, end_year)
+            industry_series[industry_code] = (data['年份'].to_numpy(dtype='int64'),
+                                              data['平均值'].to_numpy(dtype='float64'))
+        code = format_code(codes[start])
+        tasks.append({
+            'code': code,
+            'name': names[start],
+            'industry_name': industry_name,
+            'years': years[start:end],
+            'values': values[start:end],
+            'industry': industry_series.get(industry_code),
+            'path': os.path.join(output_dir, 'charts', partition, f'{code}.png'),
+        })
+    return tasks
+
+
+# 每个工作进程复用同一张图（只更新数据和标题），避免为每家企业重新创建图表
+_figure = None
+
+
+def _get_figure():
+    """创建（或复用）当前进程的绘图对象：图、坐标轴、企业折线、行业平均折线"""
+    global _figure
+    if _figure is None:
+        from matplotlib.figure import Figure
+
+        setup_matplotlib()
+        fig = Figure(figsize=(10, 5))
+        ax = fig.subplots()
+        # 固定边距，代替逐张计算的tight_layout
+        fig.subplots_adjust(left=0.08, right=0.97, top=0.9, bottom=0.12)
+        company_line, = ax.plot([], [], marker='o', linewidth=2, color='blue')
+        industry_line, = ax.plot([], [], marker='o', linewidth=2, linestyle='--', color='red')
+        ax.set_xlabel('年份')
+        ax.set_ylabel('数字化转型指数')
+        ax.grid(True, linestyle='--', alpha=0.7)
+        _figure = fig, ax, company_line, industry_line
+    return _figure
+
+
+def render_chart(task):
+    """在工作进程中绘制单家企业的趋势图并保存为图片"""
+    fig, ax, company_line, industry_line = _get_figure()
+
+    company_line.set_data(task['years'], task['values'])
+    company_line.set_label(f"{task['name']} (企业)")
+    if task['industry'] is not None:
+        industry_line.set_data(*task['industry'])
+        industry_line.set_label(f"{task['industry_name']} (行业平均)")
+        industry_line.set_visible(True)
+    else:
+        industry_line.set_data([], [])
+        industry_line.set_visible(False)
+
+    ax.set_title(f"{task['name']} ({task['code']}) 数字化转型指数趋势")
+    ax.relim(visible_only=True)
+    ax.autoscale_view()
+    ax.legend(handles=[line for line in (company_line, industry_line) if line.get_visible()])
+
+    os.makedirs(os.path.dirname(task['path']), exist_ok=True)
+    fig.savefig(task['path'], dpi=100)
+    return task['path']
+
+
+def write_summary(summary, output_dir):
+    """保存统计汇总（CSV，以及安装pyarrow时的Parquet）"""
+    paths = [os.path.join(output_dir, 'summary.csv')]
+    summary.to_csv(paths[0], index=False, encoding='utf-8-sig')
+    try:
+        summary.to_parquet(os.path.join(output_dir, 'summary.parquet'), index=False)
+        paths.append(os.path.join(output_dir, 'summary.parquet'))
+    except ImportError:
+        pass
+    return paths
+
+
+def export_reports(data_file, output_dir, workers=None, charts=True, start_year=None, end_year=None):
+    """导出全部企业的统计汇总和趋势图"""
+    df = load_panel(data_file, compact=True)
+    os.makedirs(output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    summary = build_summary(df, start_year, end_year)
+    paths = write_summary(summary, output_dir)
+    print(f"✓ 统计汇总：{len(summary)} 家企业，耗时 {time.perf_counter() - start:.2f}秒")
+    for path in paths:
+        print(f"  ✓ {path}")
+
+    if charts:
+        start = time.perf_counter()
+        cube = load_industry_cube(data_file, df) if '行业代码' in df.columns else None
+        tasks = _chart_tasks(df, cube, output_dir, start_year, end_year)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # 分批提交，降低进程间通信开销
+            chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 8))
+            for done, _ in enumerate(pool.map(render_chart, tasks, chunksize=chunksize), 1):
+                if done % 500 == 0 or done == len(tasks):
+                    print(f"  ✓ 已绘制 {done}/{len(tasks)} 张趋势图")
+        print(f"✓ 趋势图已保存至：{os.path.join(output_dir, 'charts')}，"
+              f"耗时 {time.perf_counter() - start:.2f}秒")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量导出全部企业的数字化转型指数统计汇总和趋势图")
+    parser.add_argument('--data', default='数字化转型指数合并数据_带行业信息.xlsx', help="数据文件")
+    parser.add_argument('-o', '--output', default='导出报告', help="输出目录")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="绘图进程数（默认为CPU核数）")
+    parser.add_argument('--start-year', type=int, default=None, help="起始年份")
+    parser.add_argument('--end-year', type=int, default=None, help="结束年份")
+    parser.add_argument('--no-charts', action='store_true', help="只导出统计汇总，不绘制趋势图")
+    args = parser.parse_args()
+
+    try:
+        print("开始执行批量导出任务...")
+        export_reports(args.data, args.output, workers=args.workers, charts=not args.no_charts,
+                       start_year=args.start_year, end_year=args.end_year)
+        print("\n✅ 批量导出任务完成！")
+    except Exception as e:
+        print(f"\n❌ 发生错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+企业-年份分析指标表
+
+每个数据版本只计算一次，为每家企业每一年给出：同比增长率、复合年均增长率、
+行业内排名、行业内百分位以及相对行业均值的Z分数。全部指标通过分组变换一次性算出，
+与数据缓存存放在同一目录下，供各应用直接查询。company_stats计算每家企业的汇总统计量
+（平均、最高/最低指数及年份、年均增长率），仪表板和批量导出使用同一套口径。
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import data_store
+from panel_index import PanelIndex
+
+# 分析指标列
+ANALYTICS_COLUMNS = ['同比增长率', '复合年均增长率', '行业排名', '行业企业数', '行业百分位', '行业Z分数']
+
+
+def build_firm_analytics(df, code_col='股票代码', year_col='年份', value_col='数字化转型指数',
+                         industry_col='行业代码'):
+    """一次分组变换计算所有企业、所有年份的分析指标
+
+    - 同比增长率：相对上一条记录（按年份排序）的变化率（%）
+    - 复合年均增长率：相对企业第一条记录的年均复合增长率（%），起点指数不为正时为缺失
+    - 行业排名：当年行业内按指数从高到低的排名（并列取最小名次）
+    - 行业百分位：当年行业内指数不高于该企业的企业占比（%）
+    - 行业Z分数：(指数 - 当年行业平均值) / 当年行业标准差
+    """
+    cols = [code_col, year_col, value_col] + ([industry_col] if industry_col in df.columns else [])
+    data = df[cols].dropna(subset=[code_col, year_col, value_col])
+    data = data.sort_values([code_col, year_col], kind='stable').reset_index(drop=True)
+    values = data[value_col].astype('float64')
+    years = data[year_col].astype('int64')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        previous = values.groupby(data[code_col], sort=False).shift(1)
+        yoy = (values / previous - 1) * 100
+
+        first_value = values.groupby(data[code_col], sort=False).transform('first')
+        first_year = years.groupby(data[code_col], sort=False).transform('first')
+        span = (years - first_year).where(lambda s: s > 0)
+        # 第一条记录（跨度为0）没有增长率：np.power(1, nan)为1，须单独置为缺失
+        cagr = ((np.power(values / first_value.where(first_value > 0), 1 / span) - 1) * 100).where(span.notna())
+
+    result = pd.DataFrame({
+        code_col: data[code_col],
+        year_col: data[year_col],
+        value_col: values,
+        '同比增长率': yoy.replace([np.inf, -np.inf], np.nan),
+        '复合年均增长率': cagr.replace([np.inf, -np.inf], np.nan),
+    })
+
+    if industry_col in data.columns:
+        result[industry_col] = data[industry_col]
+        grouped = values.groupby([data[industry_col], data[year_col]], sort=False, observed=True)
+        result['行业排名'] = grouped.rank(method='min', ascending=False).astype('Int32')
+        result['行业企业数'] = grouped.transform('count').astype('Int32')
+        result['行业百分位'] = grouped.rank(method='max', pct=True) * 100
+        mean = grouped.transform('mean')
+        std = grouped.transform('std')
+        result['行业Z分数'] = ((values - mean) / std.where(std > 0)).astype('float64')
+    else:
+        for col in ANALYTICS_COLUMNS[2:]:
+            result[col] = np.nan
+    return result
+
+
+def company_stats(df, code_col='股票代码', year_col='年份', value_col='数字化转型指数'):
+    """一次分组计算每家企业的统计量
+
+    年均增长率为按年份排序后逐年变化率的平均值（百分比），与 Series.pct_change().mean() 一致。
+    """
+    data = df[[code_col, year_col, value_col]].dropna()
+    data = data.sort_values([code_col, year_col], kind='stable').reset_index(drop=True)
+    values = data[value_col].astype('float64')
+
+    # 逐年变化率：组内前一行的值，跨企业边界处置为缺失
+    previous = values.shift(1)
+    previous[data[code_col].ne(data[code_col].shift(1)).to_numpy()] = np.nan
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = values / previous - 1
+
+    grouped = values.groupby(data[code_col], sort=True)
+    years = data[year_col].to_numpy()
+    # 最高/最低指数所在年份取第一次出现的年份
+    max_pos = grouped.idxmax().dropna().astype('int64')
+    min_pos = grouped.idxmin().dropna().astype('int64')
+
+    stats = pd.DataFrame({
+        '平均指数': grouped.mean(),
+        '最高指数': grouped.max(),
+        '最高指数年份': pd.Series(years[max_pos.to_numpy()], index=max_pos.index),
+        '最低指数': grouped.min(),
+        '最低指数年份': pd.Series(years[min_pos.to_numpy()], index=min_pos.index),
+        '年均增长率': change.groupby(data[code_col], sort=True).mean() * 100,
+    })
+    stats.index.name = code_col
+    return stats
+
+
+class FirmAnalytics:
+    """企业分析指标表：按股票代码直接定位该企业的各年指标"""
+
+    def __init__(self, table, code_col='股票代码', year_col='年份'):
+        self.code_col = code_col
+        self.year_col = year_col
+        self.index = PanelIndex(table, code_col=code_col, year_col=year_col, name_col=None)
+        self.df = self.index.df
+
+    def __contains__(self, code):
+        return code in self.index
+
+    def firm(self, code, start_year=None, end_year=None):
+        """获取企业在年份区间内的各年指标（按年份排序）"""
+        data = self.index.company(code)
+        if start_year is not None:
+            data = data[data[self.year_col] >= start_year]
+        if end_year is not None:
+            data = data[data[self.year_col] <= end_year]
+        return data
+
+    def row(self, code, year):
+        """获取企业某年的指标（单行DataFrame），未找到时返回空表"""
+        return self.index.row(code, year)
+
+
+class YearSnapshots:
+    """逐年横截面快照：每年全部企业的指数、行业排名和百分位，按行业代码分组、组内按排名连续存放
+
+    由分析指标表一次性构建，按（年份）或（年份, 行业代码）直接定位行切片，切换年份时无需筛选整张表。
+    """
+
+    def __init__(self, table, code_col='股票代码', year_col='年份', industry_col='行业代码'):
+        self.year_col = year_col
+        self.industry_col = industry_col
+        keys = [year_col] + ([industry_col] if industry_col in table.columns else [])
+        self.df = table.sort_values(keys + ['行业排名', code_col], kind='stable',
+                                    na_position='last').reset_index(drop=True)
+
+        # 排序后同一（年份, 行业）的记录连续存放，组号变化的位置即为各组的边界
+        groups = self.df.groupby(keys, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+        if len(groups):
+            bounds = np.flatnonzero(groups[1:] != groups[:-1]) + 1
+            starts = np.concatenate(([0], bounds))
+            ends = np.concatenate((bounds, [len(groups)]))
+        else:
+            starts = ends = np.array([], dtype=np.int64)
+        years = self.df[year_col].to_numpy()
+        industries = self.df[industry_col].to_numpy() if industry_col in self.df.columns else None
+
+        self._years = {}
+        self._groups = {}
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            year = years[start]
+            first, _ = self._years.get(year, (start, end))
+            self._years[year] = (first, end)
+            if industries is not None:
+                self._groups[(year, industries[start])] = (start, end)
+
+    def years(self):
+        """有数据的年份（已排序）"""
+        return list(self._years)
+
+    def year(self, year):
+        """某年全部企业的横截面（按行业代码、行业排名排序），未找到时返回空表"""
+        start, end = self._years.get(year, (0, 0))
+        return self.df.iloc[start:end]
+
+    def industry(self, year, industry_code):
+        """某年某行业全部企业的横截面（按行业排名排序），未找到时返回空表"""
+        start, end = self._groups.get((year, industry_code), (0, 0))
+        return self.df.iloc[start:end]
+
+
+def load_firm_analytics(path, df=None, version=None):
+    """加载与数据文件版本对应的企业分析指标表，缓存不存在时计算并持久化
+
+    df为已加载的面板数据，省略时通过data_store读取。version为数据版本（见data_store.load_panel），
+    给出时读取该版本的缓存，df也须是该版本的数据。
+    """
+    if data_store.pa is None:
+        if df is None:
+            df = data_store.load_panel(path)
+        return FirmAnalytics(build_firm_analytics(df))
+
+    if version is None:
+        version = data_store.file_version(data_store.resolve_source(path))
+    target = data_store.cache_path(path, version, suffix='analytics.arrow')
+    if os.path.exists(target):
+        try:
+            return FirmAnalytics(data_store.read_cache(target))
+        except (OSError, data_store.pa.ArrowInvalid):
+            pass  # 缓存损坏，重新计算
+
+    if df is None:
+        df = data_store.load_panel(path, version=version)
+    table = build_firm_analytics(df)
+    try:
+        data_store.write_cache(table, target)
+    except (OSError, data_store.pa.ArrowException):
+        pass
+    return FirmAnalytics(table)
@@ -0,0 +1,108 @@
+"""
+行业-年份汇总立方体
+
+每个数据版本只计算一次（行业 × 年份 → 平均值、中位数、企业数、标准差、分位数），
+与数据缓存存放在同一目录下，供各应用直接查询，不再在每次交互时重新分组计算。
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import data_store
+from panel_index import PanelIndex
+
+# 汇总立方体的统计量列
+CUBE_STAT_COLUMNS = ['平均值', '中位数', '企业数', '标准差', '下四分位数', '上四分位数']
+
+
+def build_industry_cube(df, industry_col='行业代码', year_col='年份', value_col='数字化转型指数'):
+    """一次分组计算所有行业、所有年份的汇总统计量"""
+    data = df[[industry_col, year_col, value_col]].dropna()
+    data = data.astype({year_col: 'int64', value_col: 'float64'})
+    grouped = data.groupby([industry_col, year_col], sort=True)[value_col]
+
+    cube = grouped.agg(['mean', 'median', 'count', 'std'])
+    quartiles = grouped.quantile([0.25, 0.75]).unstack()
+    cube['q25'] = quartiles[0.25]
+    cube['q75'] = quartiles[0.75]
+    cube.columns = CUBE_STAT_COLUMNS
+    return cube.reset_index()
+
+
+def build_industry_matrix(df, industry_code, industry_col='行业代码', code_col='股票代码',
+                          year_col='年份', value_col='数字化转型指数'):
+    """某行业的 企业 × 年份 指数矩阵（行为股票代码，列为年份，缺失为NaN）"""
+    data = df.loc[df[industry_col] == industry_code, [code_col, year_col, value_col]].dropna()
+    codes, code_pos = np.unique(data[code_col].to_numpy(), return_inverse=True)
+    years, year_pos = np.unique(data[year_col].to_numpy(), return_inverse=True)
+    matrix = np.full((len(codes), len(years)), np.nan)
+    matrix[code_pos, year_pos] = data[value_col].to_numpy(dtype='float64')
+    return pd.DataFrame(
+        matrix,
+        index=pd.Index(codes, name=code_col),
+        columns=pd.Index(years.astype('int64'), name=year_col)
+    )
+
+
+class IndustryCube:
+    """行业汇总立方体：按行业代码直接定位该行业的各年统计量"""
+
+    def __init__(self, cube, industry_col='行业代码', year_col='年份'):
+        self.industry_col = industry_col
+        self.year_col = year_col
+        self.index = PanelIndex(cube, code_col=industry_col, year_col=year_col, name_col=None)
+        self.df = self.index.df
+
+    def __contains__(self, industry_code):
+        return industry_code in self.index
+
+    def industries(self):
+        """所有行业代码（已排序）"""
+        return self.index.codes()
+
+    def series(self, industry_code, start_year=None, end_year=None):
+        """获取某行业在年份区间内的各年统计量（按年份排序）"""
+        data = self.index.company(industry_code)
+        if start_year is not None:
+            data = data[data[self.year_col] >= start_year]
+        if end_year is not None:
+            data = data[data[self.year_col] <= end_year]
+        return data
+
+    def value(self, industry_code, year, stat='平均值'):
+        """获取某行业某年的单个统计量，未找到时返回None"""
+        pos = self.index.row_position(industry_code, year)
+        if pos is None:
+            return None
+        return self.df.at[pos, stat]
+
+
+def load_industry_cube(path, df=None, version=None):
+    """加载与数据文件版本对应的行业汇总立方体，缓存不存在时计算并持久化
+
+    df为已加载的面板数据，省略时通过data_store读取。version为数据版本（见data_store.load_panel），
+    给出时读取该版本的缓存，df也须是该版本的数据。
+    """
+    if data_store.pa is None:
+        if df is None:
+            df = data_store.load_panel(path)
+        return IndustryCube(build_industry_cube(df))
+
+    if version is None:
+        version = data_store.file_version(data_store.resolve_source(path))
+    target = data_store.cache_path(path, version, suffix='cube.arrow')
+    if os.path.exists(target):
+        try:
+            return IndustryCube(data_store.read_cache(target))
+        except (OSError, data_store.pa.ArrowInvalid):
+            pass  # 缓存损坏，重新计算
+
+    if df is None:
+        df = data_store.load_panel(path, version=version)
+    cube = build_industry_cube(df)
+    try:
+        data_store.write_cache(cube, target)
+    except (OSError, data_store.pa.ArrowException):
+        pass
+    return IndustryCube(cube)
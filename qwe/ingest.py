@@ -0,0 +1,125 @@
+"""
+并行数据导入
+
+支持通配符和目录作为输入，使用进程池并行解析多个工作簿/工作表（xlsx解析为CPU密集型），
+在每个分块中统一股票代码和年份列的格式，最后拼接为一张带类型的面板数据。
+
+用法示例：
+    python ingest.py "data/数字化转型指数*.xlsx" data/2022 -o 数字化转型指数合并数据.xlsx
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from panel_writer import save_panel
+from stock_codes import normalize_codes
+
+# 识别为股票代码列/年份列的列名（股票代码全称带交易所后缀，保持原样，合并时再解析）
+CODE_COLUMNS = ['股票代码', '证券代码', '代码', 'stock_code', 'code']
+YEAR_COLUMNS = ['年份', '年度', 'year', 'Year']
+
+# 支持的Excel文件扩展名
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm')
+
+
+def expand_inputs(patterns):
+    """将通配符、目录和文件路径展开为Excel文件列表（去重并排序）"""
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, names in os.walk(pattern):
+                files.update(os.path.join(root, name) for name in names
+                             if name.lower().endswith(EXCEL_EXTENSIONS))
+        else:
+            files.update(path for path in glob.glob(pattern, recursive=True)
+                         if os.path.isfile(path))
+    # 跳过Excel打开文件时生成的临时文件
+    return sorted(f for f in files if not os.path.basename(f).startswith('~$'))
+
+
+def list_sheets(path):
+    """列出工作簿中的所有工作表名（只读模式，不解析单元格）"""
+    wb = load_workbook(path, read_only=True)
+    try:
+        return wb.sheetnames
+    finally:
+        wb.close()
+
+
+def normalize_chunk(df):
+    """统一分块中股票代码列和年份列的格式"""
+    df = df.dropna(how='all')
+    for col in df.columns:
+        if col in CODE_COLUMNS:
+            df[col] = normalize_codes(df[col])
+        elif col in YEAR_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors='coerce').round().astype('Int64')
+    return df
+
+
+def _read_sheet(task):
+    """在工作进程中读取并规范化单个工作表"""
+    path, sheet = task
+    df = pd.read_excel(path, sheet_name=sheet)
+    return normalize_chunk(df)
+
+
+def ingest(patterns, workers=None):
+    """并行读取所有输入文件的所有工作表，拼接为一张面板数据"""
+    files = expand_inputs(patterns)
+    if not files:
+        raise FileNotFoundError(f"未找到匹配的Excel文件: {', '.join(patterns)}")
+
+    tasks = [(path, sheet) for path in files for sheet in list_sheets(path)]
+    print(f"✓ 共找到 {len(files)} 个文件、{len(tasks)} 个工作表")
+
+    frames = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_read_sheet, task): i for i, task in enumerate(tasks)}
+        for future in as_completed(futures):
+            i = futures[future]
+            frames[i] = future.result()
+            path, sheet = tasks[i]
+            print(f"  ✓ {os.path.basename(path)} [{sheet}]：{len(frames[i])}行")
+
+    # 按输入顺序拼接，保证结果可复现
+    frames = [frames[i] for i in range(len(tasks)) if not frames[i].empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并行导入多个Excel工作簿/工作表并拼接为一张面板数据")
+    parser.add_argument('inputs', nargs='+', help="输入文件、目录或通配符")
+    parser.add_argument('-o', '--output', required=True, help="输出文件（.parquet/.feather/.csv/.xlsx，无扩展名时为按年份分区的Parquet目录）")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="工作进程数（默认为CPU核数）")
+    args = parser.parse_args()
+
+    try:
+        print("开始执行并行导入任务...")
+        start_time = time.perf_counter()
+        panel = ingest(args.inputs, workers=args.workers)
+        elapsed = time.perf_counter() - start_time
+        print(f"\n✓ 拼接后共 {panel.shape[0]}行 × {panel.shape[1]}列")
+        if elapsed > 0:
+            print(f"✓ 读取耗时：{elapsed:.2f}秒（{panel.shape[0] / elapsed:.0f} 行/秒）")
+
+        save_panel(panel, args.output)
+        print(f"✓ 结果已保存至：{args.output}")
+        print("\n✅ 并行导入任务完成！")
+    except Exception as e:
+        print(f"\n❌ 发生错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+性能计时与缓存命中统计
+
+在数据加载、筛选、聚合和图表构建等热点路径上计时，区分每次页面刷新（rerun）的明细
+和服务进程内的累计统计；被st.cache_data/st.cache_resource缓存的函数额外统计调用次数
+和未命中次数。统计结果可在应用侧边栏的性能诊断面板中查看，也可导出为Prometheus文本格式
+（就绪检查端口的GET /metrics）或JSON；设置环境变量PERF_LOG_FILE时，每次刷新的明细
+以JSON行追加写入该文件。
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# 每次刷新明细的JSON日志文件的环境变量
+LOG_FILE_ENV = 'PERF_LOG_FILE'
+
+# Prometheus指标名前缀
+METRIC_PREFIX = 'qwe'
+
+_lock = threading.Lock()
+_sections = {}  # 区段名 -> [次数, 总耗时, 最大耗时]
+_caches = {}    # 缓存函数名 -> [调用次数, 未命中次数]
+_local = threading.local()
+
+
+def _record(name, seconds, cache=None):
+    """记录一次计时；cache为True/False表示缓存函数本次命中/未命中"""
+    with _lock:
+        stats = _sections.setdefault(name, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+        if cache is not None:
+            calls = _caches.setdefault(name, [0, 0])
+            calls[0] += 1
+            calls[1] += not cache
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is not None:
+        rerun.append((name, seconds, cache))
+
+
+@contextmanager
+def timer(name):
+    """计时上下文管理器：with timer('筛选'): ..."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - start)
+
+
+def timed(name=None):
+    """计时装饰器，name省略时使用函数名"""
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def cached(cache_decorator, name=None):
+    """为缓存函数统计调用次数、未命中次数和耗时
+
+    用法：
+        @cached(st.cache_resource(max_entries=2))
+        def load_data(data_version): ...
+
+    函数体只在缓存未命中时执行，据此区分命中与未命中；缓存键仍按原函数的源代码和参数计算。
+    """
+    def decorate(func):
+        label = name or func.__name__
+        state = threading.local()
+
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            state.missed = True
+            return func(*args, **kwargs)
+
+        cached_func = cache_decorator(compute)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            state.missed = False
+            start = time.perf_counter()
+            try:
+                return cached_func(*args, **kwargs)
+            finally:
+                _record(label, time.perf_counter() - start, cache=not state.missed)
+
+        wrapper.clear = cached_func.clear
+        return wrapper
+    return decorate
+
+
+def start_rerun():
+    """开始记录本次页面刷新的明细（在脚本开头调用）"""
+    _local.rerun = []
+    _local.rerun_started = time.perf_counter()
+
+
+def finish_rerun(app):
+    """结束本次刷新，返回明细；设置了PERF_LOG_FILE时追加一行JSON日志"""
+    timings = getattr(_local, 'rerun', None) or []
+    started = getattr(_local, 'rerun_started', None)
+    _local.rerun = None
+    total = time.perf_counter() - started if started is not None else None
+    if total is not None:
+        _record(f'{app}.rerun', total)
+
+    path = os.environ.get(LOG_FILE_ENV)
+    if path:
+        entry = {
+            'time': time.time(),
+            'app': app,
+            'seconds': round(total, 6) if total is not None else None,
+            'sections': [
+                {'name': name, 'seconds': round(seconds, 6), 'cache_hit': cache}
+                for name, seconds, cache in timings
+            ],
+        }
+        try:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        except OSError:
+            pass
+    return total, timings
+
+
+def snapshot():
+    """进程内累计统计（可直接序列化为JSON）"""
+    with _lock:
+        sections = {
+            name: {'count': count, 'seconds_total': round(total, 6),
+                   'seconds_mean': round(total / count, 6), 'seconds_max': round(peak, 6)}
+            for name, (count, total, peak) in _sections.items()
+        }
+        caches = {
+            name: {'calls': calls, 'misses': misses,
+                   'hit_rate': round(1 - misses / calls, 4) if calls else None}
+            for name, (calls, misses) in _caches.items()
+        }
+    return {'sections': sections, 'caches': caches}
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text():
+    """以Prometheus文本格式导出累计统计"""
+    data = snapshot()
+    sections = f'{METRIC_PREFIX}_section_seconds'
+    lines = [
+        f'# HELP {sections} 热点路径区段耗时（秒）',
+        f'# TYPE {sections} summary',
+    ]
+    for name, stats in sorted(data['sections'].items()):
+        lines.append(f'{sections}_count{{section="{_label(name)}"}} {stats["count"]}')
+        lines.append(f'{sections}_sum{{section="{_label(name)}"}} {stats["seconds_total"]}')
+    for metric, key, help_text in (('cache_calls_total', 'calls', '缓存函数调用次数'),
+                                   ('cache_misses_total', 'misses', '缓存函数未命中次数')):
+        metric = f'{METRIC_PREFIX}_{metric}'
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} counter')
+        for name, stats in sorted(data['caches'].items()):
+            lines.append(f'{metric}{{function="{_label(name)}"}} {stats[key]}')
+    return '\n'.join(lines) + '\n'
+
+
+def diagnostics_panel(app, key='perf_diagnostics'):
+    """结束本次刷新的计时，并在侧边栏显示可选的性能诊断面板（在脚本末尾调用）"""
+    import pandas as pd
+    import streamlit as st
+
+    total, timings = finish_rerun(app)
+    if not st.sidebar.checkbox("显示性能诊断", key=key):
+        return
+
+    with st.sidebar.expander("⏱️ 性能诊断", expanded=True):
+        if total is not None:
+            st.write(f"本次刷新耗时：{total * 1000:.1f} ms")
+        if timings:
+            cache_text = {True: '命中', False: '未命中', None: ''}
+            st.dataframe(pd.DataFrame({
+                '区段': [name for name, _, _ in timings],
+                '耗时(ms)': [round(seconds * 1000, 1) for _, seconds, _ in timings],
+                '缓存': [cache_text[cache] for _, _, cache in timings],
+            }), hide_index=True)
+
+        data = snapshot()
+        if data['caches']:
+            st.write("缓存命中率（服务进程累计）")
+            st.dataframe(pd.DataFrame([
+                {'函数': name, '调用次数': stats['calls'], '未命中': stats['misses'],
+                 '命中率(%)': round(stats['hit_rate'] * 100, 1) if stats['hit_rate'] is not None else None}
+                for name, stats in data['caches'].items()
+            ]), hide_index=True)
+
+        st.download_button("导出Prometheus指标", prometheus_text(), file_name="metrics.txt",
+                           mime="text/plain", key=f"{key}_prometheus")
+        st.download_button("导出JSON", json.dumps(data, ensure_ascii=False, indent=2),
+                           file_name="metrics.json", mime="application/json", key=f"{key}_json")
@@ -1,49 +1,142 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
 import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+from data_store import _coerce_for_arrow, hash_file, read_source
+from ingest import expand_inputs
+from panel_writer import PARQUET_COMPRESSION, output_format, save_panel
+from stock_codes import join_key, normalize_codes
+
+try:
+    import pyarrow.dataset as ds
+except ImportError:  # 未安装pyarrow时非Excel文件整体读取后再分批
+    ds = None
 
 # 设置文件路径
 excel_file1 = r"c:\Users\HUAWEI\Desktop\qwe\数字化转型指数合并数据.xlsx"
 excel_file2 = r"c:\Users\HUAWEI\Desktop\qwe\最终数据dta格式-上市公司年度行业代码至2021.xlsx"
 output_file = r"c:\Users\HUAWEI\Desktop\qwe\数字化转型指数合并数据_带行业信息.xlsx"
 
-def merge_excel_files():
+# 流式合并时每批读取的行数
+CHUNK_SIZE = 50000
+
+# 流式合并时由Arrow分批读取的文件格式
+ARROW_FORMATS = {'.parquet': 'parquet', '.feather': 'feather', '.arrow': 'feather', '.ipc': 'feather', '.csv': 'csv'}
+
+# 匹配率低于该值（%）的年份在合并报告中标出
+LOW_MATCH_RATE = 90.0
+
+# 增量合并的分区存储目录及清单文件名
+store_dir = os.path.splitext(output_file)[0] + "_分区"
+MANIFEST_NAME = "manifest.json"
+
+def normalize_years(series):
+    """将年份统一为整数（无法转换时为缺失值）"""
+    return pd.to_numeric(series, errors='coerce').round().astype('Int64')
+
+
+def prepare_industry_table(df2):
+    """整理第二张表：将股票代码全称解析为整数代码作为匹配键，统一年份列名和类型，并去除重复的股票代码和年份组合
+
+    返回整理后的行业表和重复组合的数量。
+    """
+    # 股票代码全称（如600000.SH）与第一张表的股票代码（如600000、'000001'）解析为同一整数代码
+    df2_selected = pd.DataFrame({
+        '股票代码_key': normalize_codes(df2['股票代码全称']),
+        '年份': normalize_years(df2['年度']),  # 第二张表的年度列即年份
+        '行业代码': df2['行业代码'],
+        '行业名称': df2['行业名称'],
+    })
+    
+    # 检查是否有重复的股票代码和年份组合（在第二张表中）
+    duplicate_count = df2_selected.duplicated(subset=['股票代码_key', '年份']).sum()
+    if duplicate_count > 0:
+        df2_selected = df2_selected.drop_duplicates(subset=['股票代码_key', '年份'], keep='first')
+    return df2_selected, duplicate_count
+
+
+def attach_industry(df1, industry_table, codes=None):
+    """将行业信息左连接到第一张表上，保留第一张表的所有数据
+
+    股票代码和年份合成单列整数连接键；codes为已解析的第一张表股票代码（省略时在此解析）。
+    """
+    if codes is None:
+        codes = normalize_codes(df1['股票代码'])
+    right = industry_table.assign(_key=join_key(industry_table['股票代码_key'], industry_table['年份']))
+    right = right.dropna(subset=['_key'])[['_key', '行业代码', '行业名称']]
+    merged_df = pd.merge(
+        df1.assign(_key=join_key(codes, normalize_years(df1['年份'])).to_numpy()),
+        right,
+        on='_key',
+        how='left'  # 使用左连接，保留第一张表的所有数据
+    )
+    # 删除临时创建的连接键列
+    return merged_df.drop(columns=['_key'])
+
+
+def match_counts(years, matched):
+    """按年份统计记录数和匹配数（可逐批累加）"""
+    frame = pd.DataFrame({'年份': normalize_years(pd.Series(years)).to_numpy(), '匹配数': np.asarray(matched)})
+    counts = frame.groupby('年份', dropna=False)['匹配数'].agg(['size', 'sum'])
+    return counts.set_axis(['记录数', '匹配数'], axis=1).astype('int64')
+
+
+def print_match_report(counts, unparsed=0):
+    """打印各年份的匹配率，匹配率低于LOW_MATCH_RATE的年份单独标出
+
+    unparsed为第一张表中无法解析的股票代码数量。
+    """
+    if unparsed:
+        print(f"⚠ 注意：第一张表中有{unparsed}条记录的股票代码无法解析，无法匹配行业信息")
+    if counts.empty:
+        return
+    print("✓ 各年份匹配率：")
+    for year, row in counts.sort_index().iterrows():
+        rate = row['匹配数'] / row['记录数'] * 100 if row['记录数'] else 0.0
+        flag = " ⚠" if rate < LOW_MATCH_RATE else ""
+        label = "年份缺失" if pd.isna(year) else f"{year}年"
+        print(f"  {label}：{row['匹配数']}/{row['记录数']}（{rate:.2f}%）{flag}")
+
+
+def merge_excel_files(file1=None, file2=None, output=None):
+    """一次性读取两张表并合并
+
+    两张表按扩展名读取（.xlsx/.parquet/.feather/.csv，见data_store.read_source），ingest.py输出的
+    Parquet/Feather文件可以直接作为第一张表。成功时返回True，出错时打印错误信息并返回False。output为一个或多个输出路径，格式由扩展名决定（.xlsx/.parquet/.feather/.csv，无扩展名时为
+    按年份分区的Parquet目录，见panel_writer），同一次合并可以同时写出多种格式。
+    """
+    file1 = file1 or excel_file1
+    file2 = file2 or excel_file2
+    outputs = [output] if isinstance(output, str) else list(output or [output_file])
     try:
         print("开始执行数据合并任务...")
         
-        # 读取第一张Excel表
-        df1 = pd.read_excel(excel_file1)
+        # 读取第一张表
+        df1 = read_source(file1)
         print(f"✓ 成功读取第一张表：{df1.shape[0]}行 × {df1.shape[1]}列")
         
-        # 读取第二张Excel表
-        df2 = pd.read_excel(excel_file2)
+        # 读取第二张表
+        df2 = read_source(file2)
         print(f"✓ 成功读取第二张表：{df2.shape[0]}行 × {df2.shape[1]}列")
         
         # 数据预处理：将关键字段转换为统一格式
         print("\n开始数据预处理...")
-        
-        # 将股票代码转换为字符串格式（不补零，直接转换）
-        df1['股票代码_str'] = df1['股票代码'].astype(str)
-        df2['股票代码_str'] = df2['股票代码全称'].astype(str)  # 使用股票代码全称
-        
-        # 重命名第二张表的年度列为年份，保持一致
-        df2 = df2.rename(columns={'年度': '年份'})
-        
-        # 选择需要合并的字段
-        df2_selected = df2[['股票代码_str', '年份', '行业代码', '行业名称']]
-        
-        # 检查是否有重复的股票代码和年份组合（在第二张表中）
-        duplicate_count = df2_selected.duplicated(subset=['股票代码_str', '年份']).sum()
+        df2_selected, duplicate_count = prepare_industry_table(df2)
         if duplicate_count > 0:
             print(f"⚠ 注意：第二张表中存在{duplicate_count}个重复的股票代码和年份组合，将保留第一个匹配项")
-            df2_selected = df2_selected.drop_duplicates(subset=['股票代码_str', '年份'], keep='first')
         
         # 执行合并操作
         print("\n开始执行数据合并...")
-        merged_df = pd.merge(
-            df1, 
-            df2_selected, 
-            on=['股票代码_str', '年份'], 
-            how='left'  # 使用左连接，保留第一张表的所有数据
-        )
+        codes = normalize_codes(df1['股票代码'])
+        merged_df = attach_industry(df1, df2_selected, codes)
         
         # 检查合并结果
         print("\n合并结果分析：")
@@ -54,25 +147,409 @@ def merge_excel_files():
         # 计算匹配成功率
         match_rate = merged_df['行业代码'].notna().sum() / merged_df.shape[0] * 100
         print(f"✓ 匹配成功率：{match_rate:.2f}%")
+        print_match_report(match_counts(merged_df['年份'], merged_df['行业代码'].notna()),
+                           unparsed=int((codes.isna() & df1['股票代码'].notna()).sum()))
         
-        # 删除临时创建的股票代码字符串列
-        merged_df = merged_df.drop(columns=['股票代码_str'])
-        
-        # 保存合并结果到新的Excel文件
+        # 保存合并结果（每种输出格式分别计时）
         print("\n正在保存合并结果...")
-        merged_df.to_excel(output_file, index=False, engine='openpyxl')
-        print(f"✓ 合并结果已保存至：{output_file}")
+        for path in outputs:
+            start_time = time.perf_counter()
+            fmt = save_panel(merged_df, path)
+            print(f"✓ 合并结果已保存至：{path}（{fmt}，{time.perf_counter() - start_time:.2f}秒）")
         
         # 显示合并后的前几行数据
         print("\n合并后的数据示例：")
         print(merged_df.head())
         
         print("\n✅ 数据合并任务完成！")
+        return True
         
     except Exception as e:
         print(f"\n❌ 发生错误: {str(e)}")
         import traceback
         traceback.print_exc()
+        return False
+
+def _iter_row_chunks(path, chunk_size):
+    """逐批读取数据文件，返回表头和按批次划分的数据行
+
+    Excel工作表以只读模式逐行读取；Parquet/Feather/CSV由Arrow按批读取（未安装pyarrow时整体读取后分批）。
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ARROW_FORMATS:
+        if ds is not None:
+            dataset = ds.dataset(path, format=ARROW_FORMATS[ext])
+            header = dataset.schema.names
+            batches = (list(zip(*(col.to_pylist() for col in batch.columns)))
+                       for batch in dataset.to_batches(batch_size=chunk_size))
+            return header, (batch for batch in batches if batch)
+        df = read_source(path)
+        rows = df.itertuples(index=False, name=None)
+        return [str(col) for col in df.columns], iter(lambda: list(itertools.islice(rows, chunk_size)), [])
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    ws = wb.active
+    rows = ws.iter_rows(values_only=True)
+    header = [str(h) if h is not None else '' for h in next(rows, ())]
+
+    def chunks():
+        try:
+            while True:
+                chunk = list(itertools.islice(rows, chunk_size))
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            wb.close()
+
+    return header, chunks()
+
+
+def _peak_memory_mb():
+    """当前进程的峰值内存占用（MB），无法获取时返回None"""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux下单位为KB，macOS下单位为字节
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    'PeakWorkingSetSize', 'WorkingSetSize',
+                    'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                    'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage',
+                    'PagefileUsage', 'PeakPagefileUsage',
+                )
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize / 1024 / 1024
+    return None
+
+
+def _chunk_keys(chunk, code_pos, year_pos):
+    """批量解析一批数据行的股票代码和年份
+
+    返回连接键数组（无法解析时为-1）、年份以及无法解析的股票代码数量。
+    """
+    raw = pd.Series([row[code_pos] for row in chunk], dtype=object)
+    codes = normalize_codes(raw)
+    years = normalize_years(pd.Series([row[year_pos] for row in chunk], dtype=object))
+    keys = join_key(codes, years).to_numpy(dtype='int64', na_value=-1)
+    return keys, years, int((codes.isna() & raw.notna()).sum())
+
+
+def _build_industry_index(path, chunk_size):
+    """流式读取第二张表，建立 连接键（整数代码 × 10000 + 年份） → (行业代码, 行业名称) 的哈希索引"""
+    header, chunks = _iter_row_chunks(path, chunk_size)
+    code_pos = header.index('股票代码全称')
+    year_pos = header.index('年度')
+    industry_code_pos = header.index('行业代码')
+    industry_name_pos = header.index('行业名称')
+
+    index = {}
+    interned = {}  # 相同的行业信息只保存一份
+    total_rows = 0
+    duplicate_count = 0
+    for chunk in chunks:
+        keys, _, _ = _chunk_keys(chunk, code_pos, year_pos)
+        for key, row in zip(keys.tolist(), chunk):
+            if key < 0:
+                continue
+            if key in index:
+                duplicate_count += 1
+                continue
+            value = (row[industry_code_pos], row[industry_name_pos])
+            index[key] = interned.setdefault(value, value)
+        total_rows += len(chunk)
+        print(f"  已读取第二张表 {total_rows} 行...")
+    return index, total_rows, duplicate_count
+
+
+def merge_excel_files_streaming(file1=None, file2=None, output=None, chunk_size=CHUNK_SIZE):
+    """流式合并：分批读取、边读边合并边写出，内存占用只与行业索引大小有关
+
+    成功时返回True，出错时打印错误信息并返回False。
+    """
+    file1 = file1 or excel_file1
+    file2 = file2 or excel_file2
+    output = output or output_file
+    try:
+        print("开始执行流式数据合并任务...")
+        start_time = time.perf_counter()
+
+        # 第一步：建立第二张表的行业信息索引
+        index, rows2, duplicate_count = _build_industry_index(file2, chunk_size)
+        print(f"✓ 成功读取第二张表：{rows2}行，索引键数：{len(index)}")
+        if duplicate_count > 0:
+            print(f"⚠ 注意：第二张表中存在{duplicate_count}个重复的股票代码和年份组合，将保留第一个匹配项")
+
+        # 第二步：分批读取第一张表，逐行匹配并写出
+        header, chunks = _iter_row_chunks(file1, chunk_size)
+        code_pos = header.index('股票代码')
+        year_pos = header.index('年份')
+
+        out_wb = Workbook(write_only=True)
+        out_ws = out_wb.create_sheet()
+        out_ws.append(header + ['行业代码', '行业名称'])
+
+        missing = (None, None)
+        total_rows = 0
+        matched_rows = 0
+        unparsed = 0
+        counts = None
+        for chunk in chunks:
+            keys, years, chunk_unparsed = _chunk_keys(chunk, code_pos, year_pos)
+            matched = np.zeros(len(chunk), dtype=bool)
+            for i, (key, row) in enumerate(zip(keys.tolist(), chunk)):
+                industry = index.get(key, missing)
+                if industry is not missing:
+                    matched[i] = True
+                out_ws.append(list(row) + list(industry))
+            unparsed += chunk_unparsed
+            matched_rows += int(matched.sum())
+            chunk_counts = match_counts(years, matched)
+            counts = chunk_counts if counts is None else counts.add(chunk_counts, fill_value=0).astype('int64')
+            total_rows += len(chunk)
+            print(f"  已合并 {total_rows} 行...")
+
+        print("\n正在保存合并结果...")
+        out_wb.save(output)
+        peak_memory = _peak_memory_mb()
+
+        # 合并结果分析
+        print("\n合并结果分析：")
+        print(f"✓ 合并后总记录数：{total_rows}")
+        print(f"✓ 成功匹配行业信息的记录数：{matched_rows}")
+        print(f"✓ 未匹配到行业信息的记录数：{total_rows - matched_rows}")
+        if total_rows:
+            print(f"✓ 匹配成功率：{matched_rows / total_rows * 100:.2f}%")
+        if counts is not None:
+            print_match_report(counts, unparsed=unparsed)
+        print(f"✓ 合并结果已保存至：{output}")
+        print(f"✓ 耗时：{time.perf_counter() - start_time:.2f}秒")
+        if peak_memory is not None:
+            print(f"✓ 峰值内存：{peak_memory:.1f} MB")
+
+        print("\n✅ 流式数据合并任务完成！")
+        return True
+
+    except Exception as e:
+        print(f"\n❌ 发生错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def _frame_hash(df):
+    """计算数据分区的内容哈希（与行顺序和列名有关，与索引无关）"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update('|'.join(map(str, df.columns)).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _load_manifest(store):
+    """读取增量合并清单，不存在时返回空清单"""
+    path = os.path.join(store, MANIFEST_NAME)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'industry': {}, 'sources': {}}
+
+
+def _save_manifest(store, manifest):
+    """原子写入增量合并清单"""
+    path = os.path.join(store, MANIFEST_NAME)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _partition_path(store, year, source):
+    """(年份, 源文件) 分区在存储目录中的文件路径"""
+    stem = os.path.splitext(os.path.basename(source))[0]
+    tag = hashlib.blake2b(source.encode('utf-8'), digest_size=4).hexdigest()
+    return os.path.join(store, str(year), f'{stem}-{tag}.parquet')
+
+
+def _remove_partition(store, year, source):
+    """删除一个分区文件"""
+    path = _partition_path(store, year, source)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def merge_excel_files_incremental(inputs=None, industry_file=None, store=None):
+    """增量合并：只重新合并新增或内容发生变化的 (年份, 源文件) 分区
+
+    清单中记录每个源文件及每个分区的内容哈希，以及行业表每个年份的哈希；
+    源文件和对应年份的行业信息均未变化的分区直接跳过。成功时返回True，出错时打印错误信息并返回False。
+    """
+    inputs = [os.path.abspath(p) for p in (inputs or [excel_file1])]
+    industry_file = industry_file or excel_file2
+    store = store or store_dir
+    try:
+        print("开始执行增量数据合并任务...")
+        start_time = time.perf_counter()
+        os.makedirs(store, exist_ok=True)
+        manifest = _load_manifest(store)
+
+        # 行业表：文件未变化时直接复用清单中记录的各年份哈希
+        industry_hash = hash_file(industry_file)
+        industry_state = manifest.get('industry', {})
+        industry_table = None
+        if industry_state.get('file_hash') == industry_hash:
+            industry_year_hashes = industry_state['year_hashes']
+            print("✓ 行业表未变化，跳过读取")
+        else:
+            industry_table, duplicate_count = prepare_industry_table(read_source(industry_file))
+            print(f"✓ 成功读取行业表：{industry_table.shape[0]}行")
+            if duplicate_count > 0:
+                print(f"⚠ 注意：行业表中存在{duplicate_count}个重复的股票代码和年份组合，将保留第一个匹配项")
+            industry_year_hashes = {
+                str(year): _frame_hash(group) for year, group in industry_table.groupby('年份', sort=True)
+            }
+            manifest['industry'] = {'file_hash': industry_hash, 'year_hashes': industry_year_hashes}
+
+        sources = manifest.setdefault('sources', {})
+        merged_count = skipped_count = removed_count = 0
+
+        for source in inputs:
+            file_hash = hash_file(source)
+            state = sources.get(source, {'file_hash': None, 'partitions': {}})
+            partitions = state['partitions']
+
+            # 源文件未变化，且其所有年份的行业信息也未变化时整个文件跳过
+            if state['file_hash'] == file_hash and all(
+                info['industry_hash'] == industry_year_hashes.get(year)
+                for year, info in partitions.items()
+            ):
+                skipped_count += len(partitions)
+                continue
+
+            df1 = read_source(source)
+            print(f"✓ 读取 {os.path.basename(source)}：{df1.shape[0]}行")
+            # 年份统一为整数后再分区：年份列有空单元格时pandas读为浮点数，分区键须与行业表的'2020'一致
+            years = normalize_years(df1['年份'])
+            missing_years = int(years.isna().sum())
+            if missing_years:
+                print(f"⚠ 注意：{os.path.basename(source)}中有{missing_years}条记录的年份缺失或无法解析，未写入分区存储")
+            new_partitions = {}
+            for year, part in df1.groupby(years, sort=True):
+                year = str(year)
+                part_hash = _frame_hash(part)
+                year_industry_hash = industry_year_hashes.get(year)
+                previous = partitions.get(year)
+                new_partitions[year] = {'hash': part_hash, 'industry_hash': year_industry_hash}
+                if (previous and previous['hash'] == part_hash
+                        and previous['industry_hash'] == year_industry_hash
+                        and os.path.exists(_partition_path(store, year, source))):
+                    skipped_count += 1
+                    continue
+
+                if industry_table is None:
+                    industry_table, _ = prepare_industry_table(read_source(industry_file))
+                year_industry = industry_table[industry_table['年份'].astype(str) == year]
+                merged = attach_industry(part, year_industry)
+
+                target = _partition_path(store, year, source)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                _coerce_for_arrow(merged).to_parquet(target, index=False, compression=PARQUET_COMPRESSION)
+                merged_count += 1
+                matched = merged['行业代码'].notna().sum()
+                print(f"  ✓ 已合并分区 {year} / {os.path.basename(source)}："
+                      f"{len(merged)}行，匹配{matched}行（{matched / len(merged) * 100 if len(merged) else 0:.2f}%）")
+
+            # 源文件中已不存在的年份分区
+            for year in set(partitions) - set(new_partitions):
+                _remove_partition(store, year, source)
+                removed_count += 1
+
+            sources[source] = {'file_hash': file_hash, 'partitions': new_partitions}
+            _save_manifest(store, manifest)
+
+        # 不再出现在输入中的源文件
+        for source in set(sources) - set(inputs):
+            for year in sources[source]['partitions']:
+                _remove_partition(store, year, source)
+                removed_count += 1
+            del sources[source]
+
+        _save_manifest(store, manifest)
+
+        print("\n增量合并结果：")
+        print(f"✓ 重新合并的分区数：{merged_count}")
+        print(f"✓ 未变化而跳过的分区数：{skipped_count}")
+        print(f"✓ 删除的分区数：{removed_count}")
+        print(f"✓ 分区存储目录：{store}")
+        print(f"✓ 耗时：{time.perf_counter() - start_time:.2f}秒")
+        print("\n✅ 增量数据合并任务完成！")
+        return True
+
+    except Exception as e:
+        print(f"\n❌ 发生错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def load_partitioned_store(store=None):
+    """读取增量合并生成的分区存储，拼接为一张表（按年份排序）"""
+    store = store or store_dir
+    manifest = _load_manifest(store)
+    frames = [
+        pd.read_parquet(_partition_path(store, year, source))
+        for source, state in manifest.get('sources', {}).items()
+        for year in state['partitions']
+    ]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True).sort_values('年份', kind='stable', ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合并数字化转型指数与上市公司行业代码数据")
+    parser.add_argument('--input', default=excel_file1,
+                        help="数字化转型指数数据文件（.xlsx/.parquet/.feather/.csv，可先用ingest.py合并多个文件；"
+                             "增量模式下支持通配符和目录）")
+    parser.add_argument('--industry', default=excel_file2,
+                        help="上市公司年度行业代码数据文件（.xlsx/.parquet/.feather/.csv）")
+    parser.add_argument('--output', action='append', default=None,
+                        help="合并结果输出文件，可重复指定以同时输出多种格式：.xlsx/.parquet（zstd）/.feather/.csv，"
+                             "无扩展名时为按年份分区的Parquet目录（流式合并只支持.xlsx）")
+    parser.add_argument('--stream', action='store_true', help="使用流式合并模式（适用于超大文件）")
+    parser.add_argument('--incremental', action='store_true', help="使用增量合并模式，只合并新增或变化的年份分区")
+    parser.add_argument('--store', default=store_dir, help="增量合并的分区存储目录")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="流式合并时每批读取的行数")
+    args = parser.parse_args()
+    outputs = args.output or [output_file]
+    try:
+        formats = [output_format(path) for path in outputs]
+    except ValueError as e:
+        parser.error(str(e))
+    if args.stream and (len(outputs) > 1 or formats[0] != 'xlsx'):
+        parser.error("流式合并只支持输出一个.xlsx文件")
+
+    if args.incremental:
+        ok = merge_excel_files_incremental(expand_inputs([args.input]), args.industry, args.store)
+    elif args.stream:
+        ok = merge_excel_files_streaming(args.input, args.industry, outputs[0], chunk_size=args.chunk_size)
+    else:
+        ok = merge_excel_files(args.input, args.industry, outputs)
+    sys.exit(0 if ok else 1)
+
 
 if __name__ == "__main__":
-    merge_excel_files()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+面板数据索引
+
+加载数据后一次性按（股票代码, 年份）排序建立索引，之后按股票代码、
+（股票代码, 年份）或企业名称查询时不再需要对整张表做布尔筛选，
+单次查询的开销与企业数量无关。
+"""
+import numpy as np
+import pandas as pd
+
+
+class PanelIndex:
+    """股票代码 → 连续行切片，(股票代码, 年份) → 行，企业名称 → 股票代码"""
+
+    def __init__(self, df, code_col='股票代码', year_col='年份', name_col='企业名称'):
+        self.code_col = code_col
+        self.year_col = year_col
+        self.name_col = name_col if name_col in df.columns else None
+
+        # 按股票代码、年份稳定排序，使同一企业的数据在内存中连续存放
+        self.df = df.dropna(subset=[code_col]).sort_values(
+            [code_col, year_col], kind='stable'
+        ).reset_index(drop=True)
+        self._arrays = {}
+
+        codes = self.df[code_col].to_numpy()
+        self._years = self.df[year_col].to_numpy()
+
+        # 股票代码发生变化的位置即为各企业数据块的边界
+        if len(codes):
+            bounds = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+            starts = np.concatenate(([0], bounds))
+            ends = np.concatenate((bounds, [len(codes)]))
+        else:
+            starts = ends = np.array([], dtype=np.int64)
+        self._slices = {
+            code: (int(start), int(end))
+            for code, start, end in zip(codes[starts], starts, ends)
+        }
+        self._codes = list(self._slices)
+
+        # 企业名称与股票代码的双向映射（重名时保留第一个）
+        self._name_to_code = {}
+        self._code_to_name = {}
+        if self.name_col:
+            names = self.df[self.name_col].to_numpy()
+            for code, start in zip(codes[starts], starts):
+                name = names[start]
+                self._code_to_name[code] = name
+                if not pd.isna(name):
+                    self._name_to_code.setdefault(name, code)
+        self._names = sorted(self._name_to_code)
+
+    def __contains__(self, code):
+        return code in self._slices
+
+    def __len__(self):
+        return len(self._codes)
+
+    def codes(self):
+        """所有股票代码（已排序）"""
+        return self._codes
+
+    def names(self):
+        """所有企业名称（已排序）"""
+        return self._names
+
+    def bounds(self, code):
+        """某企业数据块的 (起始行, 结束行)，未找到时返回None"""
+        return self._slices.get(code)
+
+    def values(self, col):
+        """某列的numpy数组（与排序后的df行号对应，按列缓存）"""
+        if col not in self._arrays:
+            self._arrays[col] = self.df[col].to_numpy()
+        return self._arrays[col]
+
+    def company(self, code):
+        """获取某企业的全部数据（按年份排序），未找到时返回空表"""
+        bounds = self._slices.get(code)
+        if bounds is None:
+            return self.df.iloc[0:0]
+        return self.df.iloc[bounds[0]:bounds[1]]
+
+    def years(self, code):
+        """获取某企业有数据的年份列表"""
+        bounds = self._slices.get(code)
+        if bounds is None:
+            return []
+        return pd.unique(self._years[bounds[0]:bounds[1]]).tolist()
+
+    def row_position(self, code, year):
+        """(股票代码, 年份) 对应的行号，未找到时返回None"""
+        bounds = self._slices.get(code)
+        if bounds is None:
+            return None
+        start, end = bounds
+        pos = start + int(np.searchsorted(self._years[start:end], year))
+        if pos < end and self._years[pos] == year:
+            return pos
+        return None
+
+    def row(self, code, year):
+        """获取某企业某年的数据（单行DataFrame），未找到时返回空表"""
+        pos = self.row_position(code, year)
+        if pos is None:
+            return self.df.iloc[0:0]
+        return self.df.iloc[pos:pos + 1]
+
+    def code_for_name(self, name):
+        """根据企业名称查找股票代码"""
+        return self._name_to_code.get(name)
+
+    def name_for_code(self, code):
+        """根据股票代码查找企业名称"""
+        return self._code_to_name.get(code)
+
+    def company_by_name(self, name):
+        """根据企业名称获取企业的全部数据"""
+        code = self.code_for_name(name)
+        if code is None:
+            return self.df.iloc[0:0]
+        return self.company(code)
@@ -0,0 +1,286 @@
+"""
+磁盘列式面板存储（DuckDB）
+
+面板数据超出单个工作进程的内存时使用（如按月、含数十个分项指标的数据）：首次加载时将源文件
+转换为按股票代码、年份排序的Parquet文件（zstd压缩，按数据版本缓存，与Arrow缓存同目录），
+之后的查询由嵌入式DuckDB直接扫描该文件。股票代码、年份区间、行业等筛选条件和分组聚合
+都下推到DuckDB执行（按列读取，并利用行组统计信息跳过无关数据），只把界面需要的小结果表
+取回pandas。企业列表（股票代码、名称、行业）较小，常驻内存。企业-年份分析指标（增长率、
+行业排名、百分位、Z分数）同样由DuckDB的窗口函数在磁盘上计算，按数据版本保存为Parquet文件。
+
+CSV和Parquet源文件由DuckDB直接流式转换；Excel和Feather源文件需要先由pandas整体读入内存一次。
+"""
+import os
+import threading
+
+import data_store
+
+try:
+    import duckdb
+except ImportError:  # 未安装duckdb时只能使用内存中的DataFrame
+    duckdb = None
+
+# Parquet行组大小（行组越小，按股票代码筛选时跳过的数据越多）
+ROW_GROUP_SIZE = 100_000
+
+CODE_COLUMN = data_store.CODE_COLUMN
+YEAR_COLUMN = data_store.YEAR_COLUMN
+VALUE_COLUMN = '数字化转型指数'
+NAME_COLUMN = '企业名称'
+INDUSTRY_COLUMN = '行业代码'
+INDUSTRY_NAME_COLUMN = '行业名称'
+
+
+def _ident(name):
+    """SQL标识符（列名可能为中文或包含空格）"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _literal(text):
+    """SQL字符串字面量（用于不支持参数绑定的文件路径）"""
+    return "'" + str(text).replace("'", "''") + "'"
+
+
+def build_parquet(path, target):
+    """将源文件转换为按股票代码、年份排序的Parquet文件（先写临时文件再替换）"""
+    con = duckdb.connect()
+    try:
+        ext = os.path.splitext(path)[1].lower()
+        if ext == '.parquet':
+            source = f'read_parquet({_literal(path)})'
+        elif ext in ('.csv', '.txt'):
+            source = f'read_csv_auto({_literal(path)})'
+        else:
+            # Excel、Feather只能整体读取；股票代码、年份等转换为紧凑类型后再写入
+            df = data_store._coerce_for_arrow(data_store.compact_panel(data_store.read_source(path)))
+            con.register('source_frame', df)
+            source = 'source_frame'
+
+        tmp = f'{target}.{os.getpid()}.tmp'
+        con.execute(
+            f'COPY (SELECT * FROM {source} ORDER BY {_ident(CODE_COLUMN)}, {_ident(YEAR_COLUMN)}) '
+            f'TO {_literal(tmp)} (FORMAT parquet, COMPRESSION zstd, ROW_GROUP_SIZE {ROW_GROUP_SIZE})'
+        )
+        os.replace(tmp, target)
+    finally:
+        con.close()
+
+
+class _StoreIndex:
+    """与PanelIndex相同的按企业查询接口，数据按需从磁盘读取"""
+
+    def __init__(self, store):
+        self._store = store
+        self.code_col = CODE_COLUMN
+        self.year_col = YEAR_COLUMN
+
+    def __contains__(self, code):
+        return code in self._store._names
+
+    def __len__(self):
+        return len(self._store._codes)
+
+    def codes(self):
+        """所有股票代码（已排序）"""
+        return self._store._codes
+
+    def name_for_code(self, code):
+        """根据股票代码查找企业名称"""
+        return self._store._names.get(code)
+
+    def company(self, code):
+        """获取某企业的全部数据（按年份排序），未找到时返回空表"""
+        return self._store.query(codes=[code])
+
+    def years(self, code):
+        """获取某企业有数据的年份列表"""
+        return self._store.query(codes=[code], columns=[YEAR_COLUMN])[YEAR_COLUMN].tolist()
+
+
+class _StoreAnalytics:
+    """与firm_analytics.FirmAnalytics相同的查询接口，指标按企业从磁盘读取"""
+
+    def __init__(self, store):
+        self._store = store
+        self.code_col = CODE_COLUMN
+        self.year_col = YEAR_COLUMN
+
+    def __contains__(self, code):
+        return code in self._store.index
+
+    def firm(self, code, start_year=None, end_year=None):
+        """获取企业在年份区间内的各年指标（按年份排序）"""
+        return self._store.query(codes=[code], start_year=start_year, end_year=end_year, table='analytics')
+
+    def row(self, code, year):
+        """获取企业某年的指标（单行DataFrame），未找到时返回空表"""
+        return self.firm(code, year, year)
+
+
+class PanelStore:
+    """DuckDB面板存储：筛选和聚合在磁盘上的Parquet文件中执行，只返回结果表"""
+
+    def __init__(self, path, memory_limit=None, threads=None, version=None):
+        """path为数据文件（存在同名的Parquet/Feather文件时从该文件转换，见data_store.resolve_source）；memory_limit（如'2GB'）和threads限制DuckDB的资源占用
+
+        version为数据版本（见data_store.load_panel），省略时使用源文件的当前版本。
+        """
+        if duckdb is None:
+            raise ImportError("使用磁盘列式存储需要安装duckdb：pip install duckdb")
+        self.path = path
+        source = data_store.resolve_source(path)
+        self.data_version = version if version is not None else data_store.file_version(source)
+        os.makedirs(data_store.CACHE_DIR, exist_ok=True)
+        self.parquet_path = data_store.cache_path(path, self.data_version, suffix='parquet')
+        if not os.path.exists(self.parquet_path):
+            current = data_store.file_version(source)
+            if current != self.data_version:
+                raise FileNotFoundError(f"数据版本 {self.data_version} 的Parquet文件已不存在，"
+                                        f"数据文件 {source} 已更新为版本 {current}")
+            build_parquet(source, self.parquet_path)
+            data_store._remove_stale_caches(path, self.data_version)
+
+        self._con = duckdb.connect()
+        if memory_limit:
+            self._con.execute(f'SET memory_limit = {_literal(memory_limit)}')
+        if threads:
+            self._con.execute(f'SET threads = {int(threads)}')
+        self._con.execute(f'CREATE VIEW panel AS SELECT * FROM read_parquet({_literal(self.parquet_path)})')
+        self._lock = threading.Lock()
+
+        self.columns = self.sql('DESCRIBE panel')['column_name'].tolist()
+        self._rows = int(self.sql('SELECT count(*) AS n FROM panel')['n'].iloc[0])
+
+        # 企业列表常驻内存：名称取企业第一年的记录（与PanelIndex一致）
+        name = f'arg_min({_ident(NAME_COLUMN)}, {_ident(YEAR_COLUMN)})' if NAME_COLUMN in self.columns else 'NULL'
+        firms = self.sql(
+            f'SELECT {_ident(CODE_COLUMN)} AS code, {name} AS name FROM panel '
+            f'WHERE {_ident(CODE_COLUMN)} IS NOT NULL GROUP BY 1 ORDER BY 1'
+        )
+        self._codes = firms['code'].tolist()
+        self._names = dict(zip(self._codes, firms['name'].tolist()))
+        self.index = _StoreIndex(self)
+
+    def __len__(self):
+        """总记录数"""
+        return self._rows
+
+    def sql(self, query, params=None):
+        """执行SQL（表名为panel），返回DataFrame
+
+        同一连接不能被多个线程同时使用，每次查询使用独立的游标。
+        """
+        with self._lock:
+            cursor = self._con.cursor()
+        try:
+            return cursor.execute(query, params or []).df()
+        finally:
+            cursor.close()
+
+    def _where(self, codes=None, start_year=None, end_year=None, industry=None):
+        """筛选条件子句和参数"""
+        clauses, params = [], []
+        if codes is not None:
+            codes = list(codes)
+            if not codes:
+                clauses.append('FALSE')
+            else:
+                clauses.append(f'{_ident(CODE_COLUMN)} IN ({", ".join("?" * len(codes))})')
+                params.extend(code.item() if hasattr(code, 'item') else code for code in codes)
+        if start_year is not None:
+            clauses.append(f'{_ident(YEAR_COLUMN)} >= ?')
+            params.append(int(start_year))
+        if end_year is not None:
+            clauses.append(f'{_ident(YEAR_COLUMN)} <= ?')
+            params.append(int(end_year))
+        if industry is not None:
+            clauses.append(f'{_ident(INDUSTRY_COLUMN)} = ?')
+            params.append(str(industry))
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def query(self, codes=None, start_year=None, end_year=None, industry=None, columns=None, table='panel'):
+        """按股票代码、年份区间和行业筛选，返回指定列（默认全部列），按股票代码、年份排序
+
+        table为panel（面板数据）或analytics（分析指标，须先调用firm_analytics）。
+        """
+        select = ', '.join(_ident(col) for col in columns) if columns else '*'
+        where, params = self._where(codes, start_year, end_year, industry)
+        return self.sql(
+            f'SELECT {select} FROM {table}{where} ORDER BY {_ident(CODE_COLUMN)}, {_ident(YEAR_COLUMN)}',
+            params
+        )
+
+    def head(self, n=5):
+        return self.sql(f'SELECT * FROM panel LIMIT {int(n)}')
+
+    def year_range(self):
+        """(最早年份, 最晚年份)"""
+        row = self.sql(f'SELECT min({_ident(YEAR_COLUMN)}) AS lo, max({_ident(YEAR_COLUMN)}) AS hi FROM panel')
+        return int(row['lo'].iloc[0]), int(row['hi'].iloc[0])
+
+    def companies(self):
+        """企业基本信息（股票代码、企业名称、行业代码、行业名称的不重复组合）"""
+        cols = [col for col in (CODE_COLUMN, NAME_COLUMN, INDUSTRY_COLUMN, INDUSTRY_NAME_COLUMN)
+                if col in self.columns]
+        select = ', '.join(_ident(col) for col in cols)
+        return self.sql(f'SELECT DISTINCT {select} FROM panel ORDER BY {_ident(CODE_COLUMN)}')
+
+    def industry_cube(self, value_col=VALUE_COLUMN):
+        """行业 × 年份汇总统计量，列与industry_cube.build_industry_cube一致"""
+        value = f'CAST({_ident(value_col)} AS DOUBLE)'
+        industry, year = _ident(INDUSTRY_COLUMN), _ident(YEAR_COLUMN)
+        cube = self.sql(
+            f'SELECT {industry}, CAST({year} AS BIGINT) AS {year}, '
+            f'avg({value}) AS "平均值", median({value}) AS "中位数", count({value}) AS "企业数", '
+            f'stddev_samp({value}) AS "标准差", quantile_cont({value}, 0.25) AS "下四分位数", '
+            f'quantile_cont({value}, 0.75) AS "上四分位数" '
+            f'FROM panel WHERE {industry} IS NOT NULL AND {year} IS NOT NULL AND {_ident(value_col)} IS NOT NULL '
+            f'GROUP BY 1, 2 ORDER BY 1, 2'
+        )
+        return cube
+
+    def firm_analytics(self, value_col=VALUE_COLUMN):
+        """企业-年份分析指标，列与firm_analytics.build_firm_analytics一致
+
+        由DuckDB窗口函数计算（同比增长率用lag，复合年均增长率用first_value，行业排名用rank，
+        行业百分位用cume_dist，即行业内指数不高于该企业的占比），结果按数据版本保存为Parquet
+        文件，之后按企业读取，整张指标表不进入内存。
+        """
+        target = data_store.cache_path(self.path, self.data_version, suffix='analytics.parquet')
+        if not os.path.exists(target):
+            code, year, industry = _ident(CODE_COLUMN), _ident(YEAR_COLUMN), _ident(INDUSTRY_COLUMN)
+            value = f'CAST({_ident(value_col)} AS DOUBLE)'
+            first_value = f'first_value({value}) OVER firm'
+            span = f'({year} - first_value({year}) OVER firm)'
+            select = [
+                f'{code}', f'{year}', f'{value} AS {_ident(value_col)}',
+                f'({value} / NULLIF(lag({value}) OVER firm, 0) - 1) * 100 AS "同比增长率"',
+                f'CASE WHEN {span} > 0 AND {first_value} > 0 '
+                f'THEN (pow({value} / {first_value}, 1.0 / {span}) - 1) * 100 END AS "复合年均增长率"',
+            ]
+            if INDUSTRY_COLUMN in self.columns:
+                select += [
+                    f'{industry}',
+                    f'CASE WHEN {industry} IS NOT NULL THEN CAST(rank() OVER (PARTITION BY {industry}, {year} '
+                    f'ORDER BY {value} DESC) AS INTEGER) END AS "行业排名"',
+                    f'CASE WHEN {industry} IS NOT NULL THEN CAST(count({value}) OVER peers AS INTEGER) END AS "行业企业数"',
+                    f'CASE WHEN {industry} IS NOT NULL THEN cume_dist() OVER (PARTITION BY {industry}, {year} '
+                    f'ORDER BY {value}) * 100 END AS "行业百分位"',
+                    f'CASE WHEN {industry} IS NOT NULL THEN ({value} - avg({value}) OVER peers) '
+                    f'/ NULLIF(stddev_samp({value}) OVER peers, 0) END AS "行业Z分数"',
+                ]
+                peers = f', peers AS (PARTITION BY {industry}, {year})'
+            else:
+                select += [f'CAST(NULL AS DOUBLE) AS "{col}"' for col in ('行业排名', '行业企业数', '行业百分位', '行业Z分数')]
+                peers = ''
+            tmp = f'{target}.{os.getpid()}.tmp'
+            self.sql(
+                f'COPY (SELECT {", ".join(select)} FROM panel '
+                f'WHERE {code} IS NOT NULL AND {year} IS NOT NULL AND {_ident(value_col)} IS NOT NULL '
+                f'WINDOW firm AS (PARTITION BY {code} ORDER BY {year}){peers} ORDER BY {code}, {year}) '
+                f'TO {_literal(tmp)} (FORMAT parquet, COMPRESSION zstd, ROW_GROUP_SIZE {ROW_GROUP_SIZE})'
+            )
+            os.replace(tmp, target)
+        with self._lock:
+            self._con.execute(f'CREATE OR REPLACE VIEW analytics AS SELECT * FROM read_parquet({_literal(target)})')
+        return _StoreAnalytics(self)
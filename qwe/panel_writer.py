@@ -0,0 +1,129 @@
+"""
+面板数据输出
+
+按输出路径选择格式：
+    .parquet          Parquet（zstd压缩），各应用和DuckDB后端可直接读取
+    .feather/.arrow   Feather（Arrow IPC），读取最快
+    .csv              CSV（UTF-8 BOM，Excel可直接打开）
+    .xlsx             Excel，逐行流式写出（安装了xlsxwriter时使用其常量内存模式，否则使用openpyxl只写模式）
+    无扩展名的路径     按年份分区的Parquet目录（年份=2020/*.parquet），可由DuckDB、pyarrow等按分区读取
+
+所有格式都先写临时文件（目录）再替换，正在读取旧文件的应用不会读到半写入的数据。
+"""
+import os
+import shutil
+
+from openpyxl import Workbook
+
+from data_store import YEAR_COLUMN, _coerce_for_arrow
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 未安装pyarrow时只能输出CSV和Excel
+    pa = None
+
+try:
+    import xlsxwriter
+except ImportError:  # 未安装xlsxwriter时使用openpyxl只写模式
+    xlsxwriter = None
+
+# 输出格式及对应的扩展名
+OUTPUT_FORMATS = {
+    'parquet': ('.parquet',),
+    'feather': ('.feather', '.arrow', '.ipc'),
+    'csv': ('.csv',),
+    'xlsx': ('.xlsx', '.xlsm'),
+}
+
+# Parquet压缩算法和压缩级别
+PARQUET_COMPRESSION = 'zstd'
+PARQUET_COMPRESSION_LEVEL = 3
+
+
+def output_format(path):
+    """根据输出路径的扩展名确定输出格式，无扩展名时为按年份分区的目录"""
+    ext = os.path.splitext(path.rstrip('/\\'))[1].lower()
+    if not ext:
+        return 'partitioned'
+    for fmt, extensions in OUTPUT_FORMATS.items():
+        if ext in extensions:
+            return fmt
+    raise ValueError(f"不支持的输出格式: {ext}（支持{'、'.join(e for exts in OUTPUT_FORMATS.values() for e in exts)}或目录）")
+
+
+def _rows(df):
+    """逐行生成单元格值（缺失值为None，numpy标量转换为Python类型）"""
+    columns = [df[col].astype(object).where(df[col].notna(), None).tolist() for col in df.columns]
+    return zip(*columns)
+
+
+def write_xlsx(df, output):
+    """逐行流式写出Excel工作表，不在内存中构建单元格对象"""
+    header = [str(col) for col in df.columns]
+    if xlsxwriter is not None:
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+        worksheet = workbook.add_worksheet()
+        worksheet.write_row(0, 0, header)
+        for i, row in enumerate(_rows(df), start=1):
+            worksheet.write_row(i, 0, row)
+        workbook.close()
+    else:
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet()
+        worksheet.append(header)
+        for row in _rows(df):
+            worksheet.append(row)
+        workbook.save(output)
+
+
+def write_partitioned(df, output, partition_col=YEAR_COLUMN):
+    """按年份分区写出Parquet目录（Hive风格：年份=2020/part-0.parquet）"""
+    table = pa.Table.from_pandas(_coerce_for_arrow(df), preserve_index=False)
+    pq.write_to_dataset(table, output, partition_cols=[partition_col],
+                        basename_template='part-{i}.parquet',
+                        compression=PARQUET_COMPRESSION, compression_level=PARQUET_COMPRESSION_LEVEL)
+
+
+def _replace_dir(tmp, target):
+    """用新写好的目录替换旧目录"""
+    old = f'{target}.{os.getpid()}.old'
+    if os.path.exists(target):
+        os.replace(target, old)
+    os.replace(tmp, target)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def save_panel(df, output):
+    """按输出路径的格式保存面板数据（先写临时文件再替换），返回输出格式"""
+    fmt = output_format(output)
+    if fmt in ('parquet', 'feather', 'partitioned') and pa is None:
+        raise ImportError(f"输出{fmt}格式需要安装pyarrow：pip install pyarrow")
+
+    output = output.rstrip('/\\')
+    parent = os.path.dirname(os.path.abspath(output))
+    os.makedirs(parent, exist_ok=True)
+    stem, ext = os.path.splitext(output)
+    tmp = f'{stem}.{os.getpid()}.tmp{ext}'
+    try:
+        if fmt == 'parquet':
+            _coerce_for_arrow(df).to_parquet(tmp, index=False, compression=PARQUET_COMPRESSION,
+                                             compression_level=PARQUET_COMPRESSION_LEVEL)
+        elif fmt == 'feather':
+            _coerce_for_arrow(df).reset_index(drop=True).to_feather(tmp)
+        elif fmt == 'csv':
+            df.to_csv(tmp, index=False, encoding='utf-8-sig')
+        elif fmt == 'xlsx':
+            write_xlsx(df, tmp)
+        else:
+            write_partitioned(df, tmp)
+            _replace_dir(tmp, output)
+            return fmt
+        os.replace(tmp, output)
+    except BaseException:
+        if os.path.isdir(tmp):
+            shutil.rmtree(tmp, ignore_errors=True)
+        elif os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return fmt
@@ -0,0 +1,196 @@
+"""
+面板数据查询HTTP接口
+
+基于asyncio的轻量HTTP服务（仅使用标准库），从内存中的查询引擎返回结果，
+一次请求可批量查询多家企业的指数序列和行业平均指数，支持HTTP keep-alive。
+
+接口：
+    GET  /health   服务状态和数据版本
+    POST /query    批量查询，请求体示例：
+        {"requests": [{"stock_code": "600000", "start_year": 2015, "end_year": 2020},
+                      {"stock_code": "000001.SZ"}],
+         "include_industry": true}
+
+用法示例：
+    python query_api.py --data 数字化转型指数合并数据_带行业信息.xlsx --port 8600
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from query_engine import QueryEngine
+
+# 单个批量请求允许的最大查询数
+MAX_BATCH_SIZE = 10000
+
+# 请求体大小上限（字节）
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+_STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+logger = logging.getLogger(__name__)
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def request_error(req):
+    """检查单个查询的参数类型，有误时返回错误信息，否则返回None"""
+    code = req.get('stock_code', req.get('name'))
+    if code is None:
+        return '缺少stock_code'
+    if not isinstance(code, str) and not _is_int(code):
+        return 'stock_code必须为字符串或整数'
+    for key in ('start_year', 'end_year'):
+        if req.get(key) is not None and not _is_int(req[key]):
+            return f'{key}必须为整数'
+    if not isinstance(req.get('include_industry', True), bool):
+        return 'include_industry必须为布尔值'
+    return None
+
+
+class QueryServer:
+    """批量查询HTTP服务"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.started_at = time.time()
+        self.request_count = 0
+        self.lookup_count = 0
+
+    def handle(self, method, path, body):
+        """处理一个请求，返回 (状态码, 响应对象)"""
+        if path == '/health':
+            return 200, {
+                'status': 'ok',
+                'data_version': self.engine.data_version,
+                'firms': len(self.engine.index),
+                'requests': self.request_count,
+                'lookups': self.lookup_count,
+                'uptime_seconds': round(time.time() - self.started_at, 1),
+            }
+        if path != '/query':
+            return 404, {'error': '接口不存在'}
+        if method != 'POST':
+            return 405, {'error': '请使用POST方法'}
+
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            return 400, {'error': '请求体不是有效的JSON'}
+        requests = payload.get('requests') if isinstance(payload, dict) else None
+        if not isinstance(requests, list) or not all(isinstance(r, dict) for r in requests):
+            return 400, {'error': 'requests必须为对象数组'}
+        if len(requests) > MAX_BATCH_SIZE:
+            return 413, {'error': f'单次最多查询{MAX_BATCH_SIZE}条'}
+        include_industry = payload.get('include_industry', True)
+        if not isinstance(include_industry, bool):
+            return 400, {'error': 'include_industry必须为布尔值'}
+
+        # 参数类型有误的查询单独返回错误，不影响同一批次的其他查询
+        start = time.perf_counter()
+        errors = [request_error(req) for req in requests]
+        found = iter(self.engine.batch([req for req, error in zip(requests, errors) if error is None],
+                                       include_industry=include_industry))
+        results = [
+            next(found) if error is None else {'query': req.get('stock_code', req.get('name')), 'error': error}
+            for req, error in zip(requests, errors)
+        ]
+        self.lookup_count += len(requests)
+        return 200, {
+            'data_version': self.engine.data_version,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 3),
+            'results': results,
+        }
+
+    async def serve_connection(self, reader, writer):
+        """处理一个连接上的请求（支持keep-alive）"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'error': '无效的请求行'}, keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    await self._respond(writer, 400, {'error': '无效的Content-Length'}, keep_alive=False)
+                    break
+                if length > MAX_BODY_SIZE:
+                    await self._respond(writer, 413, {'error': '请求体过大'}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                self.request_count += 1
+                try:
+                    status, response = self.handle(method.upper(), target.split('?', 1)[0], body)
+                except Exception:
+                    logger.exception("处理请求 %s %s 时出错", method, target)
+                    status, response = 500, {'error': '服务器内部错误'}
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+                await self._respond(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, response, keep_alive):
+        data = json.dumps(response, ensure_ascii=False).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + data)
+        await writer.drain()
+
+
+async def serve(engine, host='127.0.0.1', port=8600):
+    """启动查询服务并一直运行"""
+    server = QueryServer(engine)
+    listener = await asyncio.start_server(server.serve_connection, host, port)
+    print(f"✓ 查询服务已启动：http://{host}:{port}/query")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="企业数字化转型指数批量查询HTTP服务")
+    parser.add_argument('--data', default='数字化转型指数合并数据_带行业信息.xlsx', help="数据文件")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址")
+    parser.add_argument('--port', type=int, default=8600, help="监听端口")
+    args = parser.parse_args()
+
+    print("正在加载数据...")
+    engine = QueryEngine.from_file(args.data)
+    print(f"✓ 数据加载成功！共 {len(engine.index)} 家企业")
+    try:
+        asyncio.run(serve(engine, args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n✅ 查询服务已停止")
+
+
+if __name__ == "__main__":
+    main()
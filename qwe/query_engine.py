@@ -0,0 +1,202 @@
+"""
+面板数据查询引擎
+
+将行业对比应用中的查询逻辑（按股票代码/企业名称查找企业、同行业判断、行业平均指数）
+提取为不依赖Streamlit的模块，供Web应用、HTTP接口和批处理任务共同使用。
+"""
+import numpy as np
+import pandas as pd
+
+from data_store import current_version, format_code, load_panel
+from industry_cube import IndustryCube, build_industry_cube, load_industry_cube
+from panel_index import PanelIndex
+from stock_codes import parse_code
+
+
+def _to_python(value):
+    """将numpy标量转换为可JSON序列化的Python对象（缺失值转换为None）"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+
+class QueryEngine:
+    """基于面板索引和行业汇总立方体的查询引擎，所有查询均不扫描整张表"""
+
+    def __init__(self, df, cube=None, data_version=None):
+        self.index = PanelIndex(df)
+        self.cube = cube if cube is not None else IndustryCube(build_industry_cube(df))
+        self.data_version = data_version
+        self._industry = self._build_industry_map()
+        self._members = {}
+        for code, (industry_code, _) in self._industry.items():
+            self._members.setdefault(industry_code, []).append(code)
+
+    def _build_industry_map(self):
+        """一次性确定每家企业的行业（取第一个有行业信息的年份）"""
+        df = self.index.df
+        if '行业代码' not in df.columns:
+            return {}
+        first = df.dropna(subset=['行业代码']).drop_duplicates(self.index.code_col)
+        names = first['行业名称'] if '行业名称' in first.columns else pd.Series(None, index=first.index)
+        return {
+            code: (industry_code, name.strip() if isinstance(name, str) else name)
+            for code, industry_code, name in zip(
+                first[self.index.code_col].to_numpy(), first['行业代码'].to_numpy(), names.to_numpy()
+            )
+        }
+
+    @classmethod
+    def from_file(cls, path):
+        """从数据文件（经由Arrow缓存）创建查询引擎"""
+        df = load_panel(path, compact=True)
+        return cls(df, load_industry_cube(path, df), data_version=current_version(path))
+
+    @property
+    def df(self):
+        return self.index.df
+
+    def resolve_code(self, query):
+        """将股票代码（600000、'000001'、'600000.SH'等）或企业名称解析为索引中的股票代码"""
+        if query is None:
+            return None
+        if query in self.index:
+            return query
+        text = str(query).strip()
+        if text in self.index:
+            return text
+        code, _ = parse_code(text)
+        if code is not None and code in self.index:
+            return code
+        return self.index.code_for_name(text)
+
+    def company(self, code, start_year=None, end_year=None):
+        """获取企业在年份区间内的数据（按年份排序）"""
+        data = self.index.company(code)
+        if start_year is not None:
+            data = data[data['年份'] >= start_year]
+        if end_year is not None:
+            data = data[data['年份'] <= end_year]
+        return data
+
+    def company_by_name(self, name):
+        """根据企业名称获取企业的全部数据"""
+        return self.index.company_by_name(name)
+
+    def company_info(self, code):
+        """企业基本信息：企业名称、行业代码、行业名称（取第一个有行业信息的年份）"""
+        if code not in self.index:
+            return None
+        industry_code, industry_name = self._industry.get(code, (None, None))
+        return {
+            'stock_code': format_code(code),
+            'name': self.index.name_for_code(code),
+            'industry_code': industry_code,
+            'industry_name': industry_name,
+        }
+
+    def industry_of(self, code):
+        """企业所属行业代码"""
+        info = self.company_info(code)
+        return info['industry_code'] if info else None
+
+    def same_industry(self, code1, code2):
+        """判断两家企业是否属于同一行业"""
+        industry1 = self.industry_of(code1)
+        return industry1 is not None and not pd.isna(industry1) and industry1 == self.industry_of(code2)
+
+    def industry_members(self, industry_code):
+        """行业内全部企业的股票代码（已排序）"""
+        return list(self._members.get(industry_code, []))
+
+    def pivot(self, codes, start_year=None, end_year=None, value_col='数字化转型指数'):
+        """多家企业的 年份 × 企业 矩阵（列为股票代码，缺失为NaN）
+
+        直接拼接各企业在索引中的连续行切片，开销只与所选企业的行数有关。
+        """
+        year_col = self.index.year_col
+        selected = [(code, self.index.bounds(code)) for code in dict.fromkeys(codes)]
+        selected = [(code, bounds) for code, bounds in selected if bounds is not None]
+        if not selected:
+            return pd.DataFrame(index=pd.Index([], name=year_col, dtype='int64'))
+
+        positions = np.concatenate([np.arange(start, end) for _, (start, end) in selected])
+        columns = np.repeat(np.arange(len(selected)), [end - start for _, (start, end) in selected])
+        years = self.index.values(year_col)[positions]
+        values = self.index.values(value_col)[positions].astype('float64')
+
+        keep = np.ones(len(years), dtype=bool)
+        if start_year is not None:
+            keep &= years >= start_year
+        if end_year is not None:
+            keep &= years <= end_year
+        years, values, columns = years[keep], values[keep], columns[keep]
+
+        all_years = np.unique(years)
+        matrix = np.full((len(all_years), len(selected)), np.nan)
+        matrix[np.searchsorted(all_years, years), columns] = values
+        return pd.DataFrame(
+            matrix,
+            index=pd.Index(all_years.astype('int64'), name=year_col),
+            columns=[code for code, _ in selected]
+        )
+
+    def industry_average(self, industry_code, start_year=None, end_year=None):
+        """行业各年平均数字化转型指数，列为 年份、行业平均指数"""
+        data = self.cube.series(industry_code, start_year, end_year)[['年份', '平均值']]
+        return data.rename(columns={'平均值': '行业平均指数'})
+
+    @staticmethod
+    def _series(index, key, value_col, start_year, end_year):
+        """直接在numpy数组上截取 [start_year, end_year] 区间的 (年份, 值) 序列"""
+        bounds = index.bounds(key)
+        if bounds is None:
+            return []
+        years = index.values(index.year_col)[bounds[0]:bounds[1]]
+        values = index.values(value_col)[bounds[0]:bounds[1]]
+        lo = 0 if start_year is None else int(np.searchsorted(years, start_year, side='left'))
+        hi = len(years) if end_year is None else int(np.searchsorted(years, end_year, side='right'))
+        return [
+            {'year': year, 'index': None if value != value else value}
+            for year, value in zip(years[lo:hi].tolist(), values[lo:hi].tolist())
+        ]
+
+    def lookup(self, query, start_year=None, end_year=None, include_industry=True, industry_cache=None):
+        """单个查询，返回可JSON序列化的结果"""
+        code = self.resolve_code(query)
+        if code is None:
+            return {'query': query, 'error': '未找到该企业'}
+
+        info = self.company_info(code)
+        result = {key: _to_python(value) for key, value in info.items()}
+        result['query'] = query
+        result['series'] = self._series(self.index, code, '数字化转型指数', start_year, end_year)
+        if include_industry:
+            industry_code = result['industry_code']
+            key = (industry_code, start_year, end_year)
+            if industry_cache is not None and key in industry_cache:
+                result['industry_average'] = industry_cache[key]
+            else:
+                result['industry_average'] = self._series(
+                    self.cube.index, industry_code, '平均值', start_year, end_year
+                ) if industry_code is not None else []
+                if industry_cache is not None:
+                    industry_cache[key] = result['industry_average']
+        return result
+
+    def batch(self, requests, include_industry=True):
+        """批量查询，requests中每项为 {'stock_code': ..., 'start_year': ..., 'end_year': ...}
+
+        同一批次中相同行业、相同年份区间的行业平均只计算一次。
+        """
+        industry_cache = {}
+        return [
+            self.lookup(
+                req.get('stock_code', req.get('name')),
+                req.get('start_year'),
+                req.get('end_year'),
+                include_industry=req.get('include_industry', include_industry),
+                industry_cache=industry_cache,
+            )
+            for req in requests
+        ]
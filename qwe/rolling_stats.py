@@ -0,0 +1,149 @@
+"""
+滚动窗口统计
+
+在按（企业, 年份）排序的面板上一次性为全部企业计算最近window条记录的滚动均值、滚动波动率
+（样本标准差）和趋势斜率（对年份的最小二乘斜率，年份不连续时按实际年份计算），以及趋势转折点。
+滑动窗口由NumPy的strided视图构造（不复制数据），跨越两家企业的窗口直接标记为无效。
+同一套计算也用于行业平均指数序列（以行业代码代替股票代码）。结果按（窗口大小, 数据版本）由各应用缓存。
+面板不在内存中时（DuckDB后端）使用FirmRollingStats，每次只取出一家企业的记录按需计算。
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from panel_index import PanelIndex
+
+# 滚动统计列
+ROLLING_COLUMNS = ['滚动均值', '滚动波动率', '趋势斜率', '斜率变化', '转折点']
+
+# 可选的窗口大小（年）及默认值
+WINDOW_OPTIONS = (3, 5, 7)
+DEFAULT_WINDOW = 3
+
+# 转折点：前后两个窗口的趋势斜率之差至少为两者中较大斜率（绝对值）的该倍数
+BREAKPOINT_RATIO = 0.5
+
+
+def rolling_arrays(keys, years, values, window):
+    """在按 (键, 年份) 排序的数组上计算滚动统计量，返回 列名 → 数组 的字典
+
+    每条记录的滚动均值、滚动波动率和趋势斜率取以该记录结尾的window条记录，不足window条或
+    跨越两个键时为NaN。斜率变化为以该记录开头与结尾的两个窗口的斜率之差；转折点为斜率变化
+    是前后window-1条记录内的最大值、且相对变化不小于BREAKPOINT_RATIO的记录。
+    """
+    keys = np.asarray(keys)
+    years = np.asarray(years, dtype='float64')
+    values = np.asarray(values, dtype='float64')
+    n = len(values)
+    result = {col: np.full(n, np.nan) for col in ROLLING_COLUMNS[:4]}
+    result['转折点'] = np.zeros(n, dtype=bool)
+    if window < 2 or n < window:
+        return result
+
+    # 键发生变化的位置递增组号；窗口首尾组号相同即窗口完全落在同一个键内
+    group = np.concatenate(([0], np.cumsum(keys[1:] != keys[:-1])))
+    valid = group[window - 1:] == group[:n - window + 1]
+
+    x = sliding_window_view(years, window)
+    y = sliding_window_view(values, window)
+    mean = y.mean(axis=1)
+    xc = x - x.mean(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (xc * (y - mean[:, None])).sum(axis=1) / (xc * xc).sum(axis=1)
+    result['滚动均值'][window - 1:] = np.where(valid, mean, np.nan)
+    result['滚动波动率'][window - 1:] = np.where(valid, y.std(axis=1, ddof=1), np.nan)
+    result['趋势斜率'][window - 1:] = np.where(valid, slope, np.nan)
+
+    # 以该记录结尾的窗口（之前的趋势）与以该记录开头的窗口（之后的趋势）
+    before = result['趋势斜率']
+    after = np.full(n, np.nan)
+    after[:n - window + 1] = before[window - 1:]
+    change = after - before
+    result['斜率变化'] = change
+
+    strength = np.abs(change)
+    finite = np.isfinite(strength)
+    is_peak = finite & (strength > 0)
+    for k in range(1, window):
+        # 与同一键内前后k条记录比较；并列时只保留最早的一条
+        left = np.full(n, -np.inf)
+        left[k:] = np.where(finite[:-k] & (group[:-k] == group[k:]), strength[:-k], -np.inf)
+        right = np.full(n, -np.inf)
+        right[:-k] = np.where(finite[k:] & (group[k:] == group[:-k]), strength[k:], -np.inf)
+        is_peak &= (strength > left) & (strength >= right)
+    with np.errstate(invalid='ignore'):
+        scale = np.fmax(np.abs(before), np.abs(after))
+        result['转折点'] = is_peak & (strength >= BREAKPOINT_RATIO * scale)
+    return result
+
+
+def build_rolling_stats(df, window=DEFAULT_WINDOW, code_col='股票代码', year_col='年份',
+                        value_col='数字化转型指数'):
+    """一次计算所有企业（或行业）、所有年份的滚动统计量"""
+    data = df[[code_col, year_col, value_col]].dropna()
+    data = data.sort_values([code_col, year_col], kind='stable').reset_index(drop=True)
+    stats = rolling_arrays(data[code_col].to_numpy(), data[year_col].to_numpy(),
+                           data[value_col].to_numpy(), window)
+    result = data.assign(**{value_col: data[value_col].astype('float64')})
+    for col in ROLLING_COLUMNS:
+        result[col] = stats[col]
+    return result
+
+
+class RollingStats:
+    """滚动统计表：按股票代码（或行业代码）直接定位各年的滚动统计量"""
+
+    def __init__(self, table, window, code_col='股票代码', year_col='年份'):
+        self.window = window
+        self.code_col = code_col
+        self.year_col = year_col
+        self.index = PanelIndex(table, code_col=code_col, year_col=year_col, name_col=None)
+        self.df = self.index.df
+
+    @classmethod
+    def build(cls, df, window=DEFAULT_WINDOW, code_col='股票代码', year_col='年份',
+              value_col='数字化转型指数'):
+        return cls(build_rolling_stats(df, window, code_col, year_col, value_col), window,
+                   code_col=code_col, year_col=year_col)
+
+    def __contains__(self, code):
+        return code in self.index
+
+    def series(self, code, start_year=None, end_year=None):
+        """获取企业（或行业）在年份区间内的各年滚动统计量（按年份排序）"""
+        data = self.index.company(code)
+        if start_year is not None:
+            data = data[data[self.year_col] >= start_year]
+        if end_year is not None:
+            data = data[data[self.year_col] <= end_year]
+        return data
+
+    def latest(self, code, end_year=None):
+        """截至end_year最近一条有趋势斜率的记录，没有时返回None"""
+        data = self.series(code, end_year=end_year)
+        data = data[data['趋势斜率'].notna()]
+        return None if data.empty else data.iloc[-1]
+
+
+class FirmRollingStats(RollingStats):
+    """按需逐企业计算的滚动统计，接口与RollingStats一致
+
+    index为提供company(code)的面板索引（如PanelStore.index），每次查询只取出该企业的全部记录计算，
+    结果与在整张面板上计算的相同。
+    """
+
+    def __init__(self, index, window, value_col='数字化转型指数'):
+        self.window = window
+        self.code_col = index.code_col
+        self.year_col = index.year_col
+        self.value_col = value_col
+        self.index = index
+
+    def series(self, code, start_year=None, end_year=None):
+        """获取企业在年份区间内的各年滚动统计量（按年份排序）"""
+        data = build_rolling_stats(self.index.company(code), self.window, self.code_col, self.year_col,
+                                   self.value_col)
+        if start_year is not None:
+            data = data[data[self.year_col] >= start_year]
+        if end_year is not None:
+            data = data[data[self.year_col] <= end_year]
+        return data
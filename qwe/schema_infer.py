@@ -0,0 +1,91 @@
+"""
+列结构推断
+
+根据列名和抽样数据识别股票代码列、年份列和数字化转型指数列：
+优先匹配常见列名，未匹配时对抽样数据一次性计算每列作为各角色的得分并择优。
+"""
+import numpy as np
+import pandas as pd
+
+# 各角色的常见列名（按优先级排序）
+CODE_NAMES = ['股票代码', '证券代码', '代码', 'stock_code', 'code']
+YEAR_NAMES = ['年份', '年度', 'year', 'Year']
+INDEX_NAMES = ['数字化转型指数', '转型指数', '数字化指数', '指数', 'digital_index', 'index']
+
+ROLE_NAMES = {'code': CODE_NAMES, 'year': YEAR_NAMES, 'index': INDEX_NAMES}
+
+# 抽样行数
+SAMPLE_SIZE = 2000
+
+# 得分低于该阈值的列不会被选为对应角色
+MIN_SCORE = 0.3
+
+
+def sample_rows(df, sample_size=SAMPLE_SIZE):
+    """随机抽样（固定随机种子，保证同一数据的推断结果稳定）"""
+    if len(df) <= sample_size:
+        return df
+    return df.sample(sample_size, random_state=0)
+
+
+def score_columns(sample):
+    """计算每列分别作为股票代码、年份、指数列的得分（0~1）"""
+    if sample.empty:
+        return pd.DataFrame(0.0, index=sample.columns, columns=['code', 'year', 'index'])
+
+    numeric = sample.apply(pd.to_numeric, errors='coerce')
+    present = sample.notna()
+    n_present = present.sum().clip(lower=1)
+
+    numeric_rate = numeric.notna().sum() / n_present
+    is_integer = numeric == np.floor(numeric)
+    integer_rate = is_integer.sum() / n_present
+    year_rate = ((numeric >= 1900) & (numeric <= 2100)).sum() / n_present
+    code_range_rate = ((numeric >= 1) & (numeric <= 999999) & is_integer).sum() / n_present
+    unique_ratio = sample.nunique() / n_present
+
+    # 文本型代码（如600000.SH、SZ000001、AAPL）
+    text = sample.astype(str).where(present)
+    text_code_rate = text.apply(
+        lambda s: s.str.fullmatch(r'[A-Za-z]{0,4}\d{0,6}(\.[A-Za-z]{2})?[A-Za-z]{0,4}').sum()
+    ) / n_present
+
+    code_score = np.maximum(code_range_rate * (1 - year_rate), text_code_rate) * np.minimum(unique_ratio * 5, 1)
+    year_score = year_rate * integer_rate * (1 - unique_ratio)
+    index_score = numeric_rate * (1 - year_rate) * (0.5 + 0.5 * (1 - integer_rate))
+    # 整数型指数（如0~100的评分）同样可以作为指数列，只是优先级低于小数列
+    index_score = np.maximum(index_score, numeric_rate * (1 - year_rate) * (1 - unique_ratio) * 0.5)
+
+    return pd.DataFrame({'code': code_score, 'year': year_score, 'index': index_score}).fillna(0.0)
+
+
+def infer_schema(df, sample_size=SAMPLE_SIZE):
+    """推断列映射，返回 {'code': 列名或None, 'year': 列名或None, 'index': 列名或None}"""
+    mapping = {}
+    used = set()
+
+    # 第一步：按常见列名匹配
+    for role, names in ROLE_NAMES.items():
+        mapping[role] = next((name for name in names if name in df.columns and name not in used), None)
+        if mapping[role] is not None:
+            used.add(mapping[role])
+
+    # 第二步：对未匹配的角色按抽样得分择优（依次确定代码、年份、指数列）
+    missing = [role for role, col in mapping.items() if col is None]
+    if missing:
+        scores = score_columns(sample_rows(df, sample_size))
+        for role in missing:
+            candidates = scores.loc[~scores.index.isin(used), role]
+            if not candidates.empty and candidates.max() >= MIN_SCORE:
+                mapping[role] = candidates.idxmax()
+                used.add(mapping[role])
+    return mapping
+
+
+def apply_manual_mapping(inferred, manual, columns):
+    """手动映射优先：手动指定且仍存在于数据中的列覆盖推断结果"""
+    mapping = dict(inferred)
+    for role, col in (manual or {}).items():
+        if role in mapping and col in columns:
+            mapping[role] = col
+    return mapping
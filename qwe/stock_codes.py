@@ -0,0 +1,151 @@
+"""
+股票代码规范化
+
+不同来源的股票代码格式不一：整数（600000、1）、补零字符串（'000001'）、带交易所后缀或前缀
+（'600000.SH'、'SZ000001'）。这里统一解析为紧凑的整数代码和交易所编码，合并数据和各应用的
+查询都使用同一套规则。整数列直接使用（不经过字符串处理）；数字与文本混合的列先整体按数值
+转换，只有带交易所前后缀等无法直接转换的值才使用正则表达式解析；正则解析在安装了pyarrow时
+由Arrow计算内核批量执行。
+"""
+import enum
+import re
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # 未安装pyarrow时使用pandas的字符串方法
+    pa = None
+
+# 股票代码的最大值（6位数字）
+MAX_CODE = 999_999
+
+# 可选的交易所前缀/后缀 + 1~6位数字（'600000'、'600000.SH'、'SZ000001'、'sh.600000'、'600000.0'）
+CODE_PATTERN = re.compile(
+    r'^\s*(?:(?P<prefix>[A-Za-z]{2})\.?)?(?P<digits>\d{1,6})(?:\.0+)?(?:\.(?P<suffix>[A-Za-z]{2}))?\s*$'
+)
+
+
+class Exchange(enum.IntEnum):
+    """交易所编码"""
+    UNKNOWN = 0
+    SH = 1  # 上海证券交易所
+    SZ = 2  # 深圳证券交易所
+    BJ = 3  # 北京证券交易所
+
+
+# 交易所前后缀（不区分大小写）
+_EXCHANGE_TAGS = {'SH': Exchange.SH, 'SS': Exchange.SH, 'SZ': Exchange.SZ, 'BJ': Exchange.BJ}
+
+# 无前后缀时按代码首位推断交易所：0/2/3开头为深市，6/9开头为沪市，4/8开头为北交所
+_BY_FIRST_DIGIT = np.array([
+    Exchange.SZ, Exchange.UNKNOWN, Exchange.SZ, Exchange.SZ, Exchange.BJ,
+    Exchange.UNKNOWN, Exchange.SH, Exchange.UNKNOWN, Exchange.BJ, Exchange.SH,
+], dtype='int8')
+
+# 北交所920开头的新代码（与沪市900开头的B股区分）
+_BJ_920 = 920
+
+
+def infer_exchange(codes):
+    """按代码区间推断交易所（代码缺失时为UNKNOWN），返回int8数组"""
+    values = pd.Series(codes).to_numpy(dtype='float64', na_value=np.nan)
+    valid = ~np.isnan(values)
+    ints = np.where(valid, values, 0).astype('int64')
+    exchange = np.where(valid, _BY_FIRST_DIGIT[ints // 100_000 % 10], Exchange.UNKNOWN).astype('int8')
+    exchange[valid & (ints // 1000 == _BJ_920)] = Exchange.BJ
+    return exchange
+
+
+def _extract(strings):
+    """用正则表达式解析文本代码，返回 (代码, 交易所前后缀) 两个Series（不匹配时为缺失值）"""
+    if pa is not None:
+        parts = pc.extract_regex(pa.array(strings.to_numpy(dtype=object), type=pa.string(), from_pandas=True),
+                                 CODE_PATTERN.pattern)
+        digits = pc.struct_field(parts, 'digits')
+        prefix = pc.struct_field(parts, 'prefix')
+        tag = pc.if_else(pc.equal(prefix, ''), pc.struct_field(parts, 'suffix'), prefix)
+        codes = pd.Series(pc.cast(digits, pa.int64()).to_numpy(zero_copy_only=False), index=strings.index)
+        tags = pd.Series(pc.utf8_upper(tag).to_numpy(zero_copy_only=False), index=strings.index)
+    else:
+        parts = strings.str.extract(CODE_PATTERN)
+        codes = pd.to_numeric(parts['digits'])
+        tags = parts['prefix'].fillna(parts['suffix']).str.upper()
+    return codes.astype('float64'), tags.map(_EXCHANGE_TAGS)
+
+
+def parse_codes(values):
+    """向量化解析股票代码，返回 (代码, 交易所) 两个与输入索引一致的Series
+
+    代码为Int32（无法解析或超出6位时为缺失值）；交易所为int8编码的Exchange，
+    带前后缀时以前后缀为准，否则按代码区间推断。
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    tags = None
+    if pd.api.types.is_bool_dtype(series):
+        codes = pd.Series(np.nan, index=series.index)
+    elif pd.api.types.is_integer_dtype(series):
+        codes = series.astype('Int64')
+    elif pd.api.types.is_float_dtype(series):
+        codes = series.where(series == series.round())
+    elif pd.api.types.infer_dtype(series, skipna=True) == 'string':
+        # 全部为文本（如600000.SH）：直接按正则表达式解析
+        codes, tags = _extract(series.astype(object))
+    else:
+        # 数字与文本混合（如Excel中部分单元格为数字）：先整体按数值转换，其余再解析
+        codes = pd.to_numeric(series, errors='coerce')
+        codes = codes.where(codes == codes.round())
+        rest = codes.isna() & series.notna()
+        if rest.any():
+            codes = codes.astype('float64')
+            codes[rest], tags = _extract(series[rest].astype(str))
+
+    codes = codes.where((codes >= 0) & (codes <= MAX_CODE)).astype('Int32')
+    exchange = pd.Series(infer_exchange(codes), index=series.index, name='交易所')
+    if tags is not None:
+        tags = tags.dropna()
+        exchange[tags.index] = tags.astype('int8')
+    return codes, exchange
+
+
+def normalize_codes(series):
+    """将股票代码统一为整数（支持600000、'000001'、'600000.SH'、'SZ000001'等格式），无法解析时为缺失值"""
+    return parse_codes(series)[0]
+
+
+def parse_code(value):
+    """解析单个股票代码，返回 (整数代码, 交易所)，无法解析时代码为None"""
+    if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        code, tag = int(value), None
+    elif isinstance(value, (float, np.floating)) and float(value).is_integer():
+        code, tag = int(value), None
+    else:
+        match = CODE_PATTERN.match(str(value)) if isinstance(value, str) else None
+        if match is None:
+            return None, Exchange.UNKNOWN
+        code = int(match.group('digits'))
+        tag = (match.group('prefix') or match.group('suffix') or '').upper()
+    if not 0 <= code <= MAX_CODE:
+        return None, Exchange.UNKNOWN
+    if tag in _EXCHANGE_TAGS:
+        return code, _EXCHANGE_TAGS[tag]
+    return code, Exchange(infer_exchange([code])[0])
+
+
+def format_code(code, exchange=None):
+    """将整数股票代码补零为6位用于显示（给出交易所时附加后缀，如600000.SH），非整数代码原样返回"""
+    if isinstance(code, str) or pd.isna(code):
+        return code
+    text = f'{int(code):06d}'
+    if exchange:
+        text += f'.{Exchange(exchange).name}'
+    return text
+
+
+def join_key(codes, years):
+    """由整数代码和年份合成单列整数连接键（代码 × 10000 + 年份），任一缺失时为缺失值"""
+    index = codes.index if isinstance(codes, pd.Series) else None
+    keys = pd.array(codes, dtype='Int64') * 10_000 + pd.array(years, dtype='Int64')
+    return pd.Series(keys, index=index)
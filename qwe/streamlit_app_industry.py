@@ -1,8 +1,22 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
 import numpy as np
-import re
+
+from charts import FIGURE_CACHE_SIZE, HIGHLIGHT_CACHE_SIZE, HighlightFigure, setup_matplotlib
+from company_search import CompanySearch
+from data_store import VERSIONS_KEPT, format_code, load_panel
+from data_watcher import DataWatcher
+from firm_analytics import YearSnapshots, load_firm_analytics
+from industry_cube import load_industry_cube
+from instrumentation import cached, diagnostics_panel, start_rerun, timer
+from query_engine import QueryEngine
+from rolling_stats import DEFAULT_WINDOW, WINDOW_OPTIONS, RollingStats
+from warmup import WarmUp, serve_readiness
+
+# Matplotlib全局参数（中文字体等）只设置一次
+setup_matplotlib()
 
 # 设置页面配置
 st.set_page_config(
@@ -15,279 +29,407 @@ st.set_page_config(
 st.title("📊 企业数字化转型指数查询系统")
 st.markdown("### 查询企业历年数字化转型指数趋势")
 
-# 读取数据
-@st.cache_data
-def load_data():
+# 数据文件路径（存在同名且不比它旧的.parquet/.feather文件时直接读取该文件，每次加载时重新判断）
+DATA_FILE = '数字化转型指数合并数据_带行业信息.xlsx'
+
+# 手动添加的对比企业数量上限（“与本行业全部企业对比”不受此限制）
+MAX_PEERS = 50
+
+# 趋势图中逐一标注的对比企业数量上限，超过时对比企业以细线绘制
+MAX_LABELED_PEERS = 8
+
+# 热门企业（未选择企业时作为示例显示，预热时预先渲染其趋势图）
+SAMPLE_COMPANIES = [
+    ('600036', '招商银行'),
+    ('600519', '贵州茅台'),
+    ('000858', '五粮液'),
+    ('000333', '美的集团'),
+    ('000651', '格力电器'),
+    ('601318', '中国平安'),
+    ('600030', '中信证券'),
+    ('601166', '兴业银行'),
+    ('600000', '浦发银行'),
+    ('601398', '工商银行')
+]
+
+@st.cache_resource
+def get_data_watcher():
+    """数据版本监控（每个服务进程一个后台线程，新版本预热完成后再切换）"""
+    return DataWatcher(DATA_FILE, preload=warm_up).start()
+
+# 读取数据（所有会话共享同一个只读DataFrame，数据版本变化时重新加载；不得原地修改）
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT))
+def load_data(data_version):
     try:
-        df = pd.read_excel('数字化转型指数合并数据_带行业信息.xlsx')
+        # 紧凑类型：股票代码为int32（显示时补零），年份为int16，指数为float32，名称为分类编码
+        df = load_panel(DATA_FILE, compact=True, version=data_version)
         return df
     except Exception as e:
         st.error(f"数据加载失败: {e}")
         return None
 
-df = load_data()
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT))
+def get_query_engine(_df, data_version):
+    """构建查询引擎（面板索引 + 行业汇总立方体，每个数据版本只构建一次，所有会话共享）"""
+    return QueryEngine(_df, load_industry_cube(DATA_FILE, _df, version=data_version), data_version=data_version)
 
-if df is not None:
-    # 数据预处理
-    df['股票代码_str'] = df['股票代码'].astype(str).str.zfill(6)  # 股票代码补零到6位
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT))
+def get_firm_analytics(_df, data_version):
+    """获取企业-年份分析指标表（增长率、行业排名、百分位，每个数据版本只计算一次，所有会话共享）"""
+    return load_firm_analytics(DATA_FILE, _df, version=data_version)
+
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT))
+def get_company_search(_engine, data_version):
+    """构建企业搜索索引（股票代码、企业名称、拼音首字母，每个数据版本只构建一次，所有会话共享）"""
+    return CompanySearch.from_index(_engine.index)
+
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT * len(WINDOW_OPTIONS)))
+def get_rolling_stats(_engine, window, data_version):
+    """企业滚动统计（滚动均值、波动率、趋势斜率、转折点；每个窗口大小和数据版本只计算一次，所有会话共享）"""
+    return RollingStats.build(_engine.index.df, window)
+
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT * len(WINDOW_OPTIONS)))
+def get_industry_rolling(_engine, window, data_version):
+    """行业平均指数的滚动统计（每个窗口大小和数据版本只计算一次，所有会话共享）"""
+    return RollingStats.build(_engine.cube.df, window, code_col='行业代码', value_col='平均值')
+
+@cached(st.cache_resource(max_entries=VERSIONS_KEPT))
+def get_year_snapshots(_analytics, data_version):
+    """逐年横截面快照（每年按行业分组、组内按排名排序，每个数据版本只构建一次，所有会话共享）"""
+    return YearSnapshots(_analytics.df)
+
+def search_company(label, search, key):
+    """侧边栏搜索框 + 匹配结果下拉框，返回选中企业的股票代码（未输入或无匹配时返回None）"""
+    query = st.sidebar.text_input(label, "", key=f"{key}_query")
+    if not query.strip():
+        return None
+    with timer('company_search'):
+        matches = search.search(query)
+    if not matches:
+        st.sidebar.warning(f"未找到与“{query}”匹配的企业")
+        return None
+    names = dict(matches)
+    return st.sidebar.selectbox(
+        "匹配结果",
+        [code for code, _ in matches],
+        format_func=lambda code: f"{format_code(code)} - {names[code]}",
+        key=f"{key}_match"
+    )
+
+@cached(st.cache_resource(max_entries=HIGHLIGHT_CACHE_SIZE))
+def get_trend_chart(company_code, peer_codes, window, data_version):
+    """企业与同行业对比企业、行业平均指数的趋势对比图（不含选定年份的高亮点）
+
+    peer_codes为对比企业股票代码元组；window不为0时叠加企业的滚动均值 ± 滚动波动率区间、
+    趋势转折点和行业平均的滚动均值。按（企业、对比企业、滚动窗口、数据版本）缓存，切换年份时
+    底图不再重新绘制，只由render_trend_chart重绘高亮点。
+    """
+    engine = get_query_engine(load_data(data_version), data_version)
+    company_info = engine.company_info(company_code)
+    industry_name = company_info['industry_name']
+    industry_avg = engine.industry_average(company_info['industry_code'])
     
-    # 获取唯一的股票代码和企业名称映射
-    stock_company_map = df[['股票代码_str', '企业名称']].drop_duplicates()
+    # 一次取出所有企业的 年份 × 企业 矩阵
+    matrix = engine.pivot((company_code,) + peer_codes)
+    years = matrix.index.to_numpy()
     
-    # 侧边栏 - 查询条件
-    st.sidebar.header("查询条件")
+    # 创建图表（不经过pyplot的全局状态，多个会话并发绘图时互不干扰）
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
     
-    # 第一个企业查询方式选择
-    query_method1 = st.sidebar.radio("第一个企业查询方式", ["股票代码", "企业名称"])
+    # 选定年份的高亮点（animated=True：不参与底图绘制，每次渲染时单独绘制）
+    highlights = {}
     
-    # 根据选择的查询方式显示输入框
-    if query_method1 == "股票代码":
-        stock_code_input = st.sidebar.text_input("请输入股票代码 (6位数字)", "")
-        company_name_input = ""
+    # 绘制对比企业：数量较少时逐一标注，较多时以细线一次绘制
+    if len(peer_codes) <= MAX_LABELED_PEERS:
+        for code in peer_codes:
+            series = matrix[code].dropna()
+            ax.plot(series.index, series.values, marker='s', linewidth=2, markersize=6,
+                    label=f'{engine.index.name_for_code(code)} ({format_code(code)})')
+            highlights[code] = ax.scatter([], [], color='blue', s=100, zorder=5, animated=True)
     else:
-        # 获取所有企业名称
-        all_companies = sorted(df['企业名称'].unique())
-        company_name_input = st.sidebar.selectbox("请选择企业名称", [""] + all_companies)
-        stock_code_input = ""
+        # 所有对比企业合成一个LineCollection（缺失年份处断开），绘制开销与企业数基本无关
+        values = matrix[list(peer_codes)].to_numpy().T
+        segments = np.stack([np.broadcast_to(years, values.shape), values], axis=-1)
+        ax.add_collection(LineCollection(segments, colors='lightsteelblue', linewidths=0.8, alpha=0.6, zorder=1))
+        ax.plot([], [], color='lightsteelblue', label=f'同行业对比企业（{len(peer_codes)}家）')
+    
+    # 绘制企业折线，选定年份以红色高亮
+    series = matrix[company_code].dropna()
+    ax.plot(series.index, series.values, marker='o', linewidth=2.5, markersize=8, color='C3', zorder=4,
+            label=f"{company_info['name']} ({company_info['stock_code']})")
+    highlights[company_code] = ax.scatter([], [], color='red', s=150, zorder=5, animated=True)
+    
+    # 绘制行业平均指数折线
+    ax.plot(industry_avg['年份'], industry_avg['行业平均指数'], marker='^', linewidth=2, markersize=8, linestyle='--', color='gray', zorder=3, label=f'{industry_name} 行业平均')
+    
+    # 叠加滚动统计：企业滚动均值 ± 波动率区间、趋势转折点，行业平均的滚动均值
+    band_max = 0
+    if window:
+        rolling = get_rolling_stats(engine, window, data_version).series(company_code)
+        rolling = rolling[rolling['滚动均值'].notna()]
+        upper = rolling['滚动均值'] + rolling['滚动波动率']
+        ax.fill_between(rolling['年份'], rolling['滚动均值'] - rolling['滚动波动率'], upper,
+                        color='C3', alpha=0.12, linewidth=0, zorder=2, label=f'{window}年滚动均值 ± 波动率')
+        ax.plot(rolling['年份'], rolling['滚动均值'], linestyle=':', linewidth=1.8, color='C3', zorder=4,
+                label=f'{window}年滚动均值')
+        breakpoints = rolling[rolling['转折点']]
+        if not breakpoints.empty:
+            ax.scatter(breakpoints['年份'], breakpoints['数字化转型指数'], marker='D', s=90, facecolors='none',
+                       edgecolors='black', linewidths=1.5, zorder=6, label='趋势转折点')
+        industry_rolling = get_industry_rolling(engine, window, data_version).series(company_info['industry_code'])
+        industry_rolling = industry_rolling[industry_rolling['滚动均值'].notna()]
+        ax.plot(industry_rolling['年份'], industry_rolling['滚动均值'], linestyle=':', linewidth=1.5, color='gray',
+                zorder=3, label=f'行业{window}年滚动均值')
+        band_max = upper.max() if not upper.empty else 0
+    
+    # 设置图表属性
+    ax.set_title(f'{industry_name} - 数字化转型指数趋势对比', fontsize=16, fontweight='bold')
+    ax.set_xlabel('年份', fontsize=14)
+    ax.set_ylabel('数字化转型指数', fontsize=14)
+    ax.grid(True, linestyle='--', alpha=0.7)
     
-    # 第二个企业查询方式选择（可选）
-    query_method2 = st.sidebar.radio("第二个企业查询方式（可选）", ["股票代码", "企业名称"])
+    # 设置y轴范围
+    max_val = np.nanmax([np.nanmax(matrix.to_numpy(), initial=0), industry_avg['行业平均指数'].max(), band_max])
+    ax.set_ylim(0, max(max_val * 1.1, 10))  # 确保y轴有足够空间
     
-    # 根据选择的查询方式显示输入框
-    if query_method2 == "股票代码":
-        stock_code_input2 = st.sidebar.text_input("请输入股票代码 (6位数字) - 同行业对比", "")
-        company_name_input2 = ""
+    # 添加图例
+    ax.legend(fontsize=12)
+    
+    # 优化x轴显示
+    all_years = sorted(set(years.tolist()) | set(industry_avg['年份'].tolist()))
+    if len(all_years) > 10:
+        step = len(all_years) // 10
+        ax.set_xticks(all_years[::step])
     else:
-        # 获取所有企业名称
-        all_companies = sorted(df['企业名称'].unique())
-        company_name_input2 = st.sidebar.selectbox("请选择企业名称 - 同行业对比", [""] + all_companies)
-        stock_code_input2 = ""
+        ax.set_xticks(all_years)
     
-    # 年份选择
-    all_years = sorted(df['年份'].unique())
-    selected_year = st.sidebar.selectbox("选择年份", all_years, index=len(all_years)-1)
+    ax.tick_params(axis='x', rotation=45)
+    fig.tight_layout()
+    
+    return HighlightFigure(fig, highlights)
+
+@cached(st.cache_data(max_entries=FIGURE_CACHE_SIZE))
+def render_trend_chart(company_code, peer_codes, selected_year, window, data_version):
+    """在趋势对比图上高亮各企业选定年份的指数，渲染为PNG
+
+    按（企业、对比企业、选定年份、滚动窗口、数据版本）缓存，缓存满时淘汰最久未使用的图表。
+    """
+    engine = get_query_engine(load_data(data_version), data_version)
+    chart = get_trend_chart(company_code, peer_codes, window, data_version)
+    matrix = engine.pivot((company_code,) + peer_codes)
+    # 对比企业较多时以细线绘制，不逐一高亮
+    highlighted = (company_code,) + (peer_codes if len(peer_codes) <= MAX_LABELED_PEERS else ())
+    points = {}
+    if selected_year in matrix.index:
+        for code in highlighted:
+            value = matrix.at[selected_year, code]
+            if pd.notna(value):
+                points[code] = (selected_year, value)
+    return chart.render(points)
+
+def show_industry_rank(analytics, code, year):
+    """在指数下方显示企业当年的行业排名、行业百分位和同比增长率"""
+    row = analytics.row(code, year)
+    if row.empty or pd.isna(row['行业排名'].iloc[0]):
+        return
+    row = row.iloc[0]
+    text = f"行业排名：第 {int(row['行业排名'])} / {int(row['行业企业数'])} 名 · 行业百分位：{row['行业百分位']:.1f}%"
+    if pd.notna(row['同比增长率']):
+        text += f" · 同比增长率：{row['同比增长率']:.1f}%"
+    st.caption(text)
+
+def show_rolling_trend(rolling, code, year):
+    """在指数下方显示截至当年的滚动窗口趋势斜率和波动率"""
+    row = rolling.series(code, year, year)
+    if row.empty or pd.isna(row['趋势斜率'].iloc[0]):
+        return
+    row = row.iloc[0]
+    text = f"近{rolling.window}年趋势斜率：{row['趋势斜率']:+.2f}/年 · 滚动波动率：{row['滚动波动率']:.2f}"
+    if row['转折点']:
+        text += " · 趋势转折点"
+    st.caption(text)
+
+@st.fragment
+def show_year_view(company_code, peers, matrix, all_years, engine, analytics, snapshots, window, data_version):
+    """选定年份的指数、行业排名、同行业对比表和趋势图
+
+    以片段运行：切换年份时只重新运行这一部分，企业信息、数据矩阵和历年数据详情表不重新构建。
+    """
+    selected_year = st.selectbox("选择年份", all_years, index=len(all_years)-1)
+    company_info = engine.company_info(company_code)
+    company_name = company_info['name']
+    
+    # 显示选定年份的数据
+    if selected_year in matrix.index and pd.notna(matrix.at[selected_year, company_code]):
+        st.metric(label=f"{company_name} - {selected_year}年数字化转型指数",
+                  value=f"{matrix.at[selected_year, company_code]:.2f}")
+        show_industry_rank(analytics, company_code, selected_year)
+        if window:
+            show_rolling_trend(get_rolling_stats(engine, window, data_version), company_code, selected_year)
+    else:
+        st.warning(f"{company_name} 在 {selected_year} 年没有数据")
+    
+    if peers:
+        st.subheader(f"🏅 {selected_year}年同行业对比（{len(peers) + 1}家企业）")
+        with timer('peer_table'):
+            # 当年本行业的横截面已按行业排名排序，直接取出行切片
+            year_rows = snapshots.industry(selected_year, company_info['industry_code'])
+            year_rows = year_rows[year_rows['股票代码'].isin(matrix.columns)]
+            year_table = pd.DataFrame({
+                '股票代码': year_rows['股票代码'].map(format_code),
+                '企业名称': year_rows['股票代码'].map(engine.index.name_for_code),
+                '数字化转型指数': year_rows['数字化转型指数'],
+                '行业排名': year_rows['行业排名'],
+                '行业百分位': year_rows['行业百分位'],
+            })
+        st.dataframe(year_table, use_container_width=True, hide_index=True)
+    
+    # 显示历年趋势图
+    st.subheader("📈 历年数字化转型指数趋势对比")
+    
+    # 底图按企业、对比企业、滚动窗口和数据版本缓存，切换年份时只重绘高亮点
+    chart = render_trend_chart(int(company_code), tuple(int(code) for code in peers), int(selected_year), window,
+                               data_version)
+    st.image(chart, use_container_width=True)
+
+def warm_up(data_version):
+    """预热指定数据版本：加载数据，构建查询引擎、分析指标和搜索索引，预先渲染热门企业的趋势图
+
+    服务启动时在后台线程中执行；数据文件更新后由数据版本监控在切换到新版本之前执行。
+    """
+    df = load_data(data_version)
+    if df is None:
+        raise RuntimeError("数据加载失败")
+    engine = get_query_engine(df, data_version)
+    analytics = get_firm_analytics(df, data_version)
+    get_year_snapshots(analytics, data_version)
+    get_rolling_stats(engine, DEFAULT_WINDOW, data_version)
+    get_industry_rolling(engine, DEFAULT_WINDOW, data_version)
+    get_company_search(engine, data_version)
+    latest_year = int(df['年份'].max())
+    for code, _ in SAMPLE_COMPANIES:
+        if int(code) in engine.index:
+            render_trend_chart(int(code), (), latest_year, DEFAULT_WINDOW, data_version)
+
+@st.cache_resource
+def get_warmup():
+    """服务启动预热（每个服务进程一次），设置WARMUP_READY_PORT时在该端口提供就绪检查"""
+    warmup = WarmUp(lambda: warm_up(get_data_watcher().version)).start()
+    serve_readiness(warmup)
+    return warmup
+
+# 记录本次刷新各区段的耗时
+start_rerun()
+
+# 本次刷新固定使用当前发布的数据版本，数据文件更新后的下一次交互自动切换到新版本
+data_version = get_data_watcher().version
+get_warmup()
+df = load_data(data_version)
+
+if df is not None:
+    # 查询引擎：按股票代码/企业名称直接定位数据块，行业平均直接读取汇总立方体
+    engine = get_query_engine(df, data_version)
+    analytics = get_firm_analytics(df, data_version)
+    snapshots = get_year_snapshots(analytics, data_version)
+    
+    # 侧边栏 - 查询条件
+    st.sidebar.header("查询条件")
+    
+    # 企业搜索：输入股票代码、企业名称或拼音首字母，只列出最匹配的企业
+    search = get_company_search(engine, data_version)
+    company_code = search_company("搜索企业（股票代码、名称或拼音首字母）", search, key="company1")
+    
+    # 同行业对比企业（保存在会话状态中，最多MAX_PEERS家），或直接与本行业全部企业对比
+    peer_codes = st.session_state.setdefault('peer_codes', [])
+    compare_all = st.sidebar.checkbox("与本行业全部企业对比")
+    if not compare_all:
+        new_peer = search_company("添加同行业对比企业（可选）", search, key="peer")
+        if new_peer is not None and st.sidebar.button("添加到对比列表"):
+            if len(peer_codes) >= MAX_PEERS:
+                st.sidebar.warning(f"最多对比 {MAX_PEERS} 家企业")
+            elif int(new_peer) not in peer_codes:
+                peer_codes.append(int(new_peer))
+        if peer_codes:
+            kept = st.sidebar.multiselect(
+                "对比企业",
+                peer_codes,
+                default=peer_codes,
+                format_func=lambda code: f"{format_code(code)} - {engine.index.name_for_code(code)}"
+            )
+            if kept != peer_codes:
+                peer_codes[:] = kept
+    
+    # 趋势图叠加的滚动窗口（0为不叠加）
+    window = st.sidebar.selectbox(
+        "滚动窗口（年）",
+        (0,) + WINDOW_OPTIONS,
+        index=1 + WINDOW_OPTIONS.index(DEFAULT_WINDOW),
+        format_func=lambda w: "不显示" if w == 0 else f"{w}年"
+    )
     
     # 显示数据概览
     st.sidebar.subheader("数据概览")
-    st.sidebar.write(f"企业数量: {df['股票代码'].nunique()}")
+    st.sidebar.write(f"企业数量: {len(engine.index)}")
     st.sidebar.write(f"时间跨度: {df['年份'].min()} - {df['年份'].max()}")
     st.sidebar.write(f"总记录数: {len(df)}")
     
     # 主页面内容
-    if stock_code_input or company_name_input:
-        # 查询企业数据
-        if stock_code_input:
-            # 验证股票代码格式
-            if not re.match(r'^\d{6}$', stock_code_input):
-                st.error("请输入6位数字的股票代码")
-                company_data = None
-            else:
-                # 查询企业数据
-                company_data = df[df['股票代码_str'] == stock_code_input]
-        else:
-            # 通过企业名称查询
-            company_data = df[df['企业名称'] == company_name_input]
-            
-            if company_data.empty:
-                if stock_code_input:
-                    st.error(f"未找到股票代码为 {stock_code_input} 的企业数据")
-                else:
-                    st.error(f"未找到企业名称为 {company_name_input} 的企业数据")
+    if company_code is not None:
+        # 获取企业基本信息
+        company_info = engine.company_info(company_code)
+        company_name = company_info['name']
+        industry_code = company_info['industry_code']
+        industry_name = company_info['industry_name']
+        
+        # 显示企业信息
+        st.subheader(f"🏢 {company_name} ({company_info['stock_code']}) - {industry_name}")
+        
+        # 确定对比企业（只保留同行业企业）
+        with timer('filter'):
+            if compare_all:
+                peers = [code for code in engine.industry_members(industry_code) if code != company_code]
+                excluded = []
             else:
-                # 获取企业基本信息
-                company_name = company_data['企业名称'].iloc[0]
-                industry_code = company_data['行业代码'].iloc[0]
-                industry_name = company_data['行业名称'].iloc[0].strip()
-                
-                # 显示企业信息
-                st.subheader(f"🏢 {company_name} ({stock_code_input}) - {industry_name}")
-                
-                # 处理第二个企业
-                company_data2 = None
-                company_name2 = None
-                stock_code2 = ""
-                
-                if stock_code_input2 or company_name_input2:
-                    # 查询第二个企业数据
-                    if stock_code_input2:
-                        # 验证股票代码格式
-                        if not re.match(r'^\d{6}$', stock_code_input2):
-                            st.error("请输入6位数字的股票代码")
-                            company_data2 = None
-                        else:
-                            # 查询企业数据
-                            company_data2 = df[df['股票代码_str'] == stock_code_input2]
-                            stock_code2 = stock_code_input2
-                    else:
-                        # 通过企业名称查询
-                        company_data2 = df[df['企业名称'] == company_name_input2]
-                        if not company_data2.empty:
-                            stock_code2 = company_data2['股票代码_str'].iloc[0]
-                        else:
-                            stock_code2 = ""
-                    
-                    if company_data2.empty:
-                        if stock_code_input2:
-                            st.error(f"未找到股票代码为 {stock_code_input2} 的企业数据")
-                        else:
-                            st.error(f"未找到企业名称为 {company_name_input2} 的企业数据")
-                        company_data2 = None
-                    else:
-                        # 检查是否同行业
-                        industry_code2 = company_data2['行业代码'].iloc[0]
-                        if industry_code2 != industry_code:
-                            if stock_code_input2:
-                                st.error(f"股票代码 {stock_code_input2} 的企业与 {company_name} 不属于同一行业")
-                            else:
-                                st.error(f"企业 {company_name_input2} 与 {company_name} 不属于同一行业")
-                            company_data2 = None
-                        else:
-                            company_name2 = company_data2['企业名称'].iloc[0]
-                            st.subheader(f"🏢 {company_name2} ({stock_code2}) - {industry_name}")
-                
-                # 显示选定年份的数据
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    year_data = company_data[company_data['年份'] == selected_year]
-                    if year_data.empty:
-                        st.warning(f"{company_name} 在 {selected_year} 年没有数据")
-                    else:
-                        digit_index = year_data['数字化转型指数'].iloc[0]
-                        st.metric(label=f"{company_name} - {selected_year}年数字化转型指数", value=digit_index)
-                
-                with col2:
-                    if company_data2 is not None:
-                        year_data2 = company_data2[company_data2['年份'] == selected_year]
-                        if year_data2.empty:
-                            st.warning(f"{company_name2} 在 {selected_year} 年没有数据")
-                        else:
-                            digit_index2 = year_data2['数字化转型指数'].iloc[0]
-                            st.metric(label=f"{company_name2} - {selected_year}年数字化转型指数", value=digit_index2)
-                
-                # 计算行业平均指数
-                industry_data = df[df['行业代码'] == industry_code]
-                industry_avg = industry_data.groupby('年份')['数字化转型指数'].mean().reset_index()
-                industry_avg.columns = ['年份', '行业平均指数']
-                
-                # 显示历年趋势图
-                st.subheader("📈 历年数字化转型指数趋势对比")
-                
-                # 准备趋势图数据
-                trend_data1 = company_data.sort_values('年份')[['年份', '数字化转型指数']]
-                
-                # 设置中文显示
-                plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']  # 中文字体
-                plt.rcParams['axes.unicode_minus'] = False  # 正确显示负号
-                
-                # 创建图表
-                fig, ax = plt.subplots(figsize=(12, 6))
-                
-                # 获取第一个企业的股票代码用于显示
-                if stock_code_input:
-                    display_code1 = stock_code_input
-                else:
-                    display_code1 = company_data['股票代码_str'].iloc[0]
-                
-                # 绘制第一个企业的折线
-                ax.plot(trend_data1['年份'], trend_data1['数字化转型指数'], marker='o', linewidth=2, markersize=8, label=f'{company_name} ({display_code1})')
-                
-                # 绘制第二个企业的折线（如果有）
-                if company_data2 is not None:
-                    trend_data2 = company_data2.sort_values('年份')[['年份', '数字化转型指数']]
-                    ax.plot(trend_data2['年份'], trend_data2['数字化转型指数'], marker='s', linewidth=2, markersize=8, label=f'{company_name2} ({stock_code2})')
-                
-                # 绘制行业平均指数折线
-                ax.plot(industry_avg['年份'], industry_avg['行业平均指数'], marker='^', linewidth=2, markersize=8, linestyle='--', color='gray', label=f'{industry_name} 行业平均')
-                
-                # 高亮显示选定年份
-                if not year_data.empty:
-                    digit_index = year_data['数字化转型指数'].iloc[0]
-                    ax.scatter(selected_year, digit_index, color='red', s=150, zorder=5)
-                
-                if company_data2 is not None and not year_data2.empty:
-                    digit_index2 = year_data2['数字化转型指数'].iloc[0]
-                    ax.scatter(selected_year, digit_index2, color='blue', s=150, zorder=5)
-                
-                # 设置图表属性
-                ax.set_title(f'{industry_name} - 数字化转型指数趋势对比', fontsize=16, fontweight='bold')
-                ax.set_xlabel('年份', fontsize=14)
-                ax.set_ylabel('数字化转型指数', fontsize=14)
-                ax.grid(True, linestyle='--', alpha=0.7)
-                
-                # 设置y轴范围
-                all_data = pd.concat([trend_data1[['年份', '数字化转型指数']], industry_avg.rename(columns={'行业平均指数': '数字化转型指数'})])
-                if company_data2 is not None:
-                    all_data = pd.concat([all_data, trend_data2[['年份', '数字化转型指数']]])
-                max_val = all_data['数字化转型指数'].max()
-                ax.set_ylim(0, max(max_val * 1.1, 10))  # 确保y轴有足够空间
-                
-                # 添加图例
-                ax.legend(fontsize=12)
-                
-                # 优化x轴显示
-                years = sorted(all_data['年份'].unique())
-                if len(years) > 10:
-                    step = len(years) // 10
-                    ax.set_xticks(years[::step])
-                else:
-                    ax.set_xticks(years)
-                
-                plt.xticks(rotation=45)
-                plt.tight_layout()
-                
-                # 显示图表
-                st.pyplot(fig)
-                
-                # 显示数据表格
-                st.subheader("📊 历年数据详情")
-                
-                # 获取第一个企业的股票代码用于显示
-                if stock_code_input:
-                    display_code1 = stock_code_input
-                else:
-                    display_code1 = company_data['股票代码_str'].iloc[0]
-                
-                # 合并数据表格
-                result_table = trend_data1.copy()
-                result_table = result_table.rename(columns={'数字化转型指数': f'{company_name} ({display_code1})'})
-                
-                # 合并第二个企业数据（如果有）
-                if company_data2 is not None:
-                    trend_data2 = company_data2.sort_values('年份')[['年份', '数字化转型指数']]
-                    trend_data2 = trend_data2.rename(columns={'数字化转型指数': f'{company_name2} ({stock_code2})'})
-                    result_table = pd.merge(result_table, trend_data2, on='年份', how='outer')
-                
-                # 合并行业平均数据
-                result_table = pd.merge(result_table, industry_avg, on='年份', how='outer')
-                
-                # 排序并显示
-                result_table = result_table.sort_values('年份')
-                st.dataframe(result_table, use_container_width=True)
-    
+                peers = [code for code in peer_codes if code != company_code]
+                excluded = [code for code in peers if not engine.same_industry(company_code, code)]
+                peers = [code for code in peers if code not in excluded]
+        if excluded:
+            st.error(f"以下企业与 {company_name} 不属于同一行业，已从对比中排除："
+                     + "、".join(f"{engine.index.name_for_code(code)} ({format_code(code)})" for code in excluded))
+        
+        # 一次取出所有企业的 年份 × 企业 矩阵；行业平均指数直接读取汇总立方体
+        with timer('pivot'):
+            matrix = engine.pivot([company_code] + peers)
+            industry_avg = engine.industry_average(industry_code)
+        
+        # 年份选择及当年的指数、排名、对比表和趋势图（切换年份时只重新运行该片段）
+        show_year_view(company_code, peers, matrix, snapshots.years(), engine, analytics, snapshots, window,
+                       data_version)
+        
+        # 显示数据表格：行为企业（首行为行业平均），列为年份
+        st.subheader("📊 历年数据详情")
+        result_table = matrix.rename(
+            columns=lambda code: f"{engine.index.name_for_code(code)} ({format_code(code)})"
+        ).T
+        industry_row = industry_avg.set_index('年份')['行业平均指数'].rename(f"{industry_name} 行业平均")
+        result_table = pd.concat([industry_row.to_frame().T, result_table])
+        result_table = result_table[sorted(result_table.columns)]
+        result_table.columns = [str(year) for year in result_table.columns]
+        st.dataframe(result_table, use_container_width=True)
+
     else:
         # 未输入股票代码时显示示例企业
-        st.info("请在左侧输入6位股票代码进行查询")
+        st.info("请在左侧输入股票代码、企业名称或拼音首字母进行查询")
         st.subheader("热门企业示例")
         
-        # 选择一些有代表性的企业
-        sample_companies = [
-            ('600036', '招商银行'),
-            ('600519', '贵州茅台'), 
-            ('000858', '五粮液'),
-            ('000333', '美的集团'),
-            ('000651', '格力电器'),
-            ('601318', '中国平安'),
-            ('600030', '中信证券'),
-            ('601166', '兴业银行'),
-            ('600000', '浦发银行'),
-            ('601398', '工商银行')
-        ]
-        
         # 显示示例企业表格
-        sample_df = pd.DataFrame(sample_companies, columns=['股票代码', '企业名称'])
+        sample_df = pd.DataFrame(SAMPLE_COMPANIES, columns=['股票代码', '企业名称'])
         st.dataframe(sample_df, use_container_width=True)
 
+# 性能诊断（侧边栏，可选）
+diagnostics_panel('industry')
+
 # 页脚
 st.markdown("---")
 st.markdown("© 2024 企业数字化转型指数查询系统 | 数据来源：数字化转型指数合并数据")
\ No newline at end of file
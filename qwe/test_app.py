@@ -1,6 +1,8 @@
 import pandas as pd
 import re
 
+from stock_codes import format_code, normalize_codes
+
 # 测试数据读取
 try:
     df = pd.read_excel('数字化转型指数合并数据_带行业信息.xlsx')
@@ -9,7 +11,7 @@ try:
     print('\n数据行数:', len(df))
     
     # 测试股票代码处理
-    df['股票代码_str'] = df['股票代码'].astype(str).str.zfill(6)
+    df['股票代码_str'] = normalize_codes(df['股票代码']).map(format_code)
     print('\n股票代码处理成功！')
     
     # 测试行业信息
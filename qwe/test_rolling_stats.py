@@ -0,0 +1,93 @@
+"""
+滚动窗口统计检查
+
+与pandas的groupby().rolling()（均值、样本标准差）和np.polyfit（趋势斜率）逐条对照，
+面板中包含年份不连续的企业和记录数少于窗口的企业。直接运行或使用pytest运行均可。
+"""
+import numpy as np
+import pandas as pd
+
+from rolling_stats import FirmRollingStats, RollingStats, build_rolling_stats, rolling_arrays
+from panel_index import PanelIndex
+
+
+def _panel(seed=0):
+    rng = np.random.default_rng(seed)
+    firms = {
+        1: [2001, 2002, 2004, 2005, 2006, 2009, 2010, 2011],  # 年份不连续
+        2: [2015, 2016],                                      # 记录数少于窗口
+        3: [2010, 2011, 2012, 2013, 2014],
+        4: [2020],
+    }
+    rows = [(code, year) for code, years in firms.items() for year in years]
+    df = pd.DataFrame(rows, columns=['股票代码', '年份'])
+    df['数字化转型指数'] = rng.uniform(0, 50, len(df)).round(2)
+    # 打乱行顺序：build_rolling_stats须自行按 (企业, 年份) 排序
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def test_matches_pandas_rolling_and_polyfit():
+    df = _panel()
+    for window in (2, 3, 5):
+        result = build_rolling_stats(df, window)
+        expected = df.sort_values(['股票代码', '年份']).reset_index(drop=True)
+        rolling = expected.groupby('股票代码')['数字化转型指数'].rolling(window)
+        np.testing.assert_allclose(result['滚动均值'], rolling.mean().to_numpy(), equal_nan=True)
+        np.testing.assert_allclose(result['滚动波动率'], rolling.std().to_numpy(), rtol=1e-6, equal_nan=True)
+
+        slopes = np.full(len(expected), np.nan)
+        for _, group in expected.groupby('股票代码'):
+            for end in range(window - 1, len(group)):
+                part = group.iloc[end - window + 1:end + 1]
+                slopes[group.index[end]] = np.polyfit(part['年份'], part['数字化转型指数'], 1)[0]
+        np.testing.assert_allclose(result['趋势斜率'], slopes, equal_nan=True)
+
+
+def test_windows_do_not_cross_firms():
+    df = _panel()
+    result = build_rolling_stats(df, 3)
+    counts = result.groupby('股票代码').cumcount()
+    # 每家企业的前window-1条记录没有完整窗口，记录数少于窗口的企业全部为缺失
+    assert result.loc[counts < 2, '滚动均值'].isna().all()
+    assert result.loc[counts >= 2, '滚动均值'].notna().all()
+    assert result.loc[result['股票代码'].isin([2, 4]), ['趋势斜率', '斜率变化']].isna().all().all()
+    assert not result.loc[result['股票代码'].isin([2, 4]), '转折点'].any()
+
+
+def test_breakpoint_at_trend_reversal():
+    # 先降后升（V形），转折点为谷底；之后接另一家企业的下降序列，跨企业的斜率变化不应被识别
+    values = [10, 8, 6, 4, 2, 4, 6, 8, 10, 30, 20, 10]
+    keys = [1] * 9 + [2] * 3
+    years = list(range(2000, 2009)) + [2000, 2001, 2002]
+    stats = rolling_arrays(keys, years, values, 3)
+    assert np.flatnonzero(stats['转折点']).tolist() == [4]
+    assert stats['斜率变化'][4] == 4.0
+    # 斜率变化恒定（直线）时没有转折点
+    line = rolling_arrays([1] * 8, range(8), np.arange(8) * 2.0, 3)
+    assert not line['转折点'].any()
+
+
+def test_breakpoint_requires_relative_change():
+    # 斜率由5变为4.5：变化不足较大斜率的一半，不是转折点
+    values = np.concatenate([np.arange(6) * 5.0, 25 + np.arange(1, 6) * 4.5])
+    stats = rolling_arrays([1] * len(values), range(len(values)), values, 3)
+    assert not stats['转折点'].any()
+
+
+def test_firm_rolling_stats_matches_full_table():
+    df = _panel()
+    full = RollingStats.build(df, 3)
+    lazy = FirmRollingStats(PanelIndex(df.sort_values(['股票代码', '年份'])), 3)
+    for code in df['股票代码'].unique():
+        pd.testing.assert_frame_equal(full.series(code, 2002, 2012).reset_index(drop=True),
+                                      lazy.series(code, 2002, 2012).reset_index(drop=True))
+    assert full.latest(2, 2020) is None
+    assert full.latest(1, 2006)['年份'] == 2006
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f'✓ {name}')
+    print('\n所有测试通过！')
@@ -0,0 +1,112 @@
+"""
+股票代码解析与合并匹配检查
+
+直接运行（python test_stock_codes.py）或使用pytest运行均可。
+"""
+import contextlib
+import io
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import merge_excel
+from stock_codes import Exchange, format_code, join_key, parse_code, parse_codes
+
+
+def test_suffixed_and_prefixed_codes():
+    codes, exchange = parse_codes(pd.Series(['600000.SH', 'SZ000001', '000001', 'sh.600000', ' 000002.sz ']))
+    assert codes.tolist() == [600000, 1, 1, 600000, 2]
+    assert exchange.tolist() == [Exchange.SH, Exchange.SZ, Exchange.SZ, Exchange.SH, Exchange.SZ]
+    assert str(codes.dtype) == 'Int32'
+
+
+def test_mixed_object_column():
+    # Excel中部分单元格为数字、部分为文本
+    codes, exchange = parse_codes(pd.Series([600000, '000001.SZ', 1.0, 'abc', None, '430047.BJ'], dtype=object))
+    assert codes.tolist() == [600000, 1, 1, pd.NA, pd.NA, 430047]
+    assert exchange.tolist() == [Exchange.SH, Exchange.SZ, Exchange.SZ, Exchange.UNKNOWN, Exchange.UNKNOWN,
+                                 Exchange.BJ]
+
+
+def test_float_and_out_of_range_codes():
+    codes, _ = parse_codes(pd.Series([600000.0, 1.5, np.nan, 1234567.0, -1.0]))
+    assert codes.tolist() == [600000, pd.NA, pd.NA, pd.NA, pd.NA]
+    codes, _ = parse_codes(pd.Series([1, 999999, 1000000, -5]))
+    assert codes.tolist() == [1, 999999, pd.NA, pd.NA]
+    codes, _ = parse_codes(pd.Series(['1234567', '12345678.SH', '600000.0']))
+    assert codes.tolist() == [pd.NA, pd.NA, 600000]
+
+
+def test_parse_code_and_format_code():
+    assert parse_code('600000.SH') == (600000, Exchange.SH)
+    assert parse_code('SZ000001') == (1, Exchange.SZ)
+    assert parse_code(920001) == (920001, Exchange.BJ)
+    assert parse_code('AAPL') == (None, Exchange.UNKNOWN)
+    assert parse_code(1234567) == (None, Exchange.UNKNOWN)
+    assert format_code(1) == '000001'
+    assert format_code(600000, Exchange.SH) == '600000.SH'
+
+
+def test_join_key_keeps_index_and_missing_values():
+    codes = pd.Series([600000, None, 1], index=[10, 20, 30], dtype='Int32')
+    years = pd.Series([2020, 2021, None], index=[10, 20, 30], dtype='Int64')
+    keys = join_key(codes, years)
+    assert keys.index.tolist() == [10, 20, 30]
+    assert keys.tolist() == [600000 * 10000 + 2020, pd.NA, pd.NA]
+
+
+# 第一张表：不同格式的股票代码；第二张表：股票代码全称
+INDEX_TABLE = pd.DataFrame({
+    '股票代码': [600000, '000001', '000002.SZ', 'SH600004', 'abc', 300750],
+    '年份': [2020, 2020, 2020, 2021, 2021, 2021],
+    '数字化转型指数': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+})
+INDUSTRY_TABLE = pd.DataFrame({
+    '股票代码全称': ['600000.SH', '000001.SZ', '000002.SZ', '600004.SH', '300750.SZ'],
+    '年度': [2020, 2020, 2020, 2021, 2022],
+    '行业代码': ['J66', 'J66', 'K70', 'G56', 'C38'],
+    '行业名称': ['货币金融服务', '货币金融服务', '房地产业', '航空运输业', '电气机械和器材制造业'],
+})
+# 2020年全部匹配；2021年600004匹配，abc无法解析，300750只有2022年的行业信息
+EXPECTED_RATES = {2020: (3, 3), 2021: (3, 1)}
+
+
+def _match_rates(merged):
+    counts = merge_excel.match_counts(merged['年份'], merged['行业代码'].notna())
+    return {int(year): (int(row['记录数']), int(row['匹配数'])) for year, row in counts.iterrows()}
+
+
+def test_attach_industry_match_rates():
+    industry_table, duplicates = merge_excel.prepare_industry_table(INDUSTRY_TABLE)
+    merged = merge_excel.attach_industry(INDEX_TABLE, industry_table)
+    assert duplicates == 0
+    assert merged['行业代码'].tolist()[:4] == ['J66', 'J66', 'K70', 'G56']
+    assert _match_rates(merged) == EXPECTED_RATES
+
+
+def test_in_memory_and_streaming_merges_agree():
+    with tempfile.TemporaryDirectory() as workdir:
+        index_file = os.path.join(workdir, 'index.xlsx')
+        industry_file = os.path.join(workdir, 'industry.xlsx')
+        INDEX_TABLE.to_excel(index_file, index=False)
+        INDUSTRY_TABLE.to_excel(industry_file, index=False)
+
+        outputs = {}
+        for mode, merge in (('memory', merge_excel.merge_excel_files),
+                            ('stream', merge_excel.merge_excel_files_streaming)):
+            outputs[mode] = os.path.join(workdir, f'{mode}.xlsx')
+            with contextlib.redirect_stdout(io.StringIO()):
+                assert merge(index_file, industry_file, outputs[mode])
+
+        for path in outputs.values():
+            assert _match_rates(pd.read_excel(path)) == EXPECTED_RATES
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f'✓ {name}')
+    print('\n所有测试通过！')
@@ -0,0 +1,181 @@
+"""
+服务启动预热与就绪检查
+
+Streamlit只在有会话连接时才执行应用脚本，部署后的第一位访问者需要等待数据加载、
+索引和汇总构建以及图表渲染。各应用提供warm_up(data_version)函数预热自身的缓存，
+服务启动时由WarmUp在后台线程中执行；设置环境变量WARMUP_READY_PORT时，
+在该端口提供就绪检查接口，负载均衡器只在预热完成后才将流量转发到该实例。
+
+接口：
+    GET  /ready    预热完成返回200，预热中或预热失败返回503，响应体为预热状态
+    GET  /metrics  Prometheus文本格式的耗时和缓存命中统计（见instrumentation.py）
+
+用法示例（启动应用，并立即触发一次脚本执行以开始预热）：
+    python warmup.py streamlit_app_industry.py --port 8501 --ready-port 8502
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from instrumentation import prometheus_text
+
+# 就绪检查端口的环境变量
+READY_PORT_ENV = 'WARMUP_READY_PORT'
+
+# 启动器轮询间隔（秒）
+POLL_INTERVAL = 1
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    """在后台线程中执行一次预热，记录状态供就绪检查使用"""
+
+    def __init__(self, target):
+        self._target = target
+        self._thread = None
+        self.ready = False
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    def _run(self):
+        self.started_at = time.time()
+        try:
+            self._target()
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+            logger.exception("预热失败")
+        else:
+            self.ready = True
+        finally:
+            self.finished_at = time.time()
+
+    def start(self):
+        """启动后台预热线程（重复调用无副作用）"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='warm-up', daemon=True)
+            self._thread.start()
+        return self
+
+    def status(self):
+        """预热状态：warming / ready / error，以及已耗时（秒）"""
+        if self.ready:
+            status = 'ready'
+        elif self.error is not None:
+            status = 'error'
+        else:
+            status = 'warming'
+        seconds = None
+        if self.started_at is not None:
+            seconds = round((self.finished_at or time.time()) - self.started_at, 2)
+        return {'status': status, 'ready': self.ready, 'error': self.error, 'seconds': seconds}
+
+
+class _ReadinessHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        content_type = 'application/json; charset=utf-8'
+        if path == '/metrics':
+            code, body = 200, prometheus_text().encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            if path == '/ready':
+                payload = self.server.warmup.status()
+                code = 200 if payload['ready'] else 503
+            else:
+                code, payload = 404, {'error': '接口不存在'}
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def serve_readiness(warmup, port=None, host='0.0.0.0'):
+    """在后台线程中提供就绪检查接口，返回HTTP服务对象
+
+    port省略时读取环境变量WARMUP_READY_PORT，未设置或端口被占用时不启动，返回None。
+    """
+    if port is None:
+        port = os.environ.get(READY_PORT_ENV)
+        if not port:
+            return None
+    try:
+        server = ThreadingHTTPServer((host, int(port)), _ReadinessHandler)
+    except OSError as e:
+        logger.warning("就绪检查接口启动失败（端口 %s）: %s", port, e)
+        return None
+    server.daemon_threads = True
+    server.warmup = warmup
+    threading.Thread(target=server.serve_forever, name='readiness', daemon=True).start()
+    return server
+
+
+def _get(url):
+    """GET请求，返回状态码；连接失败时返回None"""
+    try:
+        with urllib.request.urlopen(url, timeout=120) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def launch(app, port=8501, ready_port=8502, streamlit_args=()):
+    """启动Streamlit应用并立即触发一次脚本执行，使预热在第一位访问者之前开始
+
+    脚本通过Streamlit的脚本健康检查接口执行（不需要浏览器会话），
+    就绪检查接口返回200后停止轮询，之后等待应用进程退出并返回其退出码。
+    """
+    env = dict(os.environ, **{READY_PORT_ENV: str(ready_port)})
+    cmd = [sys.executable, '-m', 'streamlit', 'run', app,
+           '--server.port', str(port),
+           '--server.headless', 'true',
+           '--server.scriptHealthCheckEnabled', 'true',
+           *streamlit_args]
+    process = subprocess.Popen(cmd, env=env)
+    ready_url = f'http://127.0.0.1:{ready_port}/ready'
+    script_url = f'http://127.0.0.1:{port}/_stcore/script-health-check'
+    try:
+        while process.poll() is None:
+            status = _get(ready_url)
+            if status == 200:
+                logger.info("预热完成，应用已就绪: %s", app)
+                break
+            if status is None:
+                # 就绪检查接口尚未启动，说明脚本还没有执行过：触发一次执行
+                _get(script_url)
+            time.sleep(POLL_INTERVAL)
+        return process.wait()
+    except KeyboardInterrupt:
+        process.terminate()
+        return process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='启动Streamlit应用并在后台预热缓存')
+    parser.add_argument('app', help='Streamlit应用脚本')
+    parser.add_argument('--port', type=int, default=8501, help='应用端口')
+    parser.add_argument('--ready-port', type=int, default=8502, help='就绪检查端口')
+    args, streamlit_args = parser.parse_known_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    sys.exit(launch(args.app, args.port, args.ready_port, streamlit_args))
+
+
+if __name__ == '__main__':
+    main()